@@ -0,0 +1,131 @@
+"""Startup time of the package and command line, against a budget
+
+Each target runs in a fresh interpreter several times, the median wall time minus
+the one of a bare interpreter is its startup cost. Targets marked as startup must
+stay under the budget and must not import any translator backend (DeepL client,
+translatepy, Selenium...), those are only imported once a translator is selected.
+The modules taking the most time are listed from python -X importtime.
+
+Usage:
+    python benchmarks/import_time.py --budget 200 --repeat 10
+    python benchmarks/import_time.py --output import_time.json
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import statistics
+import subprocess
+
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of the translator backends, top level names
+BACKEND_MODULES = {
+    "deepl", "translatepy", "selenium", "selenium_stealth", "webdriver_manager",
+    "webdriverdownloader", "fake_useragent", "fp", "PyDeepLX",
+}
+
+# Target name: (python arguments, is it startup, held to the budget)
+TARGETS: Dict[str, Tuple[List[str], bool]] = {
+    "import srtranslator": (["-c", "import srtranslator"], True),
+    "cli --help": (["-m", "srtranslator", "--help"], True),
+    "import registry": (["-c", "import srtranslator.translators.registry"], True),
+    "select deepl-api": ([
+        "-c", "from srtranslator.translators.registry import get_translator; get_translator('deepl-api')"
+    ], False),
+    "select pydeeplx": ([
+        "-c", "from srtranslator.translators.registry import get_translator; get_translator('pydeeplx')"
+    ], False),
+    "select translatepy": ([
+        "-c", "from srtranslator.translators.registry import get_translator; get_translator('translatepy')"
+    ], False),
+}
+
+
+def _run(arguments: List[str], *options: str) -> subprocess.CompletedProcess:
+    # Run against this tree, not an installed version
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run(
+        [sys.executable, *options, *arguments], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+
+
+def wall_time(arguments: List[str], repeat: int) -> float:
+    """Median seconds of a fresh interpreter running the arguments"""
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        _run(arguments)
+        times.append(timeit.default_timer() - start)
+    return statistics.median(times)
+
+
+def imported_modules(arguments: List[str]) -> Tuple[List[Tuple[str, int]], bool]:
+    """Modules imported by the arguments with their own microseconds, and whether they ran without error"""
+    process = _run(arguments, "-X", "importtime")
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_time)))
+    return modules, process.returncode == 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup time of srtranslator against a budget")
+    parser.add_argument("--budget", type=float, default=200, help="Milliseconds allowed to startup targets over a bare interpreter. Default: 200")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per target, the median is kept. Default: 10")
+    parser.add_argument("--top", type=int, default=5, help="Slowest modules listed per target. Default: 5")
+    parser.add_argument("--output", type=str, help="JSON results path")
+    args = parser.parse_args()
+
+    baseline = wall_time(["-c", "pass"], args.repeat)
+    print(f"{'bare interpreter':22} {1000 * baseline:8.1f} ms")
+
+    results = []
+    failures = []
+    for name, (arguments, startup) in TARGETS.items():
+        modules, ok = imported_modules(arguments)
+        if not ok:
+            print(f"{name:22} skipped, it fails here (backend not installed?)")
+            continue
+
+        cost = wall_time(arguments, args.repeat) - baseline
+        backends = sorted({module for module, _ in modules if module.split(".")[0] in BACKEND_MODULES})
+        slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:args.top]
+        results.append({
+            "target": name,
+            "startup": startup,
+            "ms": round(1000 * cost, 1),
+            "modules": len(modules),
+            "backends": backends,
+            "slowest": [{"module": module, "us": us} for module, us in slowest],
+        })
+
+        print(f"{name:22} {1000 * cost:8.1f} ms  {len(modules):5} modules  "
+              f"slowest: {', '.join(f'{module} {us / 1000:.1f}ms' for module, us in slowest)}")
+        if startup and 1000 * cost > args.budget:
+            failures.append(f"{name} takes {1000 * cost:.1f} ms, over the {args.budget:.0f} ms budget")
+        if startup and backends:
+            failures.append(f"{name} imports translator backends: {', '.join(backends[:5])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"baseline_ms": round(1000 * baseline, 1), "budget_ms": args.budget,
+                       "results": results, "failures": failures}, file, indent=2)
+        print(f"Results saved in {args.output}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"Startup within {args.budget:.0f} ms budget, no backend imported")
+
+
+if __name__ == "__main__":
+    main()
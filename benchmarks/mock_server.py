@@ -0,0 +1,205 @@
+"""Local stand-in translation server for benchmarks
+
+Answers the request shapes of the translators of this package, "translating" a
+text to upper case so its lines and ASS style placeholders are kept:
+
+    POST /v2/translate   DeepL API (DeeplApi), JSON or form {"text": [...]}
+    GET  /v2/usage       DeepL API usage, unlimited quota
+    POST /translate      DeepLX server (PyDeepLX endpoint), {"text", "source_lang", "target_lang"}
+    POST /generic        Generic JSON API, {"q", "source", "target"} -> {"translatedText"}
+    GET  /stats          Requests, characters, errors and mangled texts per route
+
+Usage:
+    python benchmarks/mock_server.py --port 1188 --latency 0.05 --jitter 0.02 --error-rate 0.01
+"""
+import json
+import time
+import random
+import argparse
+import threading
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+
+class MockServer:
+    """Translation server with configurable latency, errors and line mangling
+
+    Args:
+        port (int, optional): Port to listen on, 0 for any free port. Defaults to 0.
+        latency (float, optional): Seconds taken by each request. Defaults to 0.05.
+        jitter (float, optional): Random seconds added or removed to the latency. Defaults to 0.
+        per_kchar (float, optional): Seconds added per 1000 characters translated. Defaults to 0.
+        error_rate (float, optional): Ratio of requests answered with error_status. Defaults to 0.
+        error_status (int, optional): Status of failed requests. Defaults to 429.
+        mangle_rate (float, optional): Ratio of texts with two lines merged, as engines sometimes do. Defaults to 0.
+        seed (int, optional): Random seed, for repeatable runs. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            port: int = 0,
+            latency: float = 0.05,
+            jitter: float = 0.0,
+            per_kchar: float = 0.0,
+            error_rate: float = 0.0,
+            error_status: int = 429,
+            mangle_rate: float = 0.0,
+            seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.per_kchar = per_kchar
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.mangle_rate = mangle_rate
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as the translators clients expect
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                server._handle(self, self.rfile.read(length))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self) -> Dict[str, int]:
+        """Clear the statistics
+
+        Returns:
+            Dict[str, int]: Statistics before the reset
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            self.stats.clear()
+        return stats
+
+    def _count(self, **counts: int) -> None:
+        with self._lock:
+            self.stats.update(counts)
+
+    def _chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _delay(self, n_char: int) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter + self.per_kchar * n_char / 1000)
+
+    def _translate(self, text: str) -> str:
+        lines = text.split("\n")
+        if len(lines) > 1 and self._chance(self.mangle_rate):
+            self._count(mangled=1)
+            with self._lock:
+                i = self._random.randrange(len(lines) - 1)
+            lines[i:i + 2] = [f"{lines[i]} {lines[i + 1]}"]
+        return "\n".join(lines).upper()
+
+    def _handle(self, request: BaseHTTPRequestHandler, body: Optional[bytes]) -> None:
+        route = request.path.split("?")[0]
+        if route == "/stats":
+            return self._send(request, 200, dict(self.stats))
+        if route == "/v2/usage":
+            return self._send(request, 200, {"character_count": 0, "character_limit": 10 ** 12})
+
+        try:
+            texts, answer = self._parse(route, request.headers.get("Content-Type", ""), body)
+        except (KeyError, ValueError, TypeError):
+            return self._send(request, 400, {"message": "Bad request"})
+        if texts is None:
+            return self._send(request, 404, {"message": "Not found"})
+
+        n_char = sum(map(len, texts))
+        self._count(requests=1, chars=n_char, **{f"requests {route}": 1})
+        time.sleep(self._delay(n_char))
+
+        if self._chance(self.error_rate):
+            self._count(errors=1)
+            return self._send(request, self.error_status, {"message": "Mock error"}, {"Retry-After": "0"})
+
+        self._send(request, 200, answer([self._translate(text) for text in texts]))
+
+    @staticmethod
+    def _parse(route: str, content_type: str, body: bytes):
+        """Texts of a request and the function shaping the answer, None texts if the route is unknown"""
+        if route == "/v2/translate":
+            if content_type.startswith("application/json"):
+                texts = json.loads(body)["text"]
+            else:
+                texts = parse_qs(body.decode("utf-8"))["text"]
+            texts = [texts] if isinstance(texts, str) else texts
+            return texts, lambda translations: {"translations": [
+                {"detected_source_language": "EN", "text": text} for text in translations
+            ]}
+
+        if route == "/translate":
+            return [json.loads(body)["text"]], lambda translations: {"code": 200, "data": translations[0]}
+
+        if route == "/generic":
+            return [json.loads(body)["q"]], lambda translations: {"translatedText": translations[0]}
+
+        return None, None
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        content = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in translation server")
+    parser.add_argument("--port", type=int, default=1188, help="Port to listen on. Default: 1188")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request. Default: 0.05")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random seconds around the latency. Default: 0")
+    parser.add_argument("--per-kchar", type=float, default=0.0, help="Seconds per 1000 characters. Default: 0")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Ratio of failed requests. Default: 0")
+    parser.add_argument("--error-status", type=int, default=429, help="Status of failed requests. Default: 429")
+    parser.add_argument("--mangle-rate", type=float, default=0.0, help="Ratio of texts with lines merged. Default: 0")
+    parser.add_argument("--seed", type=int, help="Random seed")
+    args = parser.parse_args()
+
+    mock = MockServer(args.port, args.latency, args.jitter, args.per_kchar,
+                      args.error_rate, args.error_status, args.mangle_rate, args.seed)
+    print(f"Mock translation server on {mock.url}")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,220 @@
+"""Micro-benchmarks of the CPU stages of SrtFile and AssFile
+
+Each stage (parsing, sorting, cleaning, chunking, reassembly, wrapping, saving) is
+timed alone on generated files of growing size, without any translator. Time and
+memory allocated are reported per cue, and a stage whose time grows faster than
+the number of cues is flagged.
+
+Usage:
+    python benchmarks/stages.py --cues 1000,4000,16000 --repeat 5
+    python benchmarks/stages.py --formats ass --output stages.json
+"""
+import io
+import os
+import sys
+import json
+import math
+import timeit
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+
+from typing import Callable, Dict, List, Tuple
+
+import srt
+import pyass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from throughput import make_ass, make_srt  # noqa: E402
+from srtranslator.ass_file import AssFile  # noqa: E402
+from srtranslator.srt_file import SrtFile  # noqa: E402
+from srtranslator.translators.deepl_api import DeeplApi  # noqa: E402
+
+CHUNK_SIZE = 1500
+# Time growing with an exponent above this is reported as worse than linear
+SCALING_LIMIT = 1.2
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _quiet(function: Callable, *args):
+    # SrtFile and AssFile print their progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def _load_srt(path: str) -> SrtFile:
+    return _quiet(SrtFile, path)
+
+
+def _load_ass(path: str) -> AssFile:
+    return _quiet(AssFile, path)
+
+
+def _parsed_ass(path: str):
+    with open(path, "r", encoding="utf-8") as file:
+        ass_file = pyass.load(file)
+    ass_file.events = sorted(ass_file.events, key=lambda e: (e.start))
+    return ass_file
+
+
+def _reassemble_ass(state) -> None:
+    ass, chunks = state
+    for portion, text in chunks:
+        lines = text.splitlines()
+        for i, event in enumerate(portion):
+            event.text = ass._restore_styles(event, lines[i])
+
+
+def _reassemble_srt(state) -> None:
+    sub, chunks = state
+    for portion, text in chunks:
+        sub._apply_translation(portion, text)
+
+
+def _joined_srt(path: str) -> SrtFile:
+    sub = _load_srt(path)
+    sub.join_lines()
+    return sub
+
+
+def _ass_chunks(path: str):
+    ass = _load_ass(path)
+    return ass, list(ass._get_next_text_chunk(CHUNK_SIZE))
+
+
+def _srt_chunks(path: str):
+    sub = _load_srt(path)
+    return sub, list(sub._get_next_text_chunk(CHUNK_SIZE))
+
+
+# Stage name: (setup from the file path, not timed, and timed stage on its result)
+STAGES: Dict[str, Dict[str, Tuple[Callable, Callable]]] = {
+    "srt": {
+        "parse": (_read, lambda content: list(srt.parse(content))),
+        "sort_and_reindex": (
+            lambda path: list(srt.parse(_read(path))),
+            lambda subtitles: list(srt.sort_and_reindex(subtitles)),
+        ),
+        "clean": (
+            lambda path: (_load_srt(path), list(srt.sort_and_reindex(srt.parse(_read(path))))),
+            lambda state: state[0]._clean_subs_content(state[1]),
+        ),
+        "load": (lambda path: path, _load_srt),
+        "chunk": (_load_srt, lambda sub: list(sub._get_next_text_chunk(CHUNK_SIZE))),
+        "chunk_batch": (_load_srt, lambda sub: list(sub._get_next_batch(DeeplApi))),
+        "reassemble": (_srt_chunks, _reassemble_srt),
+        "join_lines": (_load_srt, lambda sub: sub.join_lines()),
+        "wrap_lines": (_load_srt, lambda sub: sub.wrap_lines()),
+        "save": (_joined_srt, lambda sub: _quiet(sub.save, f"{sub.filepath}.out")),
+    },
+    "ass": {
+        "parse": (lambda path: path, _parsed_ass),
+        "clean": (
+            lambda path: (_load_ass(path), _parsed_ass(path)),
+            lambda state: state[0]._clean_subs_content(state[1]),
+        ),
+        "load": (lambda path: path, _load_ass),
+        "chunk": (_load_ass, lambda ass: list(ass._get_next_text_chunk(CHUNK_SIZE))),
+        "reassemble": (_ass_chunks, _reassemble_ass),
+        "wrap_lines": (_load_ass, lambda ass: ass.wrap_lines()),
+        "save": (_load_ass, lambda ass: _quiet(ass.save, f"{ass.filepath}.out")),
+    },
+}
+
+
+def measure(setup: Callable, stage: Callable, path: str, repeat: int) -> Tuple[float, int]:
+    """Best time of the stage over repeat runs, and memory it allocated at its peak
+
+    Returns:
+        Tuple[float, int]: Seconds and bytes
+    """
+    best = math.inf
+    for _ in range(repeat):
+        state = setup(path)
+        start = timeit.default_timer()
+        stage(state)
+        best = min(best, timeit.default_timer() - start)
+
+    state = setup(path)
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        stage(state)
+        allocated = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return best, allocated
+
+
+def scaling(points: List[Tuple[int, float]]) -> float:
+    """Exponent of the time growth, 1 for linear, from a least squares fit in log-log"""
+    xs = [math.log(cues) for cues, _ in points]
+    ys = [math.log(max(seconds, 1e-9)) for _, seconds in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of SrtFile and AssFile stages")
+    parser.add_argument("--cues", type=str, default="1000,4000,16000", help="Comma separated file sizes in cues. Default: 1000,4000,16000")
+    parser.add_argument("--formats", type=str, default="srt,ass", help="Comma separated formats. Default: srt,ass")
+    parser.add_argument("--stages", type=str, help="Comma separated stages to run. Default: all")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the best one is kept. Default: 3")
+    parser.add_argument("--output", type=str, help="JSON results path")
+    args = parser.parse_args()
+
+    sizes = sorted(map(int, args.cues.split(",")))
+    results = []
+    flagged = []
+    with tempfile.TemporaryDirectory() as folder:
+        for file_format in args.formats.split(","):
+            paths = {}
+            for cues in sizes:
+                paths[cues] = os.path.join(folder, f"stage_{cues}.{file_format}")
+                (make_srt if file_format == "srt" else make_ass)(paths[cues], cues)
+
+            for name, (setup, stage) in STAGES[file_format].items():
+                if args.stages and name not in args.stages.split(","):
+                    continue
+
+                points = []
+                for cues in sizes:
+                    seconds, allocated = measure(setup, stage, paths[cues], args.repeat)
+                    points.append((cues, seconds))
+                    results.append({
+                        "format": file_format,
+                        "stage": name,
+                        "cues": cues,
+                        "seconds": seconds,
+                        "us_per_cue": round(1e6 * seconds / cues, 3),
+                        "bytes_per_cue": round(allocated / cues, 1),
+                    })
+                    print(f"{file_format:4} {name:18} {cues:>8} cues  {1e6 * seconds / cues:10.2f} us/cue  "
+                          f"{allocated / cues:10.1f} B/cue")
+
+                exponent = scaling(points) if len(points) > 1 else 1.0
+                if exponent > SCALING_LIMIT:
+                    flagged.append(f"{file_format} {name}")
+                    print(f"{file_format:4} {name:18} WORSE THAN LINEAR, time ~ cues^{exponent:.2f}")
+
+    if flagged:
+        print(f"Stages scaling worse than linear: {', '.join(flagged)}")
+    else:
+        print("All stages scale linearly")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"results": results, "worse_than_linear": flagged}, file, indent=2)
+        print(f"Results saved in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
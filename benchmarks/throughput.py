@@ -0,0 +1,310 @@
+"""End to end translation throughput against the local mock server
+
+Generates synthetic SRT and ASS files, translates them with SrtFile / AssFile through
+real translator backends talking to benchmarks/mock_server.py, and writes requests,
+characters per second, chunk latency percentiles and memory peak of each run in a
+JSON file. Give a previous JSON file as baseline to see the changes between versions.
+
+Usage:
+    python benchmarks/throughput.py --cues 1000,10000,100000 --concurrency 4
+    python benchmarks/throughput.py --baseline benchmarks/results/throughput-<before>.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import timeit
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import MockServer  # noqa: E402
+from srtranslator.ass_file import AssFile  # noqa: E402
+from srtranslator.srt_file import SrtFile  # noqa: E402
+from srtranslator.translators.base import Translator  # noqa: E402
+from srtranslator.translators.deepl_api import DeeplApi  # noqa: E402
+from srtranslator.translators.pydeeplx import PyDeepLX  # noqa: E402
+
+WORDS = (
+    "the of and to a in is you that it he was for on are as with his they I at be this have from "
+    "or one had by word but not what all were we when your can said there use an each which she do "
+    "how their if will up other about out many then them these so some her would make like him into "
+    "time has look two more write go see number no way could people my than first water been call"
+).split()
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,0,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))).capitalize() + rng.choice(".?!")
+
+
+def _timestamp(seconds: float, separator: str = ",", digits: int = 3) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    fraction = f"{seconds % 1:.{digits}f}"[2:]
+    return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}{separator}{fraction}"
+
+
+def make_srt(path: str, cues: int, seed: int = 0) -> None:
+    """Write a synthetic SRT file of one or two lines per cue"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(cues):
+            lines = "\n".join(_sentence(rng) for _ in range(rng.randint(1, 2)))
+            file.write(f"{i + 1}\n{_timestamp(i * 2)} --> {_timestamp(i * 2 + 1.5)}\n{lines}\n\n")
+
+
+def make_ass(path: str, cues: int, seed: int = 0) -> None:
+    """Write a synthetic ASS file, some events with override tags and line breaks"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(ASS_HEADER)
+        for i in range(cues):
+            text = _sentence(rng)
+            if rng.random() < 0.3:
+                text = r"{\i1}" + text + r"{\i0}"
+            if rng.random() < 0.3:
+                text += r"\N" + _sentence(rng)
+            start = _timestamp(i * 2, ".", 2)
+            end = _timestamp(i * 2 + 1.5, ".", 2)
+            file.write(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
+
+
+class GenericHttpTranslator(Translator):
+    """Translator of the generic JSON shape of the mock server, {"q", "source", "target"}"""
+
+    max_char = 1500
+
+    def __init__(self, url: str, max_connections: int = 4) -> None:
+        self.url = url
+        self.client = httpx.Client(limits=httpx.Limits(max_connections=max_connections))
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        for attempt in range(5):
+            response = self.client.post(self.url, json={
+                "q": text, "source": source_language, "target": destination_language,
+            })
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            time.sleep(0.1 * 2 ** attempt)
+        response.raise_for_status()
+        return response.json()["translatedText"]
+
+    def quit(self):
+        self.client.close()
+
+
+class DeeplApiText(DeeplApi):
+    """DeeplApi sending newline-joined chunks, as before batch requests"""
+
+    max_texts = None
+
+
+class TimedTranslator(Translator):
+    """Translator recording the latency of each chunk of the wrapped translator"""
+
+    def __init__(self, translator: Translator) -> None:
+        self.translator = translator
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    # Limits and batch support are the wrapped translator ones
+    max_char = property(lambda self: self.translator.max_char)
+    max_bytes = property(lambda self: self.translator.max_bytes)
+    max_texts = property(lambda self: self.translator.max_texts)
+    max_batch_char = property(lambda self: self.translator.max_batch_char)
+    rate_limit = property(lambda self: self.translator.rate_limit)
+
+    def _timed(self, method, *args):
+        start = timeit.default_timer()
+        try:
+            return method(*args)
+        finally:
+            with self._lock:
+                self.latencies.append(timeit.default_timer() - start)
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        return self._timed(self.translator.translate, text, source_language, destination_language)
+
+    def translate_batch(self, texts: List[str], source_language: str, destination_language: str) -> List[str]:
+        return self._timed(self.translator.translate_batch, texts, source_language, destination_language)
+
+    def quit(self):
+        self.translator.quit()
+
+
+BACKENDS = {
+    "deepl-api": lambda url, concurrency: DeeplApi("benchmark:fx", server_url=url),
+    "deepl-api-text": lambda url, concurrency: DeeplApiText("benchmark:fx", server_url=url),
+    "deeplx": lambda url, concurrency: PyDeepLX(endpoint=f"{url}/translate", max_connections=concurrency),
+    "generic": lambda url, concurrency: GenericHttpTranslator(f"{url}/generic", concurrency),
+}
+
+
+def percentile(values: List[float], ratio: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+
+def run(server: MockServer, backend: str, file_format: str, cues: int, concurrency: int,
+        folder: str, trace_memory: bool = True) -> Dict:
+    """Translate a synthetic file end to end and measure it
+
+    Returns:
+        Dict: Measures of the run
+    """
+    source = os.path.join(folder, f"bench_{cues}.{file_format}")
+    if not os.path.exists(source):
+        (make_srt if file_format == "srt" else make_ass)(source, cues)
+
+    translator = TimedTranslator(BACKENDS[backend](server.url, concurrency))
+    server.reset()
+    if trace_memory:
+        tracemalloc.start()
+
+    start = timeit.default_timer()
+    error = None
+    sub = SrtFile(source) if file_format == "srt" else AssFile(source)
+    if file_format == "srt":
+        chars = sum(len(sub._subtitle_text(subtitle)) for subtitle in sub.subtitles)
+    else:
+        chars = sum(len(event.text) for event in sub.cues)
+    try:
+        sub.translate(translator, "EN", "ES", max_concurrency=concurrency)
+        sub.wrap_lines()
+        sub.save(os.path.join(folder, f"out_{backend}_{cues}.{file_format}"))
+    except Exception as e:
+        # A run broken by errors or mangled lines is a result too
+        error = repr(e)
+        sub._delete_backup()
+    elapsed = timeit.default_timer() - start
+
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    translator.quit()
+    stats = server.reset()
+
+    return {
+        "backend": backend,
+        "format": file_format,
+        "cues": cues,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "requests": stats.get("requests", 0),
+        "errors": stats.get("errors", 0),
+        "mangled": stats.get("mangled", 0),
+        "chars": chars,
+        "chars_per_second": round(chars / elapsed, 1),
+        "chunk_p50": percentile(translator.latencies, 0.5),
+        "chunk_p95": percentile(translator.latencies, 0.95),
+        "memory_peak": peak,
+        "error": error,
+    }
+
+
+def _version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: List[Dict], baseline_path: str) -> None:
+    """Print the change of each measure against a previous run"""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {
+            (r["backend"], r["format"], r["cues"], r["concurrency"]): r
+            for r in json.load(file)["results"]
+        }
+
+    for result in results:
+        before = baseline.get((result["backend"], result["format"], result["cues"], result["concurrency"]))
+        if before is None:
+            continue
+        changes = []
+        for measure in ("chars_per_second", "requests", "chunk_p95", "memory_peak"):
+            if before.get(measure) and result.get(measure) is not None:
+                changes.append(f"{measure} {100 * (result[measure] / before[measure] - 1):+.1f}%")
+        print(f"{result['backend']} {result['format']} {result['cues']}: {', '.join(changes)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End to end translation throughput benchmark")
+    parser.add_argument("--cues", type=str, default="1000,10000", help="Comma separated file sizes in cues. Default: 1000,10000")
+    parser.add_argument("--backends", type=str, default=",".join(BACKENDS), help=f"Comma separated backends of {', '.join(BACKENDS)}")
+    parser.add_argument("--formats", type=str, default="srt,ass", help="Comma separated formats. Default: srt,ass")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Chunks translated at the same time. Default: 4")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock server seconds per request. Default: 0.02")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Mock server random seconds around the latency. Default: 0.005")
+    parser.add_argument("--per-kchar", type=float, default=0.002, help="Mock server seconds per 1000 characters. Default: 0.002")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server ratio of failed requests. Default: 0")
+    parser.add_argument("--mangle-rate", type=float, default=0.0, help="Mock server ratio of texts with lines merged. Default: 0")
+    parser.add_argument("--no-memory", action="store_true", help="Do not trace memory, tracing slows the runs")
+    parser.add_argument("--output", type=str, help="JSON results path. Default: benchmarks/results/throughput-<time>.json")
+    parser.add_argument("--baseline", type=str, help="Previous JSON results to compare with")
+    args = parser.parse_args()
+
+    server = MockServer(latency=args.latency, jitter=args.jitter, per_kchar=args.per_kchar,
+                        error_rate=args.error_rate, mangle_rate=args.mangle_rate, seed=0).start()
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for file_format in args.formats.split(","):
+            for cues in map(int, args.cues.split(",")):
+                for backend in args.backends.split(","):
+                    result = run(server, backend, file_format, cues, args.concurrency, folder, not args.no_memory)
+                    results.append(result)
+                    print(json.dumps(result))
+    server.stop()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results", f"throughput-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({
+            "version": _version(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "server": {
+                "latency": args.latency, "jitter": args.jitter, "per_kchar": args.per_kchar,
+                "error_rate": args.error_rate, "mangle_rate": args.mangle_rate,
+            },
+            "results": results,
+        }, file, indent=2)
+    print(f"Results saved in {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
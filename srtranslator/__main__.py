@@ -5,10 +5,10 @@ import traceback
 
 from .ass_file import AssFile
 from .srt_file import SrtFile
-from .translators.deepl_api import DeeplApi
-from .translators.deepl_handler import DeeplTranslator
-from .translators.pydeeplx import PyDeepLX
-from .translators.translatepy import TranslatePy
+from .srt_stream import SrtStream
+from .translation_memory import TranslationMemory
+from .translators.adaptive import AdaptiveTranslator
+from .translators.registry import BUILTIN_TRANSLATORS, available_translators, get_translator
 
 parser = argparse.ArgumentParser(description="Translate an .STR and .ASS file")
 
@@ -73,15 +73,71 @@ parser.add_argument(
     "-t",
     "--translator",
     type=str,
-    choices=["deepl-scrap", "translatepy", "deepl-api", "pydeeplx"],
-    help="Built-in translator to use",
+    metavar="{" + ",".join(BUILTIN_TRANSLATORS) + "}",
+    help="Translator to use, built-in or installed plugin. Only the selected one is imported",
     default="deepl-scrap",
 )
 
 parser.add_argument(
     "--auth",
     type=str,
-    help="Api key if needed on translator",
+    help="Api key if needed on translator. Several deepl-api keys separated by commas are used together",
+)
+
+parser.add_argument(
+    "--endpoint",
+    type=str,
+    help="DeepLX compatible server URL for pydeeplx, e.g. http://localhost:1188/translate",
+)
+
+parser.add_argument(
+    "-c",
+    "--concurrency",
+    type=int,
+    default=1,
+    help="Number of chunks translated at the same time. Only for thread safe translators (deepl-api, translatepy, pydeeplx). Default: 1",
+)
+
+parser.add_argument(
+    "--memory",
+    type=str,
+    help="Translation memory database path. Texts already translated there are not sent again. Not with --stream",
+)
+
+parser.add_argument(
+    "--dedupe",
+    action="store_true",
+    help="Translate only once subtitles with the same text. Not with --stream",
+)
+
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="Translate .SRT file as a stream, writing each chunk once translated. For very large files",
+)
+
+parser.add_argument(
+    "--adaptive",
+    action="store_true",
+    help="Tune the chunk size at runtime from the translator speed and failures, remembered for next runs",
+)
+
+parser.add_argument(
+    "--adaptive-max",
+    type=int,
+    help="Largest chunk size --adaptive can reach. Default: the translator size limit in bytes, else its max_char",
+)
+
+parser.add_argument(
+    "--report",
+    type=str,
+    help="Write the translation report (time per stage, chunks latency, retries, cache hits) to this JSON file",
+)
+
+parser.add_argument(
+    "--keep-encoding",
+    action="store_true",
+    help="Write the translated file in the encoding of the source file instead of UTF-8, if the translation fits in it. Not with --stream",
 )
 
 parser.add_argument(
@@ -90,16 +146,17 @@ parser.add_argument(
     help="Use proxy by default for pydeeplx",
 )
 
-builtin_translators = {
-    "deepl-scrap": DeeplTranslator,
-    "deepl-api": DeeplApi,
-    "translatepy": TranslatePy,
-    "pydeeplx": PyDeepLX,
-}
-
 args = parser.parse_args()
 logging.basicConfig(level=args.loglevel)
 
+if args.stream:
+    # A stream is written while translated, without memory, dedupe nor source encoding
+    unsupported = [flag for flag, value in (
+        ("--memory", args.memory), ("--dedupe", args.dedupe), ("--keep-encoding", args.keep_encoding)
+    ) if value]
+    if unsupported:
+        parser.error(f"argument --stream: not allowed with {', '.join(unsupported)}")
+
 try:
     os.environ.pop("MOZ_HEADLESS")
 except:
@@ -113,21 +170,56 @@ if args.auth:
     translator_args["api_key"] = args.auth
 if args.proxies:
     translator_args["proxies"] = args.proxies
-
-translator = builtin_translators[args.translator](**translator_args)
+if args.endpoint:
+    translator_args["endpoint"] = args.endpoint
 
 try:
-    sub = AssFile(args.filepath)
-except AttributeError:
-    print("... Exception while loading as ASS try as SRT")
-    sub = SrtFile(args.filepath)
-
-try:
-    sub.translate(translator, args.src_lang, args.dest_lang)
-    sub.wrap_lines(args.wrap_limit)
-    sub.save(f"{os.path.splitext(args.filepath)[0]}_{args.dest_lang}{os.path.splitext(args.filepath)[1]}")
-except:
-    sub.save_backup()
-    traceback.print_exc()
+    translator_class = get_translator(args.translator)
+except KeyError:
+    parser.error(f"argument -t/--translator: invalid choice: '{args.translator}' (choose from {', '.join(available_translators())})")
+
+pool = None
+if args.translator == "deepl-api" and args.auth and "," in args.auth:
+    from .translators.deepl_api import DeeplApiPool
+
+    api_keys = [key.strip() for key in args.auth.split(",") if key.strip()]
+    if not api_keys:
+        parser.error("argument --auth: no DeepL API key given")
+    translator = pool = DeeplApiPool(api_keys)
+else:
+    translator = translator_class(**translator_args)
+if args.adaptive:
+    translator = AdaptiveTranslator(translator, max_limit=args.adaptive_max)
+memory = TranslationMemory(args.memory) if args.memory else None
+
+output_filepath = f"{os.path.splitext(args.filepath)[0]}_{args.dest_lang}{os.path.splitext(args.filepath)[1]}"
+
+if args.stream:
+    sub = SrtStream(args.filepath, output_filepath)
+    sub.translate(translator, args.src_lang, args.dest_lang, args.concurrency, wrap_limit=args.wrap_limit)
+else:
+    try:
+        sub = AssFile(args.filepath)
+    except AttributeError:
+        print("... Exception while loading as ASS try as SRT")
+        sub = SrtFile(args.filepath)
+
+    try:
+        sub.translate(translator, args.src_lang, args.dest_lang, args.concurrency, memory, args.dedupe)
+        sub.wrap_lines(args.wrap_limit)
+        sub.save(output_filepath, args.keep_encoding)
+    except:
+        sub.save_backup()
+        traceback.print_exc()
+
+if args.report and sub.report is not None:
+    sub.report.save(args.report)
+
+if pool is not None:
+    for key in pool.report():
+        print(f"... DeepL API key {key['key']}: {key['requests']} requests, {key['chars']} characters, "
+              f"{key['failures']} failures, {key['remaining']} remaining ({key['state']})")
 
 translator.quit()
+if memory is not None:
+    memory.close()
@@ -1,10 +1,39 @@
+import io
 import os
 import re
+import itertools
 import pyass
+import timeit
+
+from typing import Callable, Dict, Iterable, List, Generator, Optional, Tuple, Union
+
+from .chunking import plan_chunks
+from .cleaning import TAGS, TextCleaner
+from .cues import Cue
+from .dispatch import translate_chunks
+from .encoding import read_text
+from .journal import TranslationJournal, fingerprint
+from .report import TranslationHook, TranslationReport
+from .translation_memory import TranslationMemory
+from .translators.base import Translator
+from .translators.rate_limit import throttle
 
-from typing import List, Generator
+# ASS override tags, {\\i1}, {\\pos(10,20)}, {\\k20}...
+OVERRIDE_TAGS = re.compile(r"{.*?}")
+# Placeholder of the n-th override tag of an event while it is translated, {0}, {1}...
+STYLE_TOKENS = re.compile(r"{(\d+)}")
 
-from .translators.base import Translator
+# Events text normalization, in order
+CLEANER = TextCleaner([TAGS, str.strip, lambda text: text or "..."])
+
+BREAKS_CLEANER = TextCleaner([
+    # It looks like \N is removed by the translation so we replace them by \\\\
+    {r"\N": r"\\\\"},
+    # The \\\\ must be separated from the words to avoid weird conversions
+    (r"[aA0-zZ9]\\\\", r" \\\\"),
+    (r"\\\\[aA0-zZ9]", r"\\\\ "),
+    {"\n": " "},
+])
 
 
 class AssFile:
@@ -16,192 +45,447 @@ class AssFile:
 
     def __init__(self, filepath: str) -> None:
         self.filepath = filepath
-        self.backup_file = f"{self.filepath}.tmp"
+        self.journal_file = f"{self.filepath}.journal"
+        self.journal = None
         self.subtitles = []
-        self.start_from = 0
+        # Events as cues, the events are made again from them when saved
+        self.cues = []
         self.current_subtitle = 0
-        self.text_styles = []
+        # Override tags taken out of each event text while translating, by event id
+        self.text_styles = {}
+        self.spans = {}
+        self.report = None
 
         print(f"Loading {filepath} as ASS")
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as input_file:
-            self.subtitles = self.load_from_file(input_file)
+        # Encoding guessed from the first bytes, save can keep it
+        content, self.encoding = read_text(filepath)
+        self.subtitles = self.load_from_file(io.StringIO(content))
 
-        self._load_backup()
+    def load_from_file(self, input_file):
+        start = timeit.default_timer()
+        ass_file        = pyass.load(input_file)
+        ass_file.events = sorted(ass_file.events, key=lambda e: (e.start))
+        parsed = timeit.default_timer()
+        self.cues = self._clean_subs_content(ass_file)
+        ass_file.events = []
+        # Loading happens before any translation, its report gets these spans
+        self.spans = {"parse": parsed - start, "clean": timeit.default_timer() - parsed}
+        return ass_file
 
-    def _load_backup(self):
-        if not os.path.exists(self.backup_file):
-            return
+    def _extract_styles(self, events: Iterable[Cue]) -> Generator:
+        """Take the override tags out of the events text, each tag replaced by its index {n}
 
-        print(f"Backup file found = {self.backup_file}")
-        with open(
-            self.backup_file, "r", encoding="utf-8", errors="ignore"
-        ) as input_file:
-            subtitles = self.load_from_file(input_file)
+        The tags are kept per event, in order, so the {n} of an event translation gets
+        back the n-th tag of that event, even if the translation moved it.
 
-            self.start_from = len(subtitles.events)
-            self.current_subtitle = self.start_from
-            print(f"Starting from subtitle {self.start_from}")
-            self.subtitles.events = [
-                *subtitles.events,
-                *self.subtitles.events[self.start_from :],
-            ]
+        Args:
+            events (Iterable[Cue]): Events to translate
 
-    def load_from_file(self, input_file):
-        ass_file        = pyass.load(input_file)
-        ass_file.events = sorted(ass_file.events, key=lambda e: (e.start))
-        return self._clean_subs_content(ass_file)
+        Yields:
+            Generator: Each event, its tags replaced by {0}, {1}...
+        """
+        for event in events:
+            tags = OVERRIDE_TAGS.findall(event.text)
+            if tags:
+                indexes = itertools.count()
+                event.text = OVERRIDE_TAGS.sub(lambda match: f"{{{next(indexes)}}}", event.text)
+                self.text_styles[id(event)] = tags
+            yield event
+
+    def _clean_subs_content(self, subtitles) -> List[Cue]:
+        """Cleans subtitles content and delete line breaks
+
+        Args:
+            subtitles (Script): Parsed ASS file
+
+        Returns:
+            List[Cue]: Cues of the events, cleaned
+        """
+        events = [Cue.from_event(i, event) for i, event in enumerate(subtitles.events, 1)]
+        with_breaks = []
+        for event, text in zip(events, CLEANER.clean_many(event.text for event in events)):
+            # No real equivalent of srt.make_legal_content in ASS
+            if all(sentence.startswith("-") for sentence in text.split("\n")):
+                event.text = text.replace("\n", "////")
+            else:
+                event.text = text
+                with_breaks.append(event)
 
-    def _get_next_chunk(self, chunk_size: int = 4500) -> Generator:
-        """Get a portion of the subtitles at the time based on the chunk size
+        for event, text in zip(with_breaks, BREAKS_CLEANER.clean_many(event.text for event in with_breaks)):
+            event.text = text
+
+        return events
+
+    def wrap_lines(self, line_wrap_limit: int = 50) -> None:
+        """
 
         Args:
-            chunk_size (int, optional): Maximum number of letter in text chunk. Defaults to 4500.
+            line_wrap_limit (int): Number of maximum characters in a line before wrap. Defaults to 50. (not used)
+        """
+        for sub in self.cues:
+            sub.text = sub.text.replace("////", "\n")
+            sub.text = sub.text.replace(r" \\\\ ", r"\N")
+
+    def _get_next_text_chunk(
+        self,
+        chunk_size: Union[float, Callable[[], float]],
+        events: Optional[Iterable[Cue]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Generator:
+        """Get each chunk with its text to translate, as full as the translator limits allow
+
+        Args:
+            chunk_size (Union[float, Callable[[], float]]): Maximum number of letter in text chunk, or a function returning it
+            events (Iterable[Cue], optional): Events to split in chunks. Defaults to all events in file.
+            max_bytes (int, optional): Maximum number of UTF-8 bytes in text chunk. Defaults to None.
 
         Yields:
-            Generator: Each chunk at the time
+            Generator: Pairs of (chunk, text)
         """
-        portion = []
+        if events is None:
+            events = self.cues
 
-        for subtitle in self.subtitles.events[self.start_from :]:
-            # Manage ASS styles for subtitle before add it to the portion
-            # Extract a list of styles
-            # Replace the styles by |
+        # Put chunk in a single text with break lines
+        yield from plan_chunks(self._extract_styles(events), lambda event: event.text, chunk_size, max_bytes)
 
-            # Each style starts with { and end with }
-            # If we have an "}" then we can split and keep the part on the left and keep it in our list
-            for i in subtitle.text.split("{"):
-                if "}" in i:
-                    self.text_styles.append("{" + i.split("}")[0] + "}")
+    def _get_next_batch(self, translator: Translator, events: Optional[Iterable[Cue]] = None) -> Generator:
+        """Get each chunk with the list of its events texts, for translators translating lists of texts
 
-            subtitle.text = re.sub(r"{.*?}", r"|", subtitle.text)
+        Args:
+            translator (Translator): Translator with max_texts set
+            events (Iterable[Cue], optional): Events to split in chunks. Defaults to all events in file.
 
-            # Calculate new chunk size if subtitle content is added to actual chunk
-            n_char = (
-                sum(len(sub.text) for sub in portion)  # All subtitles in chunk
-                + len(subtitle.text)  # New subtitle
-                + len(portion)  # Break lines in chunk
-                + 1  # New breakline
-            )
+        Yields:
+            Generator: Pairs of (chunk, texts)
+        """
+        if events is None:
+            events = self.cues
 
-            # If chunk goes beyond the limit, yield it
-            if n_char >= chunk_size and len(portion) != 0:
-                yield portion
-                portion = []
+        yield from plan_chunks(
+            self._extract_styles(events),
+            lambda event: event.text,
+            translator.max_batch_char or translator.max_char,
+            translator.max_bytes,
+            separator=None,
+            max_units=translator.max_texts,
+        )
 
-            # Put subtitle content in chunk
-            portion.append(subtitle)
+    def _next_chunks(self, translator: Translator, events: List[Cue]) -> Generator:
+        """Chunks to send to the translator, lists of texts if it translates them in a single request
 
-        # Yield last chunk
-        yield portion
+        Args:
+            translator (Translator): Translator object of choose
+            events (List[Cue]): Events to translate
 
-    def _clean_subs_content(self, subtitles):
-        """Cleans subtitles content and delete line breaks
+        Returns:
+            Generator: Pairs of (chunk, text or texts)
+        """
+        if translator.max_texts:
+            return self._get_next_batch(translator, events)
+        return self._get_next_text_chunk(lambda: translator.max_char, events, translator.max_bytes)
+
+    def _restore_styles(self, event, translation: str) -> str:
+        """Insert the override tags of an event back in its translation instead of their {n}
+
+        A {n} missing in the translation leaves its tag at the end of the text, an unknown
+        or repeated {n} is removed
 
         Args:
-            subtitles List of subtitles
+            event (Cue): Translated event
+            translation (str): Translated text of the event, with {n} in place of its n-th tag
 
         Returns:
-            Same list of subtitles, but cleaned
+            str: Translated text with its tags
         """
-        cleanr = re.compile("<.*?>")
+        tags = self.text_styles.pop(id(event), None)
+        if tags is None:
+            return translation
+
+        placed = set()
 
-        for sub in subtitles.events:
-            sub.text = cleanr.sub("", sub.text)
-            # No real equivalent in ASS
-            #sub.text = srt.make_legal_content(sub.content)
-            sub.text = sub.text.strip()
+        def restore(match) -> str:
+            index = int(match.group(1))
+            if index >= len(tags) or index in placed:
+                return ""
+            placed.add(index)
+            return tags[index]
 
-            if sub.text == "":
-                sub.text = "..."
+        restored = STYLE_TOKENS.sub(restore, translation)
+        return restored + "".join(tag for index, tag in enumerate(tags) if index not in placed)
 
-            if all(sentence.startswith("-") for sentence in sub.text.split("\n")):
-                sub.text = sub.text.replace("\n", "////")
-                continue
+    def _translate_events(
+        self,
+        events: List[Cue],
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+    ) -> List[str]:
+        """Translate events one at a time, when the translation of their chunk does not match them
+
+        Args:
+            events (List[Cue]): Events of the chunk
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
 
-            # It looks like \N is removed by the translation so we replace them by \\\\
-            sub.text = sub.text.replace(r"\N", r"\\\\")
+        Returns:
+            List[str]: One translated text per event
+        """
+        translation = []
+        for event in events:
+            # Requests added to the chunk, the dispatcher only throttled the chunk
+            throttle(translator, len(event.text))
+            text = translator.translate(event.text, source_language, destination_language)
+            # Event text has no line breaks, they are escaped while cleaning
+            translation.append(" ".join(text.splitlines()))
+        return translation
+
+    def _replay_journal(self, source_language: str, destination_language: str) -> List[Cue]:
+        """Open the journal of this translation and put back events already translated
 
-            # The \\\\ must be separated from the words to avoid weird conversions
-            sub.text = re.sub(r"[aA0-zZ9]\\\\", r" \\\\", sub.text)
-            sub.text = re.sub(r"\\\\[aA0-zZ9]", r"\\\\ ", sub.text)
+        Args:
+            source_language (str): Source language
+            destination_language (str): Destination language
 
-            sub.text = sub.text.replace("\n", " ")
+        Returns:
+            List[Cue]: Events not in journal, still to translate
+        """
+        self.journal = TranslationJournal(self.journal_file, fingerprint(
+            (source_language, destination_language),
+            (event.text for event in self.cues),
+        ))
+        translated = self.journal.replay()
+
+        missing = []
+        for i, event in enumerate(self.cues):
+            if i in translated:
+                event.text = translated[i]
+            else:
+                missing.append(event)
+
+        if translated:
+            print(f"... Resuming translation, {len(missing)} events left")
+        return missing
+
+    def _apply_memory(
+        self,
+        memory: TranslationMemory,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        events: List[Cue],
+    ) -> List[Cue]:
+        """Put translations already in memory in events text
 
-        return subtitles
+        Args:
+            memory (TranslationMemory): Translation memory to look up
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
+            events (List[Cue]): Events to translate
 
-    def wrap_lines(self, line_wrap_limit: int = 50) -> None:
+        Returns:
+            List[Cue]: Events not found in memory, still to translate
         """
+        found = memory.get_many(
+            translator.name, source_language, destination_language,
+            (event.text for event in events),
+        )
+
+        missing = []
+        for event in events:
+            translation = found.get(event.text)
+            if translation is None:
+                missing.append(event)
+            else:
+                event.text = translation
+
+        print(f"... Translation memory: {len(events) - len(missing)} found, {len(missing)} to translate")
+        return missing
+
+    def _dedupe(self, events: List[Cue]) -> Tuple[List[Cue], Dict[int, List[Cue]]]:
+        """Collapse events with the same text in a single translation unit
 
         Args:
-            line_wrap_limit (int): Number of maximum characters in a line before wrap. Defaults to 50. (not used)
+            events (List[Cue]): Events to translate
+
+        Returns:
+            Tuple[List[Cue], Dict[int, List[Cue]]]: Unique events, and their duplicates by id of the unique one
         """
-        for sub in self.subtitles.events:
-            sub.text = sub.text.replace("////", "\n")
-            sub.text = sub.text.replace(r" \\\\ ", r"\N")
+        unique = {}
+        duplicates = {}
+        for event in events:
+            first = unique.setdefault(event.text, event)
+            if first is not event:
+                duplicates.setdefault(id(first), []).append(event)
+
+        print(f"... Deduplicate: {len(unique)} unique of {len(events)} events")
+        return list(unique.values()), duplicates
 
     def translate(
         self,
         translator: Translator,
         source_language: str,
         destination_language: str,
-    ) -> None:
+        max_concurrency: int = 1,
+        memory: Optional[TranslationMemory] = None,
+        dedupe: bool = False,
+        hooks: Optional[List[TranslationHook]] = None,
+    ) -> TranslationReport:
         """Translate ASS file using a translator of your choose
 
+        Each translated chunk is kept in a journal next to the file until it is saved,
+        so an interrupted translation resumes where it stopped.
+
         Args:
             translator (Translator): Translator object of choose
             destination_language (str): Destination language (must be coherent with your translator)
             source_language (str): Source language (must be coherent with your translator)
-        """
+            max_concurrency (int, optional): Number of chunks translated at the same time. Translator must be thread safe if greater than 1. Defaults to 1.
+            memory (TranslationMemory, optional): Translation memory looked up before translating and filled after. Defaults to None.
+            dedupe (bool, optional): Translate only once events with the same text. Defaults to False.
+            hooks (List[TranslationHook], optional): Hooks receiving the spans and chunks as they happen. Defaults to None.
 
-        # For each chunk of the file (based on the translator capabilities)
-        for subs_slice in self._get_next_chunk(translator.max_char):
-            progress = int(100 * self.current_subtitle / len(self.subtitles.events))
-            print(f"... Translating {progress} %")
-
-            # Put chunk in a single text with break lines
-            text = [sub.text for sub in subs_slice]
-            text = "\n".join(text)
-
-            # Translate
-            translation = translator.translate(
-                text, source_language, destination_language
-            )
-
-            # Manage ASS commands
-            # Insert the styles back in the text instead of |
-            self.text_styles.reverse()
-            translation_with_styles = ""
-            for i in translation.split(r"|"):
-                try:
-                    # We set i at the left part because the style must "replace" the "|"
-                    translation_with_styles += i + self.text_styles.pop()
-                except IndexError:
-                    translation_with_styles += i
-
-            # Break each line back into subtitle content
-            translation = translation_with_styles.splitlines()
-            for i in range(len(subs_slice)):
-                subs_slice[i].text = translation[i]
-                self.current_subtitle += 1
+        Returns:
+            TranslationReport: Time spent per stage, chunks latency, retries and cache hits. Saving the file adds its span
+        """
+        report = self.report = TranslationReport(
+            self.filepath, translator.name, source_language, destination_language, hooks
+        )
+        for name, seconds in self.spans.items():
+            report.add_span(name, seconds)
+        report.units = len(self.cues)
+        retries = translator.retries
+
+        with report.span("journal"):
+            events = self._replay_journal(source_language, destination_language)
+        report.journal_hits = len(self.cues) - len(events)
+        self.current_subtitle = len(self.cues) - len(events)
+        positions = {id(event): i for i, event in enumerate(self.cues)}
+
+        sources = {}
+        if memory is not None:
+            with report.span("memory"):
+                missing = self._apply_memory(memory, translator, source_language, destination_language, events)
+            report.memory_hits = len(events) - len(missing)
+            events = missing
+            # Styles are taken out of the text while chunking, keep the original to remember it
+            sources = {id(event): event.text for event in events}
+
+        duplicates = {}
+        if dedupe:
+            with report.span("dedupe"):
+                events, duplicates = self._dedupe(events)
+            report.duplicates = sum(map(len, duplicates.values()))
+
+        try:
+            # For each chunk of the file (based on the translator capabilities)
+            with report.span("translate"):
+                for subs_slice, translation in translate_chunks(
+                    translator,
+                    report.timed("chunk", self._next_chunks(translator, events)),
+                    source_language,
+                    destination_language,
+                    max_concurrency,
+                    report,
+                ):
+                    progress = int(100 * self.current_subtitle / len(self.cues))
+                    print(f"... Translating {progress} %")
+
+                    with report.span("reassemble"):
+                        self._complete_chunk(
+                            subs_slice, translation, duplicates, positions, sources,
+                            translator, source_language, destination_language, memory,
+                        )
+        finally:
+            self.journal.close()
+            report.retries = translator.retries - retries
 
         print(f"... Translation done")
+        return report
+
+    def _complete_chunk(
+        self,
+        subs_slice: List[Cue],
+        translation,
+        duplicates: Dict[int, List[Cue]],
+        positions: Dict[int, int],
+        sources: Dict[int, str],
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        memory: Optional[TranslationMemory] = None,
+    ) -> None:
+        """Put the translation back in the events of the chunk, fan it out, journal and remember it
+
+        Args:
+            subs_slice (List[Cue]): Events of the chunk
+            translation (Union[str, List[str]]): Translated text of the chunk, or one translated text per event
+            duplicates (Dict[int, List[Cue]]): Events with the same text, by id of the translated one
+            positions (Dict[int, int]): Index of each event in file, by id
+            sources (Dict[int, str]): Original text of each event, by id, to fill the memory
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
+            memory (TranslationMemory, optional): Translation memory to fill. Defaults to None.
+        """
+        # Batch translations map 1:1 to events, else break each line back into events text
+        if not isinstance(translation, list):
+            # Events are never empty, a blank line is added by the translator
+            translation = [line for line in translation.splitlines() if line.strip()]
+
+        if len(translation) != len(subs_slice):
+            print(f"... {len(translation)} lines translated for {len(subs_slice)} events, translating them one by one")
+            translation = self._translate_events(subs_slice, translator, source_language, destination_language)
+
+        translated = list(subs_slice)
+        for i in range(len(subs_slice)):
+            subs_slice[i].text = self._restore_styles(subs_slice[i], translation[i])
+
+            # Fan out the translation to events with the same text
+            for duplicate in duplicates.get(id(subs_slice[i]), ()):
+                duplicate.text = subs_slice[i].text
+                translated.append(duplicate)
+
+        self.current_subtitle += len(translated)
+        self.journal.append({positions[id(event)]: event.text for event in translated})
+
+        if memory is not None:
+            memory.put_many(translator.name, source_language, destination_language, [
+                (sources[id(sub)], sub.text) for sub in subs_slice
+            ])
 
     def save_backup(self):
-        self.subtitles.events = self.subtitles.events[: self.current_subtitle]
-        self.save(self.backup_file)
+        """Keep the journal of translated chunks, so next translation of this file resumes from it"""
+        if self.journal is not None:
+            self.journal.close()
+        print(f"Translated chunks kept in {self.journal_file}")
 
     def _delete_backup(self):
-        if os.path.exists(self.backup_file):
-            os.remove(self.backup_file)
+        if self.journal is not None:
+            self.journal.close()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
 
-    def save(self, filepath: str) -> None:
+    def save(self, filepath: str, keep_encoding: bool = False) -> None:
         """Saves ASS to file
 
         Args:
             filepath (str): Path of the new file
+            keep_encoding (bool, optional): Write it in the encoding of the source file instead of UTF-8, if the translation fits in it. Defaults to False.
         """
-        self._delete_backup()
-
         print(f"Saving {filepath}")
-        with open(filepath, "w", encoding="utf-8") as file_out:
-            pyass.dump(self.subtitles, file_out)
+        start = timeit.default_timer()
+        self.subtitles.events = [cue.to_event() for cue in self.cues]
+        encoding = self.encoding if keep_encoding else "utf-8"
+        try:
+            with open(filepath, "w", encoding=encoding) as file_out:
+                pyass.dump(self.subtitles, file_out)
+        except UnicodeEncodeError:
+            print(f"... Translation does not fit in {encoding}, saving as UTF-8")
+            with open(filepath, "w", encoding="utf-8") as file_out:
+                pyass.dump(self.subtitles, file_out)
+        if self.report is not None:
+            self.report.add_span("save", timeit.default_timer() - start)
+
+        self._delete_backup()
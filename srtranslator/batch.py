@@ -0,0 +1,205 @@
+import logging
+
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+from .chunking import plan_chunks
+from .cues import Cue
+from .dispatch import translate_chunks
+from .srt_file import SrtFile
+from .translation_memory import TranslationMemory
+from .translators.base import Translator
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTranslator:
+    """Translate many SRT files packing subtitles of several files in the same chunks
+
+    Translating files one by one leaves the last chunk of each file far below the
+    translator limit, which for short clips means mostly half-empty requests. Here
+    chunks are filled with subtitles of the next files, and each file is handed back
+    as soon as all its subtitles are translated. Translators taking lists of texts
+    (max_texts set) get lists of subtitles packed the same way.
+
+    Args:
+        translator (Translator): Translator object of choose
+        source_language (str): Source language (must be coherent with your translator)
+        destination_language (str): Destination language (must be coherent with your translator)
+        max_concurrency (int, optional): Number of chunks translated at the same time. Translator must be thread safe if greater than 1. Defaults to 1.
+        memory (TranslationMemory, optional): Translation memory looked up before translating and filled after. Defaults to None.
+        dedupe (bool, optional): Translate only once subtitles with the same content in a file, or in files of the batch waiting for the same translation. Defaults to False.
+    """
+
+    def __init__(
+            self,
+            translator: Translator,
+            source_language: str,
+            destination_language: str,
+            max_concurrency: int = 1,
+            memory: Optional[TranslationMemory] = None,
+            dedupe: bool = False,
+    ) -> None:
+        self.translator = translator
+        self.source_language = source_language
+        self.destination_language = destination_language
+        self.max_concurrency = max_concurrency
+        self.memory = memory
+        self.dedupe = dedupe
+        self.failed: List[str] = []
+        self.requests = 0
+        self._remaining: Dict[SrtFile, int] = {}
+        self._on_file_done: Callable[[SrtFile], None] = lambda srt_file: None
+        # Subtitles waiting for the translation of a subtitle with the same text already sent
+        self._pending: Dict[str, List[Tuple[SrtFile, Cue]]] = {}
+
+    def _finish(self, srt_file: SrtFile) -> None:
+        self._remaining.pop(srt_file, None)
+        srt_file.journal.close()
+        try:
+            self._on_file_done(srt_file)
+        except Exception:
+            logger.exception(f"Error saving file :: {srt_file.filepath}")
+            self.failed.append(srt_file.filepath)
+
+    def _get_next_subtitle(self, filepaths: Iterable[str]) -> Generator:
+        """Load files one at the time, only when chunks need more subtitles
+
+        Args:
+            filepaths (Iterable[str]): Files to translate
+
+        Yields:
+            Generator: Pairs of (file, subtitle) still to translate
+        """
+        for filepath in filepaths:
+            try:
+                srt_file = SrtFile(filepath)
+                subtitles = srt_file._prepare_translation(
+                    self.translator, self.source_language, self.destination_language, self.memory, self.dedupe
+                )
+            except Exception:
+                logger.exception(f"Error loading file :: {filepath}")
+                self.failed.append(filepath)
+                continue
+
+            if not subtitles:
+                self._finish(srt_file)
+                continue
+
+            self._remaining[srt_file] = len(subtitles)
+            for sub in subtitles:
+                if self.dedupe:
+                    key = srt_file._subtitle_text(sub)
+                    followers = self._pending.get(key)
+                    if followers is not None:
+                        followers.append((srt_file, sub))
+                        continue
+                    self._pending[key] = []
+                yield srt_file, sub
+
+    def _get_next_chunk(
+            self,
+            filepaths: Iterable[str],
+            chunk_size: Union[float, Callable[[], float]],
+            max_bytes: Optional[int] = None,
+    ) -> Generator:
+        """Pack subtitles of all files in chunks, as full as the translator limits allow
+
+        Args:
+            filepaths (Iterable[str]): Files to translate
+            chunk_size (Union[float, Callable[[], float]]): Maximum number of letter in text chunk, or a function returning it
+            max_bytes (int, optional): Maximum number of UTF-8 bytes in text chunk. Defaults to None.
+
+        Yields:
+            Generator: Pairs of (chunk, text), the chunk being a list of (file, subtitle)
+        """
+        # Same text as SrtFile chunks, an empty line between subtitles
+        yield from plan_chunks(
+            self._get_next_subtitle(filepaths),
+            lambda entry: entry[0]._subtitle_text(entry[1]),
+            chunk_size,
+            max_bytes,
+            separator="\n\n",
+        )
+
+    def _get_next_batch(self, filepaths: Iterable[str]) -> Generator:
+        """Pack subtitles of all files in lists of texts, for translators translating lists of texts
+
+        Args:
+            filepaths (Iterable[str]): Files to translate
+
+        Yields:
+            Generator: Pairs of (chunk, texts), the chunk being a list of (file, subtitle)
+        """
+        yield from plan_chunks(
+            self._get_next_subtitle(filepaths),
+            lambda entry: entry[0]._subtitle_text(entry[1]),
+            self.translator.max_batch_char or self.translator.max_char,
+            self.translator.max_bytes,
+            separator=None,
+            max_units=self.translator.max_texts,
+        )
+
+    def _next_chunks(self, filepaths: Iterable[str]) -> Generator:
+        """Chunks to send to the translator, lists of texts if it translates them in a single request
+
+        Args:
+            filepaths (Iterable[str]): Files to translate
+
+        Returns:
+            Generator: Pairs of (chunk, text or texts)
+        """
+        if self.translator.max_texts:
+            return self._get_next_batch(filepaths)
+        return self._get_next_chunk(filepaths, lambda: self.translator.max_char, self.translator.max_bytes)
+
+    def translate(self, filepaths: Iterable[str], on_file_done: Callable[[SrtFile], None]) -> None:
+        """Translate all files, calling on_file_done with each file once translated
+
+        Args:
+            filepaths (Iterable[str]): Files to translate
+            on_file_done (Callable[[SrtFile], None]): Called with each translated file, to save it
+        """
+        self._on_file_done = on_file_done
+        self._pending = {}
+
+        try:
+            for portion, translation in translate_chunks(
+                    self.translator,
+                    self._next_chunks(filepaths),
+                    self.source_language,
+                    self.destination_language,
+                    self.max_concurrency,
+            ):
+                self.requests += 1
+                subs_slice = [sub for _, sub in portion]
+                sources = [sub.text for sub in subs_slice]
+                keys = [srt_file._subtitle_text(sub) for srt_file, sub in portion]
+                portion[0][0]._apply_translation(subs_slice, translation)
+
+                # Subtitles of other chunks waiting for these translations
+                completed = list(portion)
+                for (_, sub), key in zip(portion, keys):
+                    for srt_file, follower in self._pending.pop(key, ()):
+                        sources.append(follower.text)
+                        follower.text = sub.text
+                        completed.append((srt_file, follower))
+
+                by_file: Dict[SrtFile, Tuple[List[Cue], List[str]]] = {}
+                for (srt_file, sub), source in zip(completed, sources):
+                    file_slice, file_sources = by_file.setdefault(srt_file, ([], []))
+                    file_slice.append(sub)
+                    file_sources.append(source)
+
+                for srt_file, (file_slice, file_sources) in by_file.items():
+                    srt_file._complete_chunk(
+                        file_slice, file_sources, self.translator,
+                        self.source_language, self.destination_language, self.memory,
+                    )
+                    self._remaining[srt_file] -= len(file_slice)
+                    if self._remaining[srt_file] == 0:
+                        self._finish(srt_file)
+        finally:
+            # Unfinished files keep their journal, next batch resumes them
+            for srt_file in self._remaining:
+                srt_file.journal.close()
+            logger.info(f"Batch translated with {self.requests} requests, {len(self._remaining)} files unfinished")
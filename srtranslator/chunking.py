@@ -0,0 +1,97 @@
+import logging
+
+from typing import Any, Callable, Generator, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def payload_size(text: str, unit: str = "char") -> int:
+    """Size of a text as seen by the translator
+
+    Args:
+        text (str): Text sent to the translator
+        unit (str, optional): "char" for characters or "byte" for UTF-8 bytes. Defaults to "char".
+
+    Returns:
+        int: Size of the text in the given unit
+    """
+    if unit == "byte":
+        return len(text.encode("utf-8"))
+    return len(text)
+
+
+def plan_chunks(
+        units: Iterable[Any],
+        text_of: Callable[[Any], str],
+        max_char: Union[float, Callable[[], float]],
+        max_bytes: Optional[int] = None,
+        separator: Optional[str] = "\n",
+        max_units: Optional[int] = None,
+) -> Generator:
+    """Pack units in chunks as full as possible without going beyond the translator limits
+
+    The size of a chunk is the exact size of the text sent, units texts joined with
+    the separator, so the limits are never exceeded. A unit alone beyond the limits
+    cannot be split and is sent in its own chunk. A callable max_char is read again
+    for each chunk, so a translator tuning its chunk size is followed while planning.
+    Without separator the texts are sent as a list (translate_batch), and the chunk
+    size is the sum of their sizes.
+
+    Args:
+        units (Iterable[Any]): Units to translate, subtitles or events, in order
+        text_of (Callable[[Any], str]): Text of a unit in the chunk
+        max_char (Union[float, Callable[[], float]]): Maximum number of characters in a chunk, or a function returning it
+        max_bytes (int, optional): Maximum number of UTF-8 bytes in a chunk. Defaults to None, no byte limit.
+        separator (str, optional): Text between two units in the chunk, None to keep the texts in a list. Defaults to "\\n".
+        max_units (int, optional): Maximum number of units in a chunk. Defaults to None, no limit.
+
+    Yields:
+        Generator: Pairs of (units of the chunk, text of the chunk or list of texts without separator)
+    """
+    separator_chars = payload_size(separator or "")
+    separator_bytes = payload_size(separator or "", "byte")
+
+    def payload(texts):
+        return texts if separator is None else separator.join(texts)
+
+    def limit() -> float:
+        return max_char() if callable(max_char) else max_char
+
+    chunk_chars = limit()
+    portion = []
+    texts = []
+    n_char = 0
+    n_bytes = 0
+    for unit in units:
+        text = text_of(unit)
+        unit_chars = payload_size(text)
+        unit_bytes = payload_size(text, "byte") if max_bytes is not None else 0
+
+        if portion:
+            # Running size of the chunk if the unit is added after a separator
+            next_chars = n_char + separator_chars + unit_chars
+            next_bytes = n_bytes + separator_bytes + unit_bytes
+            if (
+                    next_chars <= chunk_chars
+                    and (max_bytes is None or next_bytes <= max_bytes)
+                    and (max_units is None or len(portion) < max_units)
+            ):
+                portion.append(unit)
+                texts.append(text)
+                n_char = next_chars
+                n_bytes = next_bytes
+                continue
+
+            yield portion, payload(texts)
+            chunk_chars = limit()
+
+        if unit_chars > chunk_chars or (max_bytes is not None and unit_bytes > max_bytes):
+            logger.warning(f"Unit of {unit_chars} characters beyond translator limit, sent alone in a chunk")
+
+        portion = [unit]
+        texts = [text]
+        n_char = unit_chars
+        n_bytes = unit_bytes
+
+    if portion:
+        yield portion, payload(texts)
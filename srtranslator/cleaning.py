@@ -0,0 +1,112 @@
+import re
+
+from functools import partial
+from typing import Callable, Dict, List, Optional, Pattern, Sequence, Tuple, Union
+
+try:
+    # Python 3.11+, sre_parse is deprecated
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# A rule is a (regex, replacement) pair, a dict of literal replacements done in a
+# single pass, or any function of the text
+Rule = Union[Tuple[str, str], Dict[str, str], Callable[[str], str]]
+
+# Inline markup, <i>...</i>, <font ...>
+TAGS = (r"<.*?>", "")
+
+
+def _literal_pass(replacements: Dict[str, str]) -> Callable[[str], str]:
+    """Compile literal replacements in a single pass over the text
+
+    Single characters become a translate table. Longer literals become one regex
+    alternation, longest first, so all of them are replaced in the same scan.
+    """
+    if all(len(old) == 1 for old in replacements):
+        table = str.maketrans({old: new or None for old, new in replacements.items()})
+        # translate is slow on texts with nothing to replace, most of them, find them first
+        search = re.compile(f"[{''.join(map(re.escape, replacements))}]").search
+        return lambda text: text.translate(table) if search(text) else text
+
+    pattern = re.compile("|".join(map(re.escape, sorted(replacements, key=len, reverse=True))))
+    replace = partial(pattern.sub, lambda match: replacements[match.group()])
+    # Most texts have none of the literals, skip them without running the regex
+    firsts = "".join(sorted({old[0] for old in replacements}))
+    if len(firsts) == 1:
+        return lambda text: replace(text) if firsts in text else text
+    return replace
+
+
+def _required_first(regex: Pattern) -> Optional[str]:
+    """Character every match of a regex starts with, if the regex says so plainly
+
+    Only a case sensitive regex whose parsed form starts with a literal qualifies,
+    alternations, classes, repeats and groups at the start give None.
+    """
+    if regex.flags & re.IGNORECASE:
+        return None
+    parsed = sre_parse.parse(regex.pattern, regex.flags)
+    if not len(parsed):
+        return None
+    opcode, value = parsed[0]
+    return chr(value) if opcode is sre_parse.LITERAL else None
+
+
+def _compile(rule: Rule) -> Callable[[str], str]:
+    if isinstance(rule, tuple):
+        pattern, replacement = rule
+        regex = re.compile(pattern)
+        replace = partial(regex.sub, replacement)
+        # A pattern starting with a literal character cannot match texts without it
+        first = _required_first(regex)
+        if first is not None:
+            return lambda text: replace(text) if first in text else text
+        return replace
+    if isinstance(rule, dict):
+        return _literal_pass(rule)
+    return rule
+
+
+class TextCleaner:
+    """Ordered normalization rules compiled once, applied to one text or to all texts of a file
+
+    Rules run in the given order, each one over the result of the previous one.
+    Literals in the same dict are replaced in a single pass, so a dict must only
+    group replacements that cannot create or hide a match of each other; keep
+    them in separate dicts otherwise.
+
+    Args:
+        rules (Sequence[Rule]): Rules, a (regex, replacement) pair, a dict of literal replacements or a function of the text
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = list(rules)
+        self._passes = [_compile(rule) for rule in self.rules]
+
+    def clean(self, text: str) -> str:
+        """Apply the rules to a text
+
+        Args:
+            text (str): Text to clean
+
+        Returns:
+            str: Cleaned text
+        """
+        for clean_pass in self._passes:
+            text = clean_pass(text)
+        return text
+
+    def clean_many(self, texts: Sequence[str]) -> List[str]:
+        """Apply the rules to many texts, one rule at the time over all of them
+
+        Args:
+            texts (Sequence[str]): Texts to clean, cues of a file for instance
+
+        Returns:
+            List[str]: Cleaned texts, in the same order
+        """
+        texts = list(texts)
+        for clean_pass in self._passes:
+            texts = list(map(clean_pass, texts))
+        return texts
@@ -0,0 +1,107 @@
+import sys
+
+from datetime import timedelta
+from typing import Any, Optional
+
+from pyass import Event
+from srt import Subtitle
+
+# ASS event fields written back around the cue timings and text
+EVENT_FIELDS = ("format", "layer", "style", "name", "marginL", "marginR", "marginV", "effect")
+
+
+def _milliseconds(time: timedelta) -> int:
+    # Exact for srt and pyass timedeltas, no float rounding
+    return time.days * 86_400_000 + time.seconds * 1000 + time.microseconds // 1000
+
+
+class Cue:
+    """A subtitle or an event of any format, as translated by this package
+
+    Timings are kept in milliseconds and the text as a single string, its lines
+    joined by line breaks, whatever the format. What only the format needs to be
+    written back is kept apart in extra.
+
+    Args:
+        index (int): Position of the cue in the file, from 1
+        start (int): Start time in milliseconds
+        end (int): End time in milliseconds
+        text (str): Text, lines joined by line breaks
+        extra (Any, optional): Format data, SRT proprietary text or the ASS event fields. Defaults to None.
+    """
+
+    __slots__ = ("index", "start", "end", "text", "extra")
+
+    def __init__(self, index: int, start: int, end: int, text: str, extra: Optional[Any] = None) -> None:
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+        self.extra = extra
+
+    @property
+    def lines(self) -> int:
+        return self.text.count("\n") + 1
+
+    @classmethod
+    def from_subtitle(cls, subtitle: Subtitle, text: Optional[str] = None) -> "Cue":
+        """Cue of an SRT subtitle
+
+        Args:
+            subtitle (Subtitle): Parsed subtitle
+            text (str, optional): Text of the cue. Defaults to the subtitle content.
+
+        Returns:
+            Cue: Cue of the subtitle
+        """
+        return cls(
+            subtitle.index,
+            _milliseconds(subtitle.start),
+            _milliseconds(subtitle.end),
+            subtitle.content if text is None else text,
+            subtitle.proprietary or None,
+        )
+
+    def to_subtitle(self) -> Subtitle:
+        """SRT subtitle of the cue, to write it
+
+        Returns:
+            Subtitle: Subtitle with the cue timings and text
+        """
+        return Subtitle(
+            self.index,
+            timedelta(milliseconds=self.start),
+            timedelta(milliseconds=self.end),
+            self.text,
+            self.extra or "",
+        )
+
+    @classmethod
+    def from_event(cls, index: int, event: Event) -> "Cue":
+        """Cue of an ASS event, keeping only the fields needed to write it back
+
+        Args:
+            index (int): Position of the event in the file, from 1
+            event (Event): Parsed event
+
+        Returns:
+            Cue: Cue of the event
+        """
+        # Styles, names and effects repeat over the events, share their strings
+        fields = tuple(
+            sys.intern(value) if isinstance(value, str) else value
+            for value in map(event.__getattribute__, EVENT_FIELDS)
+        )
+        return cls(index, _milliseconds(event.start), _milliseconds(event.end), event.text, fields)
+
+    def to_event(self) -> Event:
+        """ASS event of the cue, to write it
+
+        Returns:
+            Event: Event with the fields of the one the cue was made from, and the cue timings and text
+        """
+        event = Event(**dict(zip(EVENT_FIELDS, self.extra)))
+        event.start = timedelta(milliseconds=self.start)
+        event.end = timedelta(milliseconds=self.end)
+        event.text = self.text
+        return event
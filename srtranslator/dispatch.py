@@ -0,0 +1,105 @@
+import logging
+import timeit
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generator, Iterable, List, Optional, Tuple, Union
+
+from .report import TranslationReport
+from .translators.base import Translator
+from .translators.rate_limit import throttle
+
+logger = logging.getLogger(__name__)
+
+
+def _translate_one(
+    translator: Translator,
+    text: Union[str, List[str]],
+    source_language: str,
+    destination_language: str,
+    report: Optional[TranslationReport] = None,
+) -> Union[str, List[str]]:
+    batch = isinstance(text, list)
+    n_char = sum(map(len, text)) if batch else len(text)
+    waited = throttle(translator, n_char)
+    start = timeit.default_timer()
+    if batch:
+        translation = translator.translate_batch(text, source_language, destination_language)
+    else:
+        translation = translator.translate(text, source_language, destination_language)
+    elapsed = timeit.default_timer() - start
+    logger.debug(f"TIME WAIT translation_ing {elapsed}")
+    if report is not None:
+        report.add_chunk(n_char, len(text) if batch else 1, elapsed, waited)
+    return translation
+
+
+def _completed(in_flight: deque) -> Generator[Tuple[Any, str], None, None]:
+    """Chunks still in flight after a failure, those translated without error, in order"""
+    while in_flight:
+        key, future = in_flight.popleft()
+        try:
+            translation = future.result()
+        except Exception as e:
+            logger.info(f"Chunk in flight failed too :: {e}")
+            continue
+        yield key, translation
+
+
+def translate_chunks(
+    translator: Translator,
+    chunks: Iterable[Tuple[Any, str]],
+    source_language: str,
+    destination_language: str,
+    max_concurrency: int = 1,
+    report: Optional[TranslationReport] = None,
+    keep_completed: bool = True,
+) -> Generator[Tuple[Any, str], None, None]:
+    """Translate chunks of text, optionally several at the same time
+
+    Chunks are pulled lazily from the iterable, so at most `max_concurrency` chunks
+    are in flight at once. Results are yielded in the same order as the chunks,
+    whatever order the translator finishes them in. When a chunk fails, the chunks
+    after it already in flight are waited for, and those translated are still yielded
+    before the error is raised, so callers journaling by key do not lose them.
+
+    Args:
+        translator (Translator): Translator object of choose. Must be thread safe if max_concurrency > 1
+        chunks (Iterable[Tuple[Any, str]]): Pairs of (key, text). The key is given back untouched with its translation. A list of texts is sent in a single translate_batch request
+        source_language (str): Source language (must be coherent with your translator)
+        destination_language (str): Destination language (must be coherent with your translator)
+        max_concurrency (int, optional): Maximum number of chunks translated at the same time. Defaults to 1.
+        report (TranslationReport, optional): Report recording each chunk latency. Defaults to None.
+        keep_completed (bool, optional): Yield the chunks translated after a failed one before raising its error, for callers not needing a gapless order. Defaults to True.
+
+    Yields:
+        Generator: Pairs of (key, translation) in the chunks order
+    """
+    if max_concurrency <= 1:
+        for key, text in chunks:
+            yield key, _translate_one(
+                translator, text, source_language, destination_language, report
+            )
+        return
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight = deque()
+        try:
+            for key, text in chunks:
+                future = executor.submit(
+                    _translate_one, translator, text, source_language, destination_language, report
+                )
+                in_flight.append((key, future))
+
+                # Wait for the oldest chunk once the window is full
+                if len(in_flight) >= max_concurrency:
+                    key, future = in_flight.popleft()
+                    yield key, future.result()
+
+            while in_flight:
+                key, future = in_flight.popleft()
+                yield key, future.result()
+        except Exception:
+            if keep_completed:
+                yield from _completed(in_flight)
+            raise
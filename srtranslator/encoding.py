@@ -0,0 +1,123 @@
+import os
+import mmap
+import codecs
+import logging
+
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes looked at to guess the encoding, the whole file is decoded once after
+SAMPLE_SIZE = 64 * 1024
+# Most common legacy encoding of subtitles, western languages
+LEGACY_ENCODING = "cp1252"
+# Decodes any byte, when nothing else fits
+FALLBACK_ENCODING = "latin-1"
+# Ratio of unlikely characters above which a text decoded in LEGACY_ENCODING is not read as it
+MAX_MESS = 0.2
+# Language coherence charset_normalizer must reach for its guess to be trusted
+MIN_COHERENCE = 0.1
+
+# UTF-32 first, its little endian BOM starts with the UTF-16 one
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def detect_encoding(sample: bytes, final: bool = True) -> str:
+    """Guess the encoding of a text from its first bytes
+
+    A BOM decides first, then UTF-8 if the sample is valid UTF-8, then CP1252 if
+    the sample decodes in it and reads as text, single byte encodings being told
+    apart poorly by charset_normalizer on mostly ASCII text. Its guess is only
+    kept if it reads as a language (GBK, Shift-JIS...) or reads better than a
+    messy CP1252 (CP1251...). Bytes nothing reads are decoded as latin-1.
+
+    Args:
+        sample (bytes): First bytes of the text
+        final (bool, optional): The sample is the whole text, not cut in the middle of a character. Defaults to True.
+
+    Returns:
+        str: Python name of the encoding
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    # Only needed for legacy encodings, not imported before
+    from charset_normalizer import from_bytes
+    from charset_normalizer.md import mess_ratio
+
+    try:
+        legacy_mess = mess_ratio(codecs.getincrementaldecoder(LEGACY_ENCODING)().decode(sample, final), 1.0)
+    except UnicodeDecodeError:
+        legacy_mess = None
+    if legacy_mess is not None and legacy_mess < MAX_MESS:
+        return LEGACY_ENCODING
+
+    best = from_bytes(sample).best()
+    if best is not None and (best.coherence >= MIN_COHERENCE or (legacy_mess is not None and best.chaos < legacy_mess)):
+        return best.encoding
+    return LEGACY_ENCODING if legacy_mess is not None else FALLBACK_ENCODING
+
+
+def sniff_encoding(filepath: str, sample_size: int = SAMPLE_SIZE) -> str:
+    """Guess the encoding of a file reading only its first bytes
+
+    Args:
+        filepath (str): File path
+        sample_size (int, optional): Number of bytes looked at. Defaults to SAMPLE_SIZE.
+
+    Returns:
+        str: Python name of the encoding
+    """
+    with open(filepath, "rb") as file:
+        sample = file.read(sample_size + 1)
+    return detect_encoding(sample[:sample_size], final=len(sample) <= sample_size)
+
+
+def read_text(filepath: str, sample_size: int = SAMPLE_SIZE) -> Tuple[str, str]:
+    """Read a whole text file in the encoding guessed from its first bytes
+
+    The file is memory mapped and decoded in a single pass. If the rest of the file
+    does not match the sample, the encoding is guessed again from the bytes around
+    the first undecodable one and undecodable bytes are replaced, never dropped.
+    A sample with UTF-8 characters keeps UTF-8, only some bytes are broken.
+
+    Args:
+        filepath (str): File path
+        sample_size (int, optional): Number of bytes looked at to guess the encoding. Defaults to SAMPLE_SIZE.
+
+    Returns:
+        Tuple[str, str]: Text of the file, without BOM, and its encoding
+    """
+    with open(filepath, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return "", "utf-8"
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            sample = content[:sample_size]
+            sampled = detect_encoding(sample, final=size <= sample_size)
+            try:
+                return str(content, sampled), sampled
+            except UnicodeDecodeError as error:
+                start = max(0, error.start - sample_size // 2)
+                window = content[start:error.start + sample_size // 2]
+
+            if sampled == "utf-8" and not sample.isascii():
+                encoding = sampled
+            else:
+                encoding = detect_encoding(window, final=start + len(window) >= size)
+            logger.warning(f"{filepath} is not {sampled} after its first bytes, read as {encoding}")
+            return str(content, encoding, "replace"), encoding
@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+import logging
+
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts: Iterable[str]) -> str:
+    """Identify a translation job, a journal of another job must not be replayed
+
+    Args:
+        parts (Iterable[str]): Texts identifying the job (languages, cues content...)
+
+    Returns:
+        str: Fingerprint of the job
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        for text in part:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class TranslationJournal:
+    """Write-ahead journal of translated chunks, to resume interrupted translations
+
+    Each translated chunk is appended as a JSON line and synced to disk before
+    moving on, so an interruption loses at most the chunk being translated.
+
+    Args:
+        filepath (str): Journal file path
+        fingerprint (str): Fingerprint of the translation job. A journal of another job is discarded
+    """
+
+    def __init__(self, filepath: str, fingerprint: str) -> None:
+        self.filepath = filepath
+        self.fingerprint = fingerprint
+        self._file = None
+
+    def replay(self) -> Dict[int, str]:
+        """Read translations already in journal
+
+        Returns:
+            Dict[int, str]: Translated text by cue index
+        """
+        if not os.path.exists(self.filepath):
+            return {}
+
+        translations = {}
+        with open(self.filepath, "rb") as journal:
+            try:
+                header = json.loads(journal.readline())
+            except ValueError:
+                header = {}
+            if header.get("fingerprint") != self.fingerprint:
+                logger.warning(f"Journal {self.filepath} belongs to another translation, discarding it")
+                journal.close()
+                self.delete()
+                return {}
+
+            valid_size = journal.tell()
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Chunk interrupted while written
+                    break
+                translations.update((index, text) for index, text in record["cues"])
+                valid_size = journal.tell()
+
+        # Drop an incomplete last record so new ones are appended after valid data
+        if valid_size != os.path.getsize(self.filepath):
+            os.truncate(self.filepath, valid_size)
+
+        logger.info(f"Journal found = {self.filepath}, {len(translations)} subtitles already translated")
+        return translations
+
+    def append(self, cues: Dict[int, str]) -> None:
+        """Append a translated chunk and sync it to disk
+
+        Args:
+            cues (Dict[int, str]): Translated text by cue index
+        """
+        if not cues:
+            return
+
+        if self._file is None:
+            is_new = not os.path.exists(self.filepath)
+            self._file = open(self.filepath, "a", encoding="utf-8")
+            if is_new:
+                self._file.write(json.dumps(dict(fingerprint=self.fingerprint)) + "\n")
+
+        indexes = sorted(cues)
+        record = dict(
+            start=indexes[0],
+            end=indexes[-1],
+            cues=[(index, cues[index]) for index in indexes],
+        )
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def delete(self) -> None:
+        """Delete journal, once the translation is saved"""
+        self.close()
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
@@ -0,0 +1,162 @@
+import json
+import timeit
+import logging
+import threading
+
+from contextlib import contextmanager
+from typing import Dict, Generator, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationHook:
+    """Receives the events of a translation as they happen
+
+    Override the methods needed and give the hook to translate(), to feed metrics,
+    progress bars or traces. Chunk events come from the threads translating.
+    """
+
+    def on_span(self, report: "TranslationReport", name: str, seconds: float) -> None:
+        """A stage of the translation ended
+
+        Args:
+            report (TranslationReport): Report of the translation
+            name (str): Stage name (parse, clean, journal, memory, dedupe, chunk, translate, reassemble, save)
+            seconds (float): Time spent in the stage
+        """
+
+    def on_chunk(self, report: "TranslationReport", chunk: Dict) -> None:
+        """A chunk came back from the translator
+
+        Args:
+            report (TranslationReport): Report of the translation
+            chunk (Dict): Characters, texts, seconds translating and seconds waiting the rate limit
+        """
+
+
+def _percentile(values: List[float], ratio: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+
+class TranslationReport:
+    """What a translation did and where its time went
+
+    Spans of the same stage add up, so a stage run per chunk (chunk, reassemble)
+    gives its total time. Chunks are recorded one by one with their latency.
+
+    Args:
+        filepath (str): Translated file
+        translator (str): Translator name
+        source_language (str): Source language
+        destination_language (str): Destination language
+        hooks (Iterable[TranslationHook], optional): Hooks receiving the events. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            filepath: str,
+            translator: str,
+            source_language: str,
+            destination_language: str,
+            hooks: Optional[Iterable[TranslationHook]] = None,
+    ) -> None:
+        self.filepath = filepath
+        self.translator = translator
+        self.source_language = source_language
+        self.destination_language = destination_language
+        self.hooks = list(hooks or [])
+        self.spans: Dict[str, float] = {}
+        self.chunks: List[Dict] = []
+        self.units = 0
+        self.journal_hits = 0
+        self.memory_hits = 0
+        self.duplicates = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+        for hook in self.hooks:
+            hook.on_span(self, name, seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the code in the with block as a stage of the translation
+
+        Args:
+            name (str): Stage name
+        """
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.add_span(name, timeit.default_timer() - start)
+
+    def timed(self, name: str, iterable: Iterable) -> Generator:
+        """Time the production of each item of a lazy iterable as a stage, chunk planning for instance
+
+        Args:
+            name (str): Stage name
+            iterable (Iterable): Iterable to time
+
+        Yields:
+            Generator: Items of the iterable
+        """
+        iterator = iter(iterable)
+        while True:
+            start = timeit.default_timer()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add_span(name, timeit.default_timer() - start)
+            yield item
+
+    def add_chunk(self, chars: int, texts: int, seconds: float, waited: float) -> None:
+        chunk = {"chars": chars, "texts": texts, "seconds": seconds, "waited": waited}
+        with self._lock:
+            self.chunks.append(chunk)
+        for hook in self.hooks:
+            hook.on_chunk(self, chunk)
+
+    def to_dict(self) -> Dict:
+        """Report with chunks summary, as saved in JSON
+
+        Returns:
+            Dict: Report content
+        """
+        latencies = [chunk["seconds"] for chunk in self.chunks]
+        return {
+            "file": self.filepath,
+            "translator": self.translator,
+            "source_language": self.source_language,
+            "destination_language": self.destination_language,
+            "units": self.units,
+            "journal_hits": self.journal_hits,
+            "memory_hits": self.memory_hits,
+            "duplicates": self.duplicates,
+            "retries": self.retries,
+            "chars": sum(chunk["chars"] for chunk in self.chunks),
+            "requests": len(self.chunks),
+            "chunk_p50": _percentile(latencies, 0.5),
+            "chunk_p95": _percentile(latencies, 0.95),
+            "chunk_max": max(latencies, default=None),
+            "rate_limit_wait": sum(chunk["waited"] for chunk in self.chunks),
+            "spans": dict(self.spans),
+            "chunks": list(self.chunks),
+        }
+
+    def save(self, filepath: str) -> None:
+        """Write the report in a JSON file
+
+        Args:
+            filepath (str): Path of the JSON file
+        """
+        logger.info(f"Saving translation report {filepath}")
+        with open(filepath, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
@@ -1,185 +1,84 @@
 import os
-import re
 import srt
 import timeit
 import logging
 
 from srt import Subtitle
-from typing import List, Generator
-
+from typing import Callable, Dict, Iterable, List, Generator, Optional, Tuple, Union
+
+from .chunking import plan_chunks
+from .cleaning import TAGS, TextCleaner
+from .cues import Cue
+from .encoding import read_text
+from .dispatch import translate_chunks
+from .journal import TranslationJournal, fingerprint
+from .report import TranslationHook, TranslationReport
+from .translation_memory import TranslationMemory
 from .translators.base import Translator
 
 logger = logging.getLogger(__name__)
 
+# Subtitle content normalization, in order
+CLEANER = TextCleaner([
+    TAGS,
+    str.strip,
+    {"'": "", "`": "", "（": "(", "）": ")"},
+    # Escaped line breaks "\n", "\N", "\ " and lone backslashes
+    {"\\n": "\n", "\\N": "\n", "\\ ": "\n", "\\": "\n"},
+    srt.make_legal_content,
+    lambda content: content or "...",
+])
 
-class SrtFile:
-    """SRT file class abstraction
 
-    Args:
-        filepath (str): file path of srt
-    """
+class SrtCues:
+    """Cleaning, chunking and line handling of SRT cues, shared by whole files and streams
 
-    def __init__(self, filepath: str) -> None:
-        self.filepath = filepath
-        self.backup_file = f"{self.filepath}.tmp"
-        #
-        self.subtitles = []
-        self.length = 0
-        print(f"Loading {filepath}")
-        # from bs4.dammit import UnicodeDammit
-        # with open(filepath, 'rb') as file:
-        #     content = file.read()
-        # suggestion = UnicodeDammit(content)
-        # encode = suggestion.original_encoding
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as input_file:
-            srt_file = srt.parse(input_file)
-            subtitles = list(srt_file)
-            subtitles = list(srt.sort_and_reindex(subtitles))
-            self.subtitles = self._clean_subs_content(subtitles)
-            self.length = sum(len(sub.content) + 1 for sub in self.subtitles)
-
-    def _load_backup(self):
-        if not os.path.exists(self.backup_file):
-            return
-
-        print(f"Backup file found = {self.backup_file}")
-        with open(
-                self.backup_file, "r", encoding="utf-8", errors="ignore"
-        ) as input_file:
-            subtitles = self.load_from_file(input_file)
-
-            self.start_from = len(subtitles)
-            self.current_subtitle = self.start_from
-            print(f"Starting from subtitle {self.start_from}")
-            self.subtitles = [
-                *subtitles,
-                *self.subtitles[self.start_from :],
-            ]
-
-    def load_from_file(self, input_file):
-        srt_file = srt.parse(input_file)
-        subtitles = list(srt_file)
-        subtitles = list(srt.sort_and_reindex(subtitles))
-        return self._clean_subs_content(subtitles)
+    Subclasses keep their cues in subtitles.
+    """
 
-    def _get_next_chunk(self, chunk_size: int = 4500) -> Generator:
-        """Get a portion of the subtitles at the time based on the chunk size
+    subtitles: List[Cue]
 
-        Args:
-            chunk_size (int, optional): Maximum number of letter in text chunk. Defaults to 4500.
-
-        Yields:
-            Generator: Each chunk at the time
-        """
-        portion = []
-        lengthPortion = 0
-        for subtitle in self.subtitles:
-            # Calculate new chunk size if subtitle content is added to actual chunk
-            n_char = (
-                # sum(len(sub.content) for sub in portion)  # All subtitles in chunk
-                    + ((sum(len(line) for line in subtitle.content)+ len(subtitle.content))
-                       if (isinstance(subtitle.content, list)) else (len(subtitle.content)+1))  # New subtitle
-                    #+ len(subtitle.content)  # + len(portion)  # Break lines in chunk
-                    + 1 # (len(f"[000_{subtitle.index}_000]") + 1) #  5  # 1 New breakline and 4 size for number and breakline number
-            )
-
-            # If chunk goes beyond the limit, yield it
-            if n_char + lengthPortion >= chunk_size and len(portion) != 0:
-                # logger.info( f"Length ------------------------------------------------- lengthPortion {lengthPortion}")
-                # abbbb = [
-                #     (
-                #             (
-                #                 (sum(len(line) for line in abc.content) + len(abc.content))
-                #                 if (isinstance(abc.content, list)) else (len(abc.content) + 1)
-                #             )
-                #             +  1
-                #     )
-                #     for abc in portion
-                # ]
-                #
-                #
-                # text = [(f"\n" + ("\n".join(sub.content)))
-                #         if isinstance(sub.content,list)
-                #         else f"\n{sub.content}"
-                #         for sub in portion]
-                # text = "\n".join(text)
-                #
-                # if len(text) > chunk_size:
-                #     logger.info(
-                #         f"ERROR Please check data split ............................................................ len(text) {len(text)}  {sum(abbbb)}")
-                yield portion
-                portion = []
-                lengthPortion = 0
-
-            # Put subtitle content in chunk
-            portion.append(subtitle)
-            lengthPortion += n_char
-
-        # Yield last chunk
-        yield portion
-
-    def _clean_subs_content(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+    def _clean_subs_content(self, subtitles: List[Subtitle]) -> List[Cue]:
         """Cleans subtitles content and delete line breaks
 
         Args:
-            subtitles (List[Subtitle]): List of subtitles
+            subtitles (List[Cue]): List of subtitles
 
         Returns:
-            List[Subtitle]: Same list of subtitles, but cleaned
+            List[Cue]: Cues of the subtitles, cleaned
         """
-        cleanr = re.compile("<.*?>")
-        import codecs
-        for sub in subtitles:
-            sub.content = cleanr.sub("", sub.content)
-            sub.content = sub.content.strip() \
-                .replace("'", "")\
-                .replace("`", "")\
-                .replace('（', "(")\
-                .replace('）', ")")\
-                .replace("\\n", "\n")\
-                .replace("\\N", "\n")\
-                .replace("\\ ", "\n")\
-                .replace("\\", "\n")\
-                .replace("\\ n", "\n")\
-                .replace("\\ N", "\n") # "\n", "\N", "\ ", "\ N", "\ n"
-            sub.content = srt.make_legal_content(sub.content)
-
-            if sub.content == "":
-                sub.content = "..."
-
-            # if all(sentence.startswith("-") for sentence in sub.content.split("\n")):
-            #     sub.content = sub.content.replace("\n", "_")
-            #     continue
-
-            # NTT sub.content = sub.content.replace("\n", " ")
-            sub.content = list(sub.content.strip().split("\n"))
+        contents = CLEANER.clean_many(sub.content for sub in subtitles)
+        # if all(sentence.startswith("-") for sentence in sub.content.split("\n")):
+        #     sub.content = sub.content.replace("\n", "_")
+        # NTT sub.content = sub.content.replace("\n", " ")
+        return [Cue.from_subtitle(sub, content.strip()) for sub, content in zip(subtitles, contents)]
 
-        return subtitles
+    def join_lines(self, subtitles: Optional[List[Cue]] = None) -> None:
+        """Clean up the brackets left by the translation in all subtitles in file
 
-    def join_lines(self) -> None:
-        """Re-single str lines in all subtitles multi line list type in file
+        Args:
+            subtitles (List[Cue], optional): Subtitles to join. Defaults to all subtitles in file.
         """
-        for sub in self.subtitles:
-            sub.content = (str("\n".join(sub.content)) if isinstance(sub.content, list) else sub.content) \
+        for sub in (self.subtitles if subtitles is None else subtitles):
+            sub.text = sub.text \
                 .replace('("', "(").replace('（"', "(").replace('（', "(") \
                 .replace('")', ")").replace('.)', ")")
 
-    def wrap_lines(self, line_wrap_limit: int = 50) -> None:
+    def wrap_lines(self, line_wrap_limit: int = 50, subtitles: Optional[List[Cue]] = None) -> None:
         """Wrap lines in all subtitles in file
 
         Args:
             line_wrap_limit (int): Number of maximum characters in a line before wrap. Defaults to 50.
+            subtitles (List[Cue], optional): Subtitles to wrap. Defaults to all subtitles in file.
         """
-        for sub in self.subtitles:
-            sub.content = sub.content.replace("_-", "\n-")
-
+        for sub in (self.subtitles if subtitles is None else subtitles):
             content = []
-            for line in sub.content.split("\n"):
+            for line in sub.text.replace("_-", "\n-").split("\n"):
                 if len(line) > line_wrap_limit:
                     line = self.wrap_line(line, line_wrap_limit)
                 content.append(line)
 
-            sub.content = "\n".join(content)
+            sub.text = "\n".join(content)
 
     def wrap_line(self, text: str, line_wrap_limit: int = 50) -> str:
         """Wraps a line of text without breaking any word in half
@@ -208,75 +107,413 @@ class SrtFile:
         # Join sentences with line break
         return "\n".join(wraped_lines)
 
+    def _subtitle_text(self, subtitle: Cue) -> str:
+        """Text of a subtitle in a chunk, one line per content line
+
+        Args:
+            subtitle (Cue): Subtitle to translate
+
+        Returns:
+            str: Subtitle text
+        """
+        return subtitle.text
+
+    def _chunk_text(self, subs_slice: List[Cue]) -> str:
+        """Put chunk in a single text with break lines
+
+        Args:
+            subs_slice (List[Cue]): Subtitles of the chunk
+
+        Returns:
+            str: Text to send to the translator
+        """
+        # An empty line between subtitles
+        return "\n\n".join(self._subtitle_text(sub) for sub in subs_slice)
+
+    def _apply_translation(self, subs_slice: List[Cue], translation: Union[str, List[str]]) -> None:
+        """Break each line of the translation back into subtitle content
+
+        Args:
+            subs_slice (List[Cue]): Subtitles of the chunk
+            translation (Union[str, List[str]]): Translated text of the chunk, or one translated text per subtitle
+        """
+        if isinstance(translation, list):
+            # Batch translations map 1:1 to subtitles, no line counting
+            for sub, text in zip(subs_slice, translation):
+                sub.text = "\n".join(text.splitlines())
+            return
+
+        translation = translation.splitlines()
+        j: int = 0
+        for sub in subs_slice:
+            lines = sub.lines
+            sub.text = "\n".join(translation[j:j + lines])
+            j = j + lines + 1  # 1 empty line between subtitles
+
+    def _get_next_text_chunk(
+            self,
+            chunk_size: Union[float, Callable[[], float]],
+            subtitles: Optional[Iterable[Cue]] = None,
+            max_bytes: Optional[int] = None,
+    ) -> Generator:
+        """Get each chunk with its text to translate, as full as the translator limits allow
+
+        Args:
+            chunk_size (Union[float, Callable[[], float]]): Maximum number of letter in text chunk, or a function returning it
+            subtitles (Iterable[Cue], optional): Subtitles to split in chunks. Defaults to all subtitles in file.
+            max_bytes (int, optional): Maximum number of UTF-8 bytes in text chunk. Defaults to None.
+
+        Yields:
+            Generator: Pairs of (chunk, text)
+        """
+        yield from plan_chunks(
+            self.subtitles if subtitles is None else subtitles,
+            self._subtitle_text,
+            chunk_size,
+            max_bytes,
+            separator="\n\n",
+        )
+
+
+class SrtFile(SrtCues):
+    """SRT file class abstraction
+
+    Args:
+        filepath (str): file path of srt
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self.journal_file = f"{self.filepath}.journal"
+        self.journal = None
+        self._positions = {}
+        self._duplicates = {}
+        self.report = None
+        #
+        self.subtitles = []
+        self.length = 0
+        print(f"Loading {filepath}")
+        start = timeit.default_timer()
+        # Encoding guessed from the first bytes, save can keep it
+        content, self.encoding = read_text(filepath)
+        srt_file = srt.parse(content)
+        subtitles = list(srt_file)
+        subtitles = list(srt.sort_and_reindex(subtitles))
+        parsed = timeit.default_timer()
+        self.subtitles = self._clean_subs_content(subtitles)
+        self.length = sum(sub.lines + 1 for sub in self.subtitles)
+        # Loading happens before any translation, its report gets these spans
+        self.spans = {"parse": parsed - start, "clean": timeit.default_timer() - parsed}
+
+    def load_from_file(self, input_file):
+        srt_file = srt.parse(input_file)
+        subtitles = list(srt_file)
+        subtitles = list(srt.sort_and_reindex(subtitles))
+        return self._clean_subs_content(subtitles)
+
+    def _get_next_batch(
+            self,
+            translator: Translator,
+            subtitles: Optional[Iterable[Cue]] = None,
+    ) -> Generator:
+        """Get each chunk with the list of its subtitles texts, for translators translating lists of texts
+
+        Args:
+            translator (Translator): Translator with max_texts set
+            subtitles (Iterable[Cue], optional): Subtitles to split in chunks. Defaults to all subtitles in file.
+
+        Yields:
+            Generator: Pairs of (chunk, texts)
+        """
+        yield from plan_chunks(
+            self.subtitles if subtitles is None else subtitles,
+            self._subtitle_text,
+            translator.max_batch_char or translator.max_char,
+            translator.max_bytes,
+            separator=None,
+            max_units=translator.max_texts,
+        )
+
+    def _next_chunks(self, translator: Translator, subtitles: List[Cue]) -> Generator:
+        """Chunks to send to the translator, lists of texts if it translates them in a single request
+
+        Args:
+            translator (Translator): Translator object of choose
+            subtitles (List[Cue]): Subtitles to translate
+
+        Returns:
+            Generator: Pairs of (chunk, text or texts)
+        """
+        if translator.max_texts:
+            return self._get_next_batch(translator, subtitles)
+        return self._get_next_text_chunk(lambda: translator.max_char, subtitles, translator.max_bytes)
+
+    def _replay_journal(self, source_language: str, destination_language: str) -> List[Cue]:
+        """Open the journal of this translation and put back subtitles already translated
+
+        Args:
+            source_language (str): Source language
+            destination_language (str): Destination language
+
+        Returns:
+            List[Cue]: Subtitles not in journal, still to translate
+        """
+        self.journal = TranslationJournal(self.journal_file, fingerprint(
+            (source_language, destination_language),
+            (sub.text for sub in self.subtitles),
+        ))
+        translated = self.journal.replay()
+
+        missing = []
+        for i, sub in enumerate(self.subtitles):
+            if i in translated:
+                sub.text = translated[i]
+            else:
+                missing.append(sub)
+
+        if translated:
+            print(f"Resuming translation, {len(missing)} subtitles left")
+        return missing
+
+    def _apply_memory(
+            self,
+            memory: TranslationMemory,
+            translator: Translator,
+            source_language: str,
+            destination_language: str,
+            subtitles: List[Cue],
+    ) -> List[Cue]:
+        """Put translations already in memory in subtitles content
+
+        Args:
+            memory (TranslationMemory): Translation memory to look up
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
+            subtitles (List[Cue]): Subtitles to translate
+
+        Returns:
+            List[Cue]: Subtitles not found in memory, still to translate
+        """
+        found = memory.get_many(
+            translator.name, source_language, destination_language,
+            (sub.text for sub in subtitles)
+        )
+
+        missing = []
+        for sub in subtitles:
+            translation = found.get(sub.text)
+            if translation is None:
+                missing.append(sub)
+            else:
+                sub.text = translation
+
+        logger.info(f"Translation memory :: {len(subtitles) - len(missing)} found, {len(missing)} to translate")
+        return missing
+
+    def _dedupe(self, subtitles: List[Cue]) -> Tuple[List[Cue], Dict[int, List[Cue]]]:
+        """Collapse subtitles with the same content in a single translation unit
+
+        Args:
+            subtitles (List[Cue]): Subtitles to translate
+
+        Returns:
+            Tuple[List[Cue], Dict[int, List[Cue]]]: Unique subtitles, and their duplicates by id of the unique one
+        """
+        unique = {}
+        duplicates = {}
+        for sub in subtitles:
+            first = unique.setdefault(sub.text, sub)
+            if first is not sub:
+                duplicates.setdefault(id(first), []).append(sub)
+
+        logger.info(f"Deduplicate :: {len(unique)} unique of {len(subtitles)} subtitles")
+        return list(unique.values()), duplicates
+
     def translate(
             self,
             translator: Translator,
             source_language: str,
             destination_language: str,
-    ) -> None:
+            max_concurrency: int = 1,
+            memory: Optional[TranslationMemory] = None,
+            dedupe: bool = False,
+            hooks: Optional[List[TranslationHook]] = None,
+    ) -> TranslationReport:
         """Translate SRT file using a translator of your choose
 
+        Each translated chunk is kept in a journal next to the file until it is saved,
+        so an interrupted translation resumes where it stopped.
+
         Args:
             translator (Translator): Translator object of choose
             destination_language (str): Destination language (must be coherent with your translator)
             source_language (str): Source language (must be coherent with your translator)
+            max_concurrency (int, optional): Number of chunks translated at the same time. Translator must be thread safe if greater than 1. Defaults to 1.
+            memory (TranslationMemory, optional): Translation memory looked up before translating and filled after. Defaults to None.
+            dedupe (bool, optional): Translate only once subtitles with the same content. Defaults to False.
+            hooks (List[TranslationHook], optional): Hooks receiving the spans and chunks as they happen. Defaults to None.
+
+        Returns:
+            TranslationReport: Time spent per stage, chunks latency, retries and cache hits. Saving the file adds its span
         """
-        progress = 0
-
-        # For each chunk of the file (based on the translator capabilities)
-        for subs_slice in self._get_next_chunk(translator.max_char):
-            first_str = str('; '.join(subs_slice[0].content)) if isinstance(subs_slice[0].content,list) else str(subs_slice[0].content)
-            logger.info(f"......Waiting batch translating............ {int(100 * progress / self.length)} percent   %s",first_str)
-
-            # Put chunk in a single text with break lines
-            # text = [sub.content for sub in subs_slice]
-            # text = [("\n".join(sub.content)) if isinstance(sub.content, list) else sub.content for sub in subs_slice]
-            text = [(f"\n" + ("\n".join(sub.content)))
-                    if isinstance(sub.content, list) else f"\n{sub.content}"
-                    for sub in subs_slice]
-            text = "\n".join(text)[1:]
-
-            if len(text) > translator.max_char:
-                logger.warning(
-                    f"ERROR Please check data split ............................................................ len(text) {len(text)}  translator.max_char {translator.max_char}")
-
-            # Translate
-            start = timeit.default_timer()
-            translation = translator.translate(
-                text, source_language, destination_language
-            )
-            logger.debug(f"TIME WAIT translation_ing {timeit.default_timer() - start}")
-
-            # Break each line back into subtitle content
-            translation = translation.splitlines()
-            j: int = 0
-            for i in range(len(subs_slice)):
-                if (isinstance(subs_slice[i].content, list)):
-                    subs_slice[i].content = translation[j:j + len(subs_slice[i].content)]
-                    j = j + len(subs_slice[i].content) + 1  # 1 line number
-                else:
-                    subs_slice[i].content = translation[i]
-                    j = j + 2  # 1 line number and 1 next index line content str
-
-            progress += len(subs_slice)
+        report = self.report = TranslationReport(
+            self.filepath, translator.name, source_language, destination_language, hooks
+        )
+        for name, seconds in self.spans.items():
+            report.add_span(name, seconds)
+        retries = translator.retries
+
+        subtitles = self._prepare_translation(translator, source_language, destination_language, memory, dedupe, report)
+        progress = len(self.subtitles) - len(subtitles) - sum(map(len, self._duplicates.values()))
+
+        try:
+            # For each chunk of the file (based on the translator capabilities)
+            with report.span("translate"):
+                for subs_slice, translation in translate_chunks(
+                        translator,
+                        report.timed("chunk", self._next_chunks(translator, subtitles)),
+                        source_language,
+                        destination_language,
+                        max_concurrency,
+                        report,
+                ):
+                    first_str = subs_slice[0].text.replace("\n", "; ")
+                    logger.info(f"......Waiting batch translating............ {int(100 * progress / len(self.subtitles))} percent   %s",first_str)
+
+                    with report.span("reassemble"):
+                        sources = [sub.text for sub in subs_slice]
+                        self._apply_translation(subs_slice, translation)
+                        progress += self._complete_chunk(
+                            subs_slice, sources, translator, source_language, destination_language, memory
+                        )
+        finally:
+            self.journal.close()
+            report.retries = translator.retries - retries
 
         print(f"..................................................................................... TRANSLATION DONE")
+        return report
+
+    def _prepare_translation(
+            self,
+            translator: Translator,
+            source_language: str,
+            destination_language: str,
+            memory: Optional[TranslationMemory] = None,
+            dedupe: bool = False,
+            report: Optional[TranslationReport] = None,
+    ) -> List[Cue]:
+        """Put back subtitles from journal and memory, and collapse duplicates
+
+        Args:
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
+            memory (TranslationMemory, optional): Translation memory to look up. Defaults to None.
+            dedupe (bool, optional): Translate only once subtitles with the same content. Defaults to False.
+            report (TranslationReport, optional): Report of the translation, gets the spans and hits. Defaults to None.
+
+        Returns:
+            List[Cue]: Subtitles to send to the translator
+        """
+        if report is None:
+            report = TranslationReport(self.filepath, translator.name, source_language, destination_language)
+        report.units = len(self.subtitles)
+
+        with report.span("journal"):
+            subtitles = self._replay_journal(source_language, destination_language)
+            self._positions = {id(sub): i for i, sub in enumerate(self.subtitles)}
+        report.journal_hits = len(self.subtitles) - len(subtitles)
+
+        if memory is not None:
+            with report.span("memory"):
+                missing = self._apply_memory(memory, translator, source_language, destination_language, subtitles)
+            report.memory_hits = len(subtitles) - len(missing)
+            subtitles = missing
+
+        self._duplicates = {}
+        if dedupe:
+            with report.span("dedupe"):
+                subtitles, self._duplicates = self._dedupe(subtitles)
+            report.duplicates = sum(map(len, self._duplicates.values()))
+
+        return subtitles
+
+    def _complete_chunk(
+            self,
+            subs_slice: List[Cue],
+            sources: List[str],
+            translator: Translator,
+            source_language: str,
+            destination_language: str,
+            memory: Optional[TranslationMemory] = None,
+    ) -> int:
+        """Fan out, journal and remember translated subtitles of this file
+
+        Args:
+            subs_slice (List[Cue]): Subtitles translated, all from this file
+            sources (List[str]): Content of each subtitle before translation
+            translator (Translator): Translator object of choose
+            source_language (str): Source language
+            destination_language (str): Destination language
+            memory (TranslationMemory, optional): Translation memory to fill. Defaults to None.
+
+        Returns:
+            int: Number of subtitles translated, duplicates included
+        """
+        # Fan out the translation to subtitles with the same content
+        translated = list(subs_slice)
+        for sub in subs_slice:
+            for duplicate in self._duplicates.get(id(sub), ()):
+                duplicate.text = sub.text
+                translated.append(duplicate)
+
+        self.journal.append({self._positions[id(sub)]: sub.text for sub in translated})
+
+        if memory is not None:
+            # Misaligned translations are not worth remembering
+            memory.put_many(translator.name, source_language, destination_language, [
+                (source, sub.text)
+                for source, sub in zip(sources, subs_slice)
+                if source.count("\n") == sub.text.count("\n")
+            ])
+
+        return len(translated)
 
     def save_backup(self):
-        self.subtitles = self.subtitles[: self.current_subtitle]
-        self.save(self.backup_file)
+        """Keep the journal of translated chunks, so next translation of this file resumes from it"""
+        if self.journal is not None:
+            self.journal.close()
+        print(f"Translated chunks kept in {self.journal_file}")
 
     def _delete_backup(self):
-        if os.path.exists(self.backup_file):
-            os.remove(self.backup_file)
-
-    def save(self, filepath: str) -> None:
+        if self.journal is not None:
+            self.journal.close()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def _write(self, filepath: str, encoding: str) -> None:
+        with open(filepath, "w", encoding=encoding) as file_out:
+            # Same output as srt.compose, without building the whole file in a single string
+            for subtitle in srt.sort_and_reindex(sub.to_subtitle() for sub in self.subtitles):
+                file_out.write(subtitle.to_srt())
+
+    def save(self, filepath: str, keep_encoding: bool = False) -> None:
         """Saves SRT to file
 
         Args:
             filepath (str): Path of the new file
+            keep_encoding (bool, optional): Write it in the encoding of the source file instead of UTF-8, if the translation fits in it. Defaults to False.
         """
         logger.info(f"Saving {filepath}")
-        subtitles = srt.compose(self.subtitles)
-        with open(filepath, "w", encoding="utf-8") as file_out:
-            file_out.write(subtitles)
+        start = timeit.default_timer()
+        encoding = self.encoding if keep_encoding else "utf-8"
+        try:
+            self._write(filepath, encoding)
+        except UnicodeEncodeError:
+            logger.warning(f"Translation does not fit in {encoding}, saving {filepath} as UTF-8")
+            self._write(filepath, "utf-8")
+        if self.report is not None:
+            self.report.add_span("save", timeit.default_timer() - start)
+
+        self._delete_backup()
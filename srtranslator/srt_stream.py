@@ -0,0 +1,153 @@
+import srt
+import logging
+import itertools
+
+from typing import Generator, Iterable, List, Optional
+
+from .dispatch import translate_chunks
+from .encoding import sniff_encoding
+from .report import TranslationHook, TranslationReport
+from .srt_file import SrtCues
+from .translators.base import Translator
+
+logger = logging.getLogger(__name__)
+
+
+class SrtStream(SrtCues):
+    """SRT file translated as a stream, for files too big to be loaded at once
+
+    Subtitles are read, cleaned, translated and written one chunk at the time,
+    so memory depends on the chunk size and not on the file size. Subtitles
+    must already be sorted by start time in the source file. Unlike SrtFile,
+    a stream has no journal, translation memory nor dedupe.
+
+    Args:
+        filepath (str): file path of srt
+        output_filepath (str): file path where the translated srt is written
+    """
+
+    def __init__(self, filepath: str, output_filepath: str) -> None:
+        self.filepath = filepath
+        self.output_filepath = output_filepath
+        self.report = None
+        self.subtitles = []
+        self.length = 0
+        self.encoding = "utf-8"
+
+    def _read_blocks(self, input_file: Iterable[str]) -> Generator:
+        """Split the file in SRT blocks without reading it whole
+
+        A block without timing line is part of the previous subtitle content.
+
+        Args:
+            input_file (Iterable[str]): Lines of the file
+
+        Yields:
+            Generator: Text of each subtitle block
+        """
+        pending = []
+        block = []
+        # Trailing empty line flushes the last block
+        for line in itertools.chain(input_file, [""]):
+            if line.strip():
+                block.append(line)
+                continue
+
+            if not block:
+                continue
+
+            if pending and any("-->" in block_line for block_line in block[:2]):
+                yield "".join(pending)
+                pending = []
+
+            if pending:
+                pending.append("\n")
+            pending.extend(block)
+            block = []
+
+        if pending:
+            yield "".join(pending)
+
+    def _read_subtitles(self) -> Generator:
+        """Parse and clean subtitles one at the time
+
+        Yields:
+            Generator: Cue of each subtitle, reindexed and cleaned
+        """
+        index = 1
+        # The file is not read whole, its encoding is guessed from its first bytes only
+        self.encoding = sniff_encoding(self.filepath)
+        with open(self.filepath, "r", encoding=self.encoding, errors="replace") as input_file:
+            for block in self._read_blocks(input_file):
+                for parsed in srt.parse(block):
+                    # Reindex and skip useless subtitles the same way srt.sort_and_reindex does
+                    for subtitle in srt.sort_and_reindex([parsed], start_index=index):
+                        index += 1
+                        self.length += len(subtitle.content) + 1
+                        yield from self._clean_subs_content([subtitle])
+
+    def translate(
+            self,
+            translator: Translator,
+            source_language: str,
+            destination_language: str,
+            max_concurrency: int = 1,
+            *,
+            wrap_limit: Optional[int] = None,
+            hooks: Optional[List[TranslationHook]] = None,
+    ) -> TranslationReport:
+        """Translate SRT file and write each chunk as soon as it is translated
+
+        Args:
+            translator (Translator): Translator object of choose
+            destination_language (str): Destination language (must be coherent with your translator)
+            source_language (str): Source language (must be coherent with your translator)
+            max_concurrency (int, optional): Number of chunks translated at the same time. Translator must be thread safe if greater than 1. Defaults to 1.
+            wrap_limit (int, optional): Wrap lines at this number of characters, else lines are joined as join_lines does. Defaults to None.
+            hooks (List[TranslationHook], optional): Hooks receiving the spans and chunks as they happen. Defaults to None.
+
+        Returns:
+            TranslationReport: Time spent per stage, chunks latency and retries. Reading the file is part of the chunk span
+        """
+        report = self.report = TranslationReport(
+            self.filepath, translator.name, source_language, destination_language, hooks
+        )
+        retries = translator.retries
+        progress = 0
+
+        logger.info(f"Streaming {self.filepath} to {self.output_filepath}")
+        try:
+            with report.span("translate"), open(self.output_filepath, "w", encoding="utf-8") as file_out:
+                for subs_slice, translation in translate_chunks(
+                        translator,
+                        report.timed("chunk", self._get_next_text_chunk(
+                            lambda: translator.max_char, self._read_subtitles(), translator.max_bytes
+                        )),
+                        source_language,
+                        destination_language,
+                        max_concurrency,
+                        report,
+                        # Written in order, chunks after a failed one would leave a gap in the file
+                        keep_completed=False,
+                ):
+                    with report.span("reassemble"):
+                        self._apply_translation(subs_slice, translation)
+
+                        if wrap_limit is None:
+                            self.join_lines(subs_slice)
+                        else:
+                            self.wrap_lines(wrap_limit, subs_slice)
+
+                    with report.span("save"):
+                        for subtitle in subs_slice:
+                            file_out.write(subtitle.to_subtitle().to_srt())
+                        file_out.flush()
+
+                    progress += len(subs_slice)
+                    logger.info(f"......Streaming translated............ {progress} subtitles")
+        finally:
+            report.units = progress
+            report.retries = translator.retries - retries
+
+        print(f"..................................................................................... TRANSLATION DONE")
+        return report
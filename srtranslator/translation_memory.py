@@ -0,0 +1,185 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "srtranslator", "translation_memory.sqlite3"
+)
+
+
+class TranslationMemory:
+    """Persistent translation memory stored in a SQLite database
+
+    Translations are keyed by translator, languages and normalized source text, so
+    a text already translated is never sent again to the translator. When the
+    memory grows beyond `max_entries` the least recently used translations are evicted.
+
+    Args:
+        path (str, optional): Database file path. ":memory:" keeps it only for this process. Defaults to ~/.cache/srtranslator/translation_memory.sqlite3
+        max_entries (int, optional): Maximum number of translations kept. Defaults to 100000.
+    """
+
+    # SQLite limits the number of variables in a single query
+    _batch_size = 500
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100_000) -> None:
+        self.path = path or DEFAULT_PATH
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)"
+        )
+        self._connection.commit()
+
+        # Logical clock instead of timestamps so usage order is exact
+        self._clock, self._size = self._connection.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM translations"
+        ).fetchone()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivial whitespace changes hit the same translation
+
+        Args:
+            text (str): Source text
+
+        Returns:
+            str: Text with each line stripped and inner spaces collapsed
+        """
+        return "\n".join(" ".join(line.split()) for line in text.strip().splitlines())
+
+    def _key(
+        self, translator: str, source_language: str, destination_language: str, text: str
+    ) -> str:
+        data = "\x1f".join(
+            (translator, source_language, destination_language, self.normalize(text))
+        )
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(
+        self,
+        translator: str,
+        source_language: str,
+        destination_language: str,
+        texts: Iterable[str],
+    ) -> Dict[str, str]:
+        """Look up the translations of several texts
+
+        Args:
+            translator (str): Translator identifier
+            source_language (str): Source language
+            destination_language (str): Destination language
+            texts (Iterable[str]): Source texts
+
+        Returns:
+            Dict[str, str]: Translations found, by source text
+        """
+        texts = list(texts)
+        keys = {}
+        for text in set(texts):
+            keys.setdefault(
+                self._key(translator, source_language, destination_language, text), []
+            ).append(text)
+
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            for i in range(0, len(key_list), self._batch_size):
+                batch = key_list[i : i + self._batch_size]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                if rows:
+                    self._connection.execute(
+                        f"UPDATE translations SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [self._tick(), *(key for key, _ in rows)],
+                    )
+                for key, translation in rows:
+                    for text in keys[key]:
+                        found[text] = translation
+            self._connection.commit()
+
+            hits = sum(1 for text in texts if text in found)
+            self.hits += hits
+            self.misses += len(texts) - hits
+
+        return found
+
+    def put_many(
+        self,
+        translator: str,
+        source_language: str,
+        destination_language: str,
+        translations: Iterable[Tuple[str, str]],
+    ) -> None:
+        """Store several translations, evicting the least recently used ones if needed
+
+        Args:
+            translator (str): Translator identifier
+            source_language (str): Source language
+            destination_language (str): Destination language
+            translations (Iterable[Tuple[str, str]]): Pairs of (source text, translation)
+        """
+        with self._lock:
+            for text, translation in translations:
+                inserted = self._connection.execute(
+                    "INSERT OR IGNORE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                    (
+                        self._key(translator, source_language, destination_language, text),
+                        translation,
+                        self._tick(),
+                    ),
+                ).rowcount
+                self._size += inserted
+
+            if self._size > self.max_entries:
+                logger.debug(f"Evicting {self._size - self.max_entries} translations from memory")
+                self._connection.execute(
+                    "DELETE FROM translations WHERE key IN"
+                    " (SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                    (self._size - self.max_entries,),
+                )
+                self._size = self.max_entries
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses and size of the memory
+
+        Returns:
+            Dict[str, int]: Counters of the memory
+        """
+        return dict(hits=self.hits, misses=self.misses, entries=self._size)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "TranslationMemory":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,204 @@
+import os
+import json
+import timeit
+import logging
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+from .base import Translator
+from .rate_limit import RateLimit, throttle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "srtranslator", "chunk_sizes.json"
+)
+
+
+class AdaptiveTranslator(Translator):
+    """Translator tuning its chunk size at runtime from the wrapped translator behavior
+
+    Full chunks translated successfully are timed, and the chunk size keeps moving in
+    the direction that improves characters per second. A chunk failing, by error or
+    with a different number of lines (as `_is_translated` checks), shrinks the chunk
+    size and is translated again in two halves. The tuned size is kept per backend in
+    a JSON file, so the next run starts from it. Lists of texts (translate_batch) are
+    forwarded as they are, sized by max_texts and max_batch_char of the wrapped translator.
+
+    Args:
+        translator (Translator): Translator to wrap
+        min_char (int, optional): Smallest chunk size. Defaults to 200.
+        max_limit (float, optional): Largest chunk size. Defaults to the translator max_bytes, a chunk has at least as many bytes as characters, else its max_char.
+        path (str, optional): File keeping the tuned chunk sizes. Defaults to ~/.cache/srtranslator/chunk_sizes.json
+        step (float, optional): Growth factor of the chunk size at each tuning step. Defaults to 1.25.
+        shrink (float, optional): Factor applied to the size of a failed chunk. Defaults to 0.5.
+    """
+
+    # Chunks below this ratio of max_char (end of file) do not tell much about the best size
+    _full_ratio = 0.8
+    # Throughput measures are noisy, keep the direction unless clearly worse
+    _tolerance = 0.95
+
+    def __init__(
+            self,
+            translator: Translator,
+            min_char: int = 200,
+            max_limit: Optional[float] = None,
+            path: Optional[str] = None,
+            step: float = 1.25,
+            shrink: float = 0.5,
+    ) -> None:
+        self.translator = translator
+        self.min_char = min_char
+        self.max_limit = max_limit or translator.max_bytes or translator.max_char
+        self.path = path or DEFAULT_PATH
+        self.step = step
+        self.shrink = shrink
+        self.failures = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+        self._direction = 1
+        self._last_rate = None
+        self._ceiling = self.max_limit
+
+        stored = self._load().get(self.name)
+        self._max_char = self._clamp(stored or translator.max_char)
+        logger.info(f"Adaptive chunk size for {self.name} starts at {self._max_char}")
+
+    @property
+    def max_char(self) -> int:
+        return self._max_char
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        return self.translator.max_bytes
+
+    @property
+    def max_texts(self) -> Optional[int]:
+        return self.translator.max_texts
+
+    @property
+    def max_batch_char(self) -> Optional[int]:
+        return self.translator.max_batch_char
+
+    @property
+    def name(self) -> str:
+        return self.translator.name
+
+    @property
+    def rate_limit(self) -> Optional[RateLimit]:
+        return self.translator.rate_limit
+
+    @property
+    def retries(self) -> int:
+        # Halves sent again here, and retries of the wrapped translator
+        return self._retries + self.translator.retries
+
+    def _clamp(self, size: float) -> int:
+        return int(max(self.min_char, min(size, self.max_limit, self._ceiling)))
+
+    def _load(self) -> Dict[str, int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        sizes = self._load()
+        sizes[self.name] = self._max_char
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(sizes, file)
+            os.replace(temporary, self.path)
+        except OSError:
+            logger.warning(f"Cannot keep tuned chunk size in {self.path}")
+
+    def _resize(self, size: float) -> None:
+        size = self._clamp(size)
+        if size != self._max_char:
+            logger.info(f"Adaptive chunk size for {self.name} :: {self._max_char} -> {size}")
+            self._max_char = size
+            self._save()
+
+    def _succeeded(self, n_char: int, elapsed: float) -> None:
+        with self._lock:
+            # Let the sizes that failed be tried again little by little
+            self._ceiling = min(self.max_limit, self._ceiling * 1.05)
+
+            if n_char < self._full_ratio * self._max_char:
+                return
+
+            rate = n_char / max(elapsed, 1e-6)
+            if self._last_rate is not None and rate < self._last_rate * self._tolerance:
+                self._direction = -self._direction
+            self._last_rate = rate
+
+            self._resize(self._max_char * (self.step if self._direction > 0 else 1 / self.step))
+
+    def _failed(self, n_char: int) -> None:
+        with self._lock:
+            self.failures += 1
+            self._ceiling = max(self.min_char, min(self._ceiling, n_char - 1))
+            self._direction = 1
+            self._last_rate = None
+            self._resize(min(self._max_char, n_char) * self.shrink)
+
+    @staticmethod
+    def _is_aligned(original: str, translation: str) -> bool:
+        return len(translation) != 0 and len(original.splitlines()) == len(translation.splitlines())
+
+    @staticmethod
+    def _split(text: str) -> Optional[Tuple[str, str, str]]:
+        """Split a chunk in two halves between units
+
+        Args:
+            text (str): Chunk text, units separated by an empty line or a break line
+
+        Returns:
+            Optional[Tuple[str, str, str]]: Left half, separator and right half. None if the chunk has a single line
+        """
+        separator = "\n\n" if "\n\n" in text else "\n"
+        units = text.split(separator)
+        if len(units) < 2:
+            return None
+
+        middle = len(units) // 2
+        return separator.join(units[:middle]), separator, separator.join(units[middle:])
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        start = timeit.default_timer()
+        try:
+            translation = self.translator.translate(text, source_language, destination_language)
+        except Exception:
+            self._failed(len(text))
+            raise
+
+        if self._is_aligned(text, translation):
+            self._succeeded(len(text), timeit.default_timer() - start)
+            return translation
+
+        logger.info(f"Chunk of {len(text)} characters translated with lines mismatch, retry in halves")
+        self._failed(len(text))
+        halves = self._split(text)
+        if halves is None:
+            return translation
+
+        left, separator, right = halves
+        translations = []
+        for half in (left, right):
+            # Halves are extra requests to the backend, the caller only throttled the whole chunk
+            throttle(self, len(half))
+            with self._lock:
+                self._retries += 1
+            translations.append(self.translate(half, source_language, destination_language))
+        return separator.join(translations)
+
+    def translate_batch(self, texts: List[str], source_language: str, destination_language: str) -> List[str]:
+        return self.translator.translate_batch(texts, source_language, destination_language)
+
+    def quit(self):
+        self.translator.quit()
@@ -1,8 +1,25 @@
+import threading
+
 from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from .rate_limit import RateLimit
 
 
 class Translator(ABC):
     max_char: int
+    # Request size limit in UTF-8 bytes, for engines limited in bytes rather than characters
+    max_bytes: Optional[int] = None
+    # Requests and characters the backend allows per interval, shared by all its translators
+    rate_limit: Optional[RateLimit] = None
+    # Texts per request of translate_batch, for engines translating lists of texts
+    max_texts: Optional[int] = None
+    # Characters of all the texts of a translate_batch request
+    max_batch_char: Optional[int] = None
+    # Requests sent again after a failure, counted by translators retrying
+    retries: int = 0
+    # Guards retries, translators are called from the dispatcher threads
+    _retries_lock = threading.Lock()
 
     @abstractmethod
     def translate(
@@ -10,6 +27,34 @@ class Translator(ABC):
     ) -> str:
         ...
 
+    def translate_batch(
+        self, texts: List[str], source_language: str, destination_language: str
+    ) -> List[str]:
+        """Translate several texts, one request per text unless the engine overrides it
+
+        Engines translating lists of texts in a single request override it and set
+        max_texts, files only send lists to translators setting max_texts.
+
+        Args:
+            texts (List[str]): Texts to translate, one per subtitle
+            source_language (str): Source language
+            destination_language (str): Destination language
+
+        Returns:
+            List[str]: One translation per text, in the same order
+        """
+        return [self.translate(text, source_language, destination_language) for text in texts]
+
+    def _count_retry(self) -> None:
+        """Count a request sent again, safe from several threads"""
+        with Translator._retries_lock:
+            self.retries += 1
+
+    @property
+    def name(self) -> str:
+        """Translation engine identifier, used to key cached translations"""
+        return type(self).__name__
+
     def quit(self):
         ...
 
@@ -1,15 +1,230 @@
+import math
+import time
+import inspect
+import random
+import logging
+import threading
+
 import deepl
-from .base import Translator
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .base import Translator, TimeOutException
+
+logger = logging.getLogger(__name__)
+
+# Characters billed per request given back in the results, from deepl-python 1.18
+BILLED_CHARACTERS = (
+    {"show_billed_characters": True}
+    if "show_billed_characters" in inspect.signature(deepl.Translator.translate_text).parameters else {}
+)
 
 
 class DeeplApi(Translator):
     max_char = 1500
+    # Total request size accepted by the API
+    max_bytes = 128 * 1024
+    # Texts accepted per request by the API
+    max_texts = 50
+    # Request body is JSON with non-ASCII characters escaped, up to 6 bytes per character
+    max_batch_char = max_bytes // 6
 
-    def __init__(self, api_key):
-        self.translator = deepl.Translator(api_key)
+    def __init__(self, api_key, server_url: Optional[str] = None):
+        self.translator = deepl.Translator(api_key, server_url=server_url)
 
     def translate(self, text: str, source_language: str, destination_language: str):
         result = self.translator.translate_text(
             text, source_lang=source_language, target_lang=destination_language
         )
         return result.text
+
+    def translate_batch(self, texts: List[str], source_language: str, destination_language: str) -> List[str]:
+        results = self.translator.translate_text(
+            texts, source_lang=source_language, target_lang=destination_language
+        )
+        return [result.text for result in results]
+
+
+class _ApiKey:
+    """DeepL API key of a pool, with its remaining quota and consumption"""
+
+    def __init__(self, api_key: str, server_url: Optional[str] = None) -> None:
+        self.api_key = api_key
+        self.translator = DeeplApi(api_key, server_url)
+        self.remaining = math.inf
+        self.chars = 0
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.disabled: Optional[str] = None
+        self.resume_at = 0.0
+
+    @property
+    def label(self) -> str:
+        # Enough to recognize the key in logs without showing it
+        return f"...{self.api_key.split(':')[0][-4:]}"
+
+    def refresh(self) -> None:
+        """Read the remaining character quota of the key from the API"""
+        usage = self.translator.translator.get_usage().character
+        if usage.valid:
+            self.remaining = max(0, usage.limit - usage.count)
+        logger.info(f"DeepL API key {self.label} :: {usage} characters used")
+
+
+class DeeplApiPool(Translator):
+    """Several DeepL API keys translating as a single translator
+
+    Each chunk goes to a key picked at random, weighted by its remaining character
+    quota and lowered by the chunks it is already translating, so concurrent chunks
+    (max_concurrency) spread over the keys. A key out of quota is taken out of the
+    pool, a key rate limited (429) is left aside for a while. Chunks failed by a key
+    are sent again to another one. The remaining quota of a key is read once, then
+    lowered by the characters billed for each request.
+
+    The DeepL client retries are turned off for the whole process
+    (deepl.http_client.max_network_retries), a 429 or 5xx must reach the pool
+    at once to move the chunk to another key instead of backing off on the same one.
+
+    Args:
+        api_keys (List[str]): DeepL API keys
+        server_url (str, optional): DeepL API server URL. Defaults to the one of each key plan.
+        max_retries (int, optional): Number of keys tried for the same chunk. Defaults to the number of keys.
+        cooldown (float, optional): Seconds a rate limited key is left aside. Defaults to 60.
+
+    Raises:
+        ValueError: No API key given
+    """
+
+    max_char = DeeplApi.max_char
+    max_bytes = DeeplApi.max_bytes
+    max_texts = DeeplApi.max_texts
+    max_batch_char = DeeplApi.max_batch_char
+    # Weight of a key not telling its quota, the monthly characters of the free plan
+    _unknown_quota = 500_000
+
+    def __init__(
+            self,
+            api_keys: List[str],
+            server_url: Optional[str] = None,
+            max_retries: Optional[int] = None,
+            cooldown: float = 60.0,
+    ):
+        if not api_keys:
+            raise ValueError("DeeplApiPool needs at least one DeepL API key")
+        deepl.http_client.max_network_retries = 0
+        self.keys = [_ApiKey(api_key, server_url) for api_key in api_keys]
+        self.max_retries = max_retries or len(self.keys)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+        with ThreadPoolExecutor(max_workers=len(self.keys)) as executor:
+            futures = [executor.submit(key.refresh) for key in self.keys]
+        for key, future in zip(self.keys, futures):
+            try:
+                future.result()
+            except deepl.AuthorizationException:
+                logger.warning(f"DeepL API key {key.label} not authorized, left out")
+                key.disabled = "unauthorized"
+            except Exception:
+                logger.exception(f"Error reading usage of DeepL API key {key.label}")
+
+    @property
+    def name(self) -> str:
+        return DeeplApi.__name__
+
+    def _weight(self, key: _ApiKey) -> float:
+        remaining = self._unknown_quota if math.isinf(key.remaining) else key.remaining
+        return remaining / (1 + key.in_flight)
+
+    def _acquire(self, n_char: int) -> _ApiKey:
+        """Pick a key for a request of n_char characters, waiting for a rate limited one if needed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                usable = [key for key in self.keys if key.disabled is None and key.remaining > 0]
+                if not usable:
+                    raise deepl.QuotaExceededException("All DeepL API keys are out of quota")
+
+                ready = [key for key in usable if key.resume_at <= now]
+                # Keys with quota left for the whole chunk first
+                candidates = [key for key in ready if key.remaining >= n_char] or ready
+                if candidates:
+                    key = random.choices(candidates, [self._weight(key) for key in candidates])[0]
+                    key.in_flight += 1
+                    return key
+
+                wait = min(key.resume_at for key in usable) - now
+
+            logger.info(f"All DeepL API keys rate limited, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def _request(self, texts, source_language: str, destination_language: str):
+        n_char = sum(map(len, texts)) if isinstance(texts, list) else len(texts)
+        for attempt in range(self.max_retries):
+            if attempt:
+                self._count_retry()
+            key = self._acquire(n_char)
+            try:
+                results = key.translator.translator.translate_text(
+                    texts, source_lang=source_language, target_lang=destination_language, **BILLED_CHARACTERS
+                )
+            except deepl.QuotaExceededException:
+                logger.warning(f"DeepL API key {key.label} out of quota, left out")
+                with self._lock:
+                    key.disabled = "quota"
+                    key.remaining = 0
+            except deepl.TooManyRequestsException:
+                logger.warning(f"DeepL API key {key.label} rate limited, left aside {self.cooldown}s")
+                with self._lock:
+                    key.failures += 1
+                    key.resume_at = time.monotonic() + self.cooldown
+            except deepl.AuthorizationException:
+                logger.warning(f"DeepL API key {key.label} not authorized, left out")
+                with self._lock:
+                    key.disabled = "unauthorized"
+            except deepl.DeepLException as e:
+                logger.info(f"DeepL API key {key.label} failed chunk (attempt {attempt + 1}) :: {e}")
+                with self._lock:
+                    key.failures += 1
+            else:
+                batch = isinstance(results, list)
+                billed = [getattr(result, "billed_characters", None) for result in (results if batch else [results])]
+                # Without billing in the results, DeepL bills the source characters
+                n_billed = n_char if None in billed else sum(billed)
+                with self._lock:
+                    key.requests += 1
+                    key.chars += n_billed
+                    key.remaining = max(0, key.remaining - n_billed)
+                return [result.text for result in results] if batch else results.text
+            finally:
+                with self._lock:
+                    key.in_flight -= 1
+
+        raise TimeOutException(f"Translation failed on {self.max_retries} DeepL API keys")
+
+    def translate(self, text: str, source_language: str, destination_language: str):
+        return self._request(text, source_language, destination_language)
+
+    def translate_batch(self, texts: List[str], source_language: str, destination_language: str) -> List[str]:
+        return self._request(texts, source_language, destination_language)
+
+    def report(self) -> List[Dict]:
+        """Consumption of each key during this run
+
+        Returns:
+            List[Dict]: Per key label, requests, characters billed, failures, remaining quota and state
+        """
+        with self._lock:
+            return [
+                {
+                    "key": key.label,
+                    "requests": key.requests,
+                    "chars": key.chars,
+                    "failures": key.failures,
+                    "remaining": None if math.isinf(key.remaining) else key.remaining,
+                    "state": key.disabled or "active",
+                }
+                for key in self.keys
+            ]
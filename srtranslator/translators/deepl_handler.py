@@ -1,7 +1,10 @@
 import logging
 import os
+import queue
+import threading
 import time
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
 import re
 
@@ -14,18 +17,75 @@ from .selenium_components import (
     TextArea,
     Button,
     Text, BaseElement,
+    clear_element_cache,
 )
 from .selenium_utils import (
+    DriverFactory,
     create_proxy,
     create_driver,
 )
 
 logger = logging.getLogger(__name__)
 
+# Resolves once the target text is translated and stopped changing, or at the deadline.
+# Page mutations trigger the check, a short interval covers value changes not seen as mutations.
+WAIT_TRANSLATION_SCRIPT = r"""
+const [target, original, expectedLines, stableMs, timeoutMs, done] = arguments;
+// Same value as get_attribute("value"), else one line per <p>: innerText puts a blank line between blocks
+const read = () => {
+    if (target.value !== undefined && target.value !== null) return String(target.value);
+    const attribute = target.getAttribute("value");
+    if (attribute !== null) return attribute;
+    const paragraphs = target.querySelectorAll("p");
+    if (paragraphs.length) return Array.from(paragraphs, (paragraph) => paragraph.textContent).join("\n");
+    return target.textContent || "";
+};
+// Same count as str.splitlines for the texts sent
+const lines = (text) => text.replace(/(\r\n|\r|\n)$/, "").split(/\r\n|\r|\n/).length;
+const busy = () => document.getElementById("translator-progress-description") !== null;
+const deadline = Date.now() + timeoutMs;
+let last = read();
+let changedAt = Date.now();
+let finished = false;
+let observer = null;
+let interval = null;
+
+const finish = (complete) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearInterval(interval);
+    done({translation: last, complete: complete});
+};
+
+const check = () => {
+    const current = read();
+    if (current !== last) {
+        last = current;
+        changedAt = Date.now();
+    }
+    const ready = current.trim().length > 0
+        && current !== original
+        && lines(current) === expectedLines
+        && !busy();
+    if (ready && Date.now() - changedAt >= stableMs) return finish(true);
+    if (Date.now() >= deadline) return finish(false);
+};
+
+observer = new MutationObserver(check);
+observer.observe(document.body, {subtree: true, childList: true, characterData: true, attributes: true});
+interval = setInterval(check, 100);
+check();
+"""
+
 
 class DeeplTranslator(Translator):
     url = "https://www.deepl.com/en/translator"
     max_char = 3000
+    # Seconds to wait for a chunk translation before giving up
+    timeout = 60
+    # Seconds the translation must stay unchanged to be considered complete
+    stable_time = 0.5
     proxy_address: List[str] = None
     languages = {
         "auto": "Any language (detect)",
@@ -63,9 +123,19 @@ class DeeplTranslator(Translator):
         "uk": "Ukrainian",
     }
 
-    def __init__(self, driver: Optional[WebDriver] = None, username: str = None, password: str = None):
+    def __init__(
+            self,
+            driver: Optional[WebDriver] = None,
+            username: str = None,
+            password: str = None,
+            timeout: Optional[float] = None,
+            driver_factory: Optional[DriverFactory] = None,
+    ):
         self.username = username
         self.password = password
+        self.driver_factory = driver_factory
+        if timeout is not None:
+            self.timeout = timeout
         self.last_translation_failed = False  # last_translation_failed is False still stop drive and retry proxy new, try proxy still failed is True
         self.driver = driver
 
@@ -76,8 +146,11 @@ class DeeplTranslator(Translator):
         self._reset()
 
     def _reset(self):
-        logger.info(f"Going to {self.url}")
-        self.driver.get(self.url)
+        # Drivers of a factory may have opened the page in advance
+        if not self.driver.current_url.startswith(self.url):
+            logger.info(f"Going to {self.url}")
+            self.driver.get(self.url)
+        clear_element_cache(self.driver)
         #
         if os.getenv("LOGIN_AUTO"):
             try:
@@ -99,13 +172,21 @@ class DeeplTranslator(Translator):
         self.target_lang = None
 
     def _rotate_proxy(self):
-        if self.driver is not None:
+        banned = self.driver is not None
+        if banned:
             logger.warning(" ======= Translation failed. Probably got banned. ======= ")
             logger.info("Rotating proxy")
             self.quit()
 
-        proxy = create_proxy(proxyAddresses=self.proxy_address)
-        self.driver = create_driver(proxy)
+        if self.driver_factory is not None and banned:
+            # The factory proxy may be none or the banned one, start the browser on a new proxy
+            self.driver = self.driver_factory.get_driver(create_proxy(proxyAddresses=self.proxy_address))
+        elif self.driver_factory is not None:
+            # Standby driver, its proxy comes from the factory
+            self.driver = self.driver_factory.get_driver()
+        else:
+            proxy = create_proxy(proxyAddresses=self.proxy_address)
+            self.driver = create_driver(proxy)
         self._reset()
 
     def _closePopUp(self):
@@ -271,11 +352,39 @@ class DeeplTranslator(Translator):
                 f"not _is_translated splitlines {len(original.splitlines()) == len(translation.splitlines())}   {len(original.splitlines())} {len(translation.splitlines())}")
             return False
 
+    def _wait_translation(self, text: str) -> str:
+        """Wait until the page shows the whole translation of the text, or until the timeout
+
+        Args:
+            text (str): Text sent to translate
+
+        Returns:
+            str: Translation shown in the page, may be incomplete if the timeout was reached
+        """
+        try:
+            # Script timeout beyond the script own deadline, so the last value is still returned
+            self.driver.set_script_timeout(self.timeout + 10)
+            result = self.input_destination_language.with_element(
+                lambda element: self.driver.execute_async_script(
+                    WAIT_TRANSLATION_SCRIPT,
+                    element,
+                    text,
+                    len(text.splitlines()),
+                    int(self.stable_time * 1000),
+                    int(self.timeout * 1000),
+                )
+            )
+            if not result["complete"]:
+                logger.info(f"Translation not complete after {self.timeout}s")
+            return str(result["translation"] or "")
+        except Exception:
+            logger.exception("Error waiting translation in page")
+            return str(self.input_destination_language.value or "")
+
     def translate(self, text: str, source_language: str, destination_language: str):
         start = timeit.default_timer()
 
         try:
-            start = timeit.default_timer()
             if source_language != self.src_lang:
                 self._set_source_language(source_language)
             if destination_language != self.target_lang:
@@ -298,49 +407,23 @@ class DeeplTranslator(Translator):
         except Exception as e:
             logger.warning("Error catch exception element.........................................................", e)
 
-        try:
-            time.sleep(4)
-            for j in range(10):
-                progress = BaseElement(self.driver, "XPATH", f"//*[@id='translator-progress-description']",
-                                       optional=True)
-                if logger.isEnabledFor(logging.NOTSET):
-                    self.driver.save_screenshot(f"{self.src_lang}_{self.target_lang}_{start}___progress_{j}.png")
-                    with open(f"{self.src_lang}_{self.target_lang}_{start}____progress_{j}.html", "w",
-                              encoding='utf-8') as f:
-                        f.write(self.driver.page_source)
-                time.sleep(1)
-                if progress and progress.element:
-                    time.sleep(2)
-                    logger.info(f"*** {progress.element.text}")
-                if progress is None:
-                    break
-        except:
-            pass
+        translation = self._wait_translation(text)
 
         if logger.isEnabledFor(logging.NOTSET):
             self.driver.save_screenshot(f"{self.src_lang}_{self.target_lang}_{start}_after_waiting.png")
             with open(f"{self.src_lang}_{self.target_lang}_{start}_after_waiting.html", "w", encoding='utf-8') as f:
                 f.write(self.driver.page_source)
 
-        for _ in range(5):
+        logger.info(
+            f"{timeit.default_timer() - start} :: translation :: input {len(text)} :: output {len(translation)}")
+        if self._is_translated(text, translation):
+            # Reset the proxy flag -- is success - last not failed
+            self.last_translation_failed = False
             try:
-                translation = str(self.input_destination_language.value)
-                logger.info(
-                    f"{timeit.default_timer()} - {start} :: translation :: [{_}] :: input {len(text)} :: output {len(translation)}")
-
-                if self._is_translated(text, translation):
-                    # Reset the proxy flag -- is success - last not failed
-                    self.last_translation_failed = False
-                    try:
-                        time.sleep(2)
-                        self.driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.CONTROL + Keys.HOME)
-                    except:
-                        logger.info("Exception throw scroll by HOME")
-                    return translation
-
-                time.sleep(2)
-            except Exception as e:
-                logger.warning("Error catch exception.............................................................", e)
+                self.driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.CONTROL + Keys.HOME)
+            except:
+                logger.info("Exception throw scroll by HOME")
+            return translation
 
         # Maybe proxy got banned, so we try with a new proxy, but just once.
         if not self.last_translation_failed:  # failing, see_ing default is failing but first time not failed
@@ -352,7 +435,10 @@ class DeeplTranslator(Translator):
         raise TimeOutException("Translation timed out - Had try proxy but still failed.")
 
     def quit(self):
-        self.driver.quit()
+        if self.driver_factory is not None:
+            self.driver_factory.release(self.driver)
+        else:
+            self.driver.quit()
 
     def _login_user_session_new(self, username: str, password: str):
         try:
@@ -361,6 +447,7 @@ class DeeplTranslator(Translator):
             time.sleep(10)
             # Loop through until we find a new window handle
             self.driver.switch_to.window(self.driver.window_handles[1])
+            clear_element_cache(self.driver)
             # self.driver.get("https://www.deepl.com/en/login") #tab_new
             # for window_handle in self.driver.window_handles:
             #     if window_handle != original_window:
@@ -409,3 +496,117 @@ class DeeplTranslator(Translator):
             except:
                 pass
 
+
+
+class DeeplBrowserPool(Translator):
+    """Pool of DeepL browser sessions translating several chunks at the same time
+
+    Each worker is a DeeplTranslator with its own WebDriver. A chunk is sent to the
+    first idle worker, and a worker failing a chunk is replaced by a new one.
+
+    Args:
+        workers (int): Number of browser sessions. Defaults to 2.
+        username (str, optional): Username login account.
+        password (str, optional): Password of account login.
+        proxy_address (List[str], optional): List proxy address [ip:port].
+        use_proxy (bool): Start the browsers behind a proxy. Replaced workers always rotate proxy. Defaults to True.
+        max_retries (int): Number of replaced workers tried for the same chunk. Defaults to 2.
+        driver_factory (DriverFactory, optional): Gives the browsers of workers instead of starting them here, proxies then come from the factory. Defaults to None.
+    """
+
+    max_char = DeeplTranslator.max_char
+    rate_limit = DeeplTranslator.rate_limit
+
+    def __init__(
+            self,
+            workers: int = 2,
+            username: str = None,
+            password: str = None,
+            proxy_address: List[str] = None,
+            use_proxy: bool = True,
+            max_retries: int = 2,
+            driver_factory: Optional[DriverFactory] = None,
+    ):
+        self.username = username
+        self.password = password
+        self.proxy_address = proxy_address
+        self.max_retries = max_retries
+        self.driver_factory = driver_factory
+        self.workers: List[DeeplTranslator] = []
+        self._idle: "queue.Queue[Optional[DeeplTranslator]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+        # Browsers are slow to start, so start them all at the same time
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._create_worker, use_proxy) for _ in range(workers)]
+        for future in futures:
+            try:
+                self._idle.put(future.result())
+            except Exception:
+                logger.exception("Error init browser worker, it will be retried on first use")
+                self._idle.put(None)
+
+    def _create_worker(self, use_proxy: bool = True) -> DeeplTranslator:
+        if self.driver_factory is not None:
+            driver = self.driver_factory.get_driver()
+        else:
+            proxy = create_proxy(proxyAddresses=self.proxy_address) if use_proxy else None
+            driver = create_driver(proxy)
+        try:
+            worker = DeeplTranslator(driver, username=self.username, password=self.password,
+                                     driver_factory=self.driver_factory)
+        except Exception:
+            if self.driver_factory is not None:
+                self.driver_factory.release(driver)
+            else:
+                driver.quit()
+            raise
+        worker.proxy_address = self.proxy_address
+
+        with self._lock:
+            self.workers.append(worker)
+        logger.info(f"Browser worker ready ({len(self.workers)} running)")
+        return worker
+
+    def _discard_worker(self, worker: Optional[DeeplTranslator]) -> None:
+        if worker is None:
+            return
+
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        try:
+            worker.quit()
+        except Exception:
+            logger.info("Exception closing browser worker")
+
+    @property
+    def name(self) -> str:
+        return DeeplTranslator.__name__
+
+    def translate(self, text: str, source_language: str, destination_language: str):
+        worker = self._idle.get()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if attempt:
+                        self._count_retry()
+                    if worker is None:
+                        worker = self._create_worker()
+                    return worker.translate(text, source_language, destination_language)
+                except Exception as e:
+                    logger.warning(f"Browser worker failed chunk (attempt {attempt + 1}), replacing it :: {e}")
+                    self._discard_worker(worker)
+                    worker = None
+
+            raise TimeOutException("Translation timed out - Had replaced browser worker but still failed.")
+        finally:
+            # A None worker keeps the slot, it is created again on next use
+            self._idle.put(worker)
+
+    def quit(self):
+        with self._lock:
+            workers = list(self.workers)
+            self.workers.clear()
+        for worker in workers:
+            self._discard_worker(worker)
@@ -13,6 +13,7 @@ from .selenium_utils import (
     TextArea,
     Button,
     Text,
+    clear_element_cache,
 )
 
 
@@ -68,6 +69,7 @@ class DeeplTranslator(Translator):
     def _reset(self):
         logging.info(f"Going to {self.url}")
         self.driver.get(self.url)
+        clear_element_cache(self.driver)
         self.driver.implicitly_wait(5)
         self._closePopUp()
 
@@ -1,61 +1,149 @@
-from PyDeepLX import PyDeepLX as PDLX
-from random import randint
-from time import sleep
+import json
+import time
+import random
+import logging
+
+from typing import Optional
 
-from .base import Translator as BaseTranslator
+import httpx
 from fp.fp import FreeProxy
+from PyDeepLX import PyDeepLX as PDLX
+
+from .base import Translator as BaseTranslator, TimeOutException
+from .rate_limit import RateLimit
+
+logger = logging.getLogger(__name__)
 
 
 class PyDeepLX(BaseTranslator):
+    """DeepL free endpoint, or a DeepLX compatible server, through a pooled HTTP client
+
+    Connections are kept alive and shared by all the threads translating, so several
+    chunks can be in flight at once (max_concurrency). A failed request is retried
+    after a capped exponential backoff with jitter.
+
+    Args:
+        proxies (bool or str, optional): Proxy URL, or True to get a free proxy once. Defaults to None.
+        endpoint (str, optional): URL of a DeepLX server translate route (POST {"text", "source_lang", "target_lang"}). Defaults to the DeepL jsonrpc endpoint PyDeepLX uses.
+        max_connections (int, optional): Connections kept open to the endpoint. Defaults to 4.
+        max_retries (int, optional): Retries of a failed request. Defaults to 5.
+        backoff (float, optional): First retry delay in seconds, doubled each retry. Defaults to 1.
+        max_backoff (float, optional): Longest retry delay in seconds. Defaults to 30.
+        timeout (float, optional): Request timeout in seconds. Defaults to 30.
+    """
+
     max_char = 1500
+    # Limit of the DeepL endpoint, a DeepLX server sets its own
+    rate_limit = RateLimit(requests=10, interval=60, burst=2)
 
-    def __init__(self, proxies=None):
+    def __init__(
+            self,
+            proxies=None,
+            endpoint: Optional[str] = None,
+            max_connections: int = 4,
+            max_retries: int = 5,
+            backoff: float = 1.0,
+            max_backoff: float = 30.0,
+            timeout: float = 30.0,
+    ):
         self.proxies = proxies
+        self.endpoint = endpoint or PDLX.deeplAPI
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
 
         # Use proxy by default if self.proxies is True
-        if self.proxies:
-            print("...... Use proxy")
+        if self.proxies is True:
+            logger.info("Getting a free proxy for PyDeepLX")
             self.proxies = FreeProxy(rand=True, timeout=1).get()
 
-    def translate(self, text, source_language, destination_language):
-        # Sleep a random number of seconds (between 5 and 10)
-        # https://www.shellhacks.com/python-sleep-random-time-web-scraping/
-        RANDOM_WAIT = randint(5, 10)
-        print(f"...... Wait randomly {RANDOM_WAIT}s")
-        sleep(RANDOM_WAIT)
+        if endpoint is not None:
+            self.rate_limit = None
+
+        self.client = httpx.Client(
+            proxy=self.proxies or None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers=PDLX.headers if endpoint is None else None,
+        )
 
-        # Max retry 10
-        RETRY_COUNTER = 10
-        result = None
+    def _jsonrpc_request(self, text: str, source_language: str, destination_language: str) -> str:
+        # Same request as PyDeepLX.translate, on the pooled client
+        request_id = PDLX.getRandomNumber()
+        data = json.dumps({
+            "jsonrpc": "2.0",
+            "method": "LMT_handle_texts",
+            "id": request_id,
+            "params": {
+                "texts": [{"text": text, "requestAlternatives": 0}],
+                "splitting": "newlines",
+                "lang": {
+                    "source_lang_user_selected": source_language,
+                    "target_lang": destination_language,
+                },
+                "timestamp": PDLX.getTimestamp(PDLX.getICount(text)),
+                "commonJobParams": {
+                    "wasSpoken": False,
+                    "transcribe_as": "",
+                },
+            },
+        }, ensure_ascii=False)
 
-        while RETRY_COUNTER > 0 :
+        if (request_id + 5) % 29 == 0 or (request_id + 3) % 13 == 0:
+            return data.replace('"method": "', '"method" : "', 1)
+        return data
+
+    def _post(self, text: str, source_language: str, destination_language: str) -> httpx.Response:
+        if self.endpoint == PDLX.deeplAPI:
+            return self.client.post(
+                self.endpoint, content=self._jsonrpc_request(text, source_language, destination_language)
+            )
+
+        return self.client.post(self.endpoint, json={
+            "text": text,
+            "source_lang": source_language,
+            "target_lang": destination_language,
+        })
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> Optional[str]:
+        result = response.json()
+        if "result" in result:
+            return result["result"]["texts"][0]["text"]
+        # DeepLX servers answer {"code": 200, "data": "..."}
+        return result.get("data")
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        # Full jitter, so threads failing together do not retry together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def translate(self, text, source_language, destination_language):
+        for attempt in range(self.max_retries + 1):
+            response = None
             try:
-                result = PDLX.translate(
-                    text,
-                    source_language,
-                    destination_language,
-                    proxies=self.proxies
-                )
-
-                if result == None:
-                  print("...... Exception: result is empty raise exception")
-                  raise Exception("Result is empty")
-
-                # Everyting alright
-                break
-            except Exception as e:
-                print(f"...... Exception {e} with retry number {RETRY_COUNTER}")
-
-                # Get a random proxy
-                print("...... Use or change proxy")
-                self.proxies = FreeProxy(rand=True, timeout=1).get()
-
-                # Decrease RETRY_COUNTER
-                RETRY_COUNTER -= 1
-
-                # Raise error if RETRY_COUNTER is 0
-                if RETRY_COUNTER == 0:
-                    print("...... Exception RETRY_COUNTER reached 0")
-                    raise
-
-        return result
+                response = self._post(text, source_language, destination_language)
+                if response.status_code == 200:
+                    result = self._parse(response)
+                    if result:
+                        return result
+                    logger.info("PyDeepLX result is empty")
+                elif response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                else:
+                    logger.info(f"PyDeepLX status {response.status_code}")
+            except (httpx.TransportError, ValueError, KeyError, IndexError) as e:
+                logger.info(f"PyDeepLX request failed :: {e}")
+
+            if attempt < self.max_retries:
+                self._count_retry()
+                delay = self._retry_delay(attempt, response)
+                logger.info(f"PyDeepLX retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+        raise TimeOutException(f"PyDeepLX failed after {self.max_retries} retries")
+
+    def quit(self):
+        self.client.close()
@@ -0,0 +1,127 @@
+import time
+import logging
+import threading
+
+from typing import Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    """Limits a translator backend declares
+
+    Args:
+        requests (float, optional): Requests allowed per interval. Defaults to None, no limit.
+        chars (float, optional): Characters allowed per interval. Defaults to None, no limit.
+        interval (float, optional): Interval in seconds. Defaults to 60.
+        burst (float, optional): Requests allowed at once after being idle. Defaults to requests.
+    """
+
+    requests: Optional[float] = None
+    chars: Optional[float] = None
+    interval: float = 60.0
+    burst: Optional[float] = None
+
+
+class _Bucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def reserve(self, cost: float, elapsed: float) -> float:
+        """Take tokens, possibly ahead of time, and tell how long to wait for them"""
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        # A cost beyond the capacity would never be available, it waits for a full bucket
+        self.tokens -= min(cost, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+
+class RateLimiter:
+    """Token buckets of requests and characters shared by all threads using a backend
+
+    Each call reserves its request and characters, waiting only until the budget
+    allows them. Reservations taken ahead of time keep the waiting calls in order.
+
+    Args:
+        limit (RateLimit): Limits of the backend
+    """
+
+    def __init__(self, limit: RateLimit) -> None:
+        self.limit = limit
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._last = time.monotonic()
+        self._requests = None
+        self._chars = None
+
+        if limit.requests:
+            self._requests = _Bucket(limit.requests / limit.interval, limit.burst or limit.requests)
+        if limit.chars:
+            self._chars = _Bucket(limit.chars / limit.interval, limit.chars)
+
+    def acquire(self, n_char: int = 0) -> float:
+        """Wait until a request of n_char characters is allowed
+
+        Args:
+            n_char (int, optional): Characters of the request. Defaults to 0.
+
+        Returns:
+            float: Seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last
+            self._last = now
+
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, elapsed))
+            if self._chars is not None:
+                wait = max(wait, self._chars.reserve(n_char, elapsed))
+            self.waited += wait
+
+        if wait > 0:
+            logger.debug(f"Rate limit, waiting {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, limit: Optional[RateLimit]) -> Optional[RateLimiter]:
+    """Limiter shared by every translator of the same backend
+
+    Args:
+        name (str): Backend name (Translator.name)
+        limit (RateLimit, optional): Limits of the backend. None means no limiter
+
+    Returns:
+        Optional[RateLimiter]: Shared limiter of the backend, None if it has no limits
+    """
+    if limit is None:
+        return None
+
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None or limiter.limit != limit:
+            limiter = _limiters[name] = RateLimiter(limit)
+        return limiter
+
+
+def throttle(translator, n_char: int) -> float:
+    """Wait until the translator backend allows a request of n_char characters
+
+    Args:
+        translator (Translator): Translator about to be called
+        n_char (int): Characters of the request
+
+    Returns:
+        float: Seconds waited
+    """
+    limiter = get_limiter(translator.name, translator.rate_limit)
+    if limiter is None:
+        return 0.0
+    return limiter.acquire(n_char)
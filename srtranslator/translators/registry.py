@@ -0,0 +1,94 @@
+import logging
+import importlib
+
+from typing import Dict, List, Type, Union
+
+from .base import Translator
+
+logger = logging.getLogger(__name__)
+
+# Entry point group of translator plugins, name = "package.module:Class"
+ENTRY_POINT_GROUP = "srtranslator.translators"
+
+# Built-in translators as "module:Class", each module imported only once selected
+BUILTIN_TRANSLATORS: Dict[str, str] = {
+    "deepl-scrap": "srtranslator.translators.deepl_handler:DeeplTranslator",
+    "deepl-api": "srtranslator.translators.deepl_api:DeeplApi",
+    "translatepy": "srtranslator.translators.translatepy:TranslatePy",
+    "pydeeplx": "srtranslator.translators.pydeeplx:PyDeepLX",
+}
+
+# Translators registered at runtime, by name
+_registered: Dict[str, Union[str, Type[Translator]]] = {}
+
+
+def _import_object(target: str):
+    module_name, _, attribute = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for name in filter(None, attribute.split(".")):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _entry_points() -> Dict[str, object]:
+    """Translator plugins of the installed packages, by name, not imported"""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return {}
+
+    found = entry_points()
+    # select() from Python 3.10, a dict of groups before
+    group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, "select") else found.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in group}
+
+
+def register_translator(name: str, translator: Union[str, Type[Translator]]) -> None:
+    """Make a translator available by name, before the built-in ones and the plugins
+
+    Args:
+        name (str): Translator name, as given to get_translator or the command line
+        translator (Union[str, Type[Translator]]): Translator class, or "module:Class" to import it only when selected
+    """
+    _registered[name] = translator
+
+
+def available_translators() -> List[str]:
+    """Names of all translators, registered, built-in and plugins, without importing them
+
+    Returns:
+        List[str]: Translator names
+    """
+    names = list(_registered)
+    names += [name for name in BUILTIN_TRANSLATORS if name not in names]
+    names += [name for name in _entry_points() if name not in names]
+    return names
+
+
+def get_translator(name: str) -> Type[Translator]:
+    """Import and return the translator class of a name
+
+    Installed packages can add translators with an entry point in the
+    "srtranslator.translators" group. Plugins are only looked up for names
+    that are not built-in.
+
+    Args:
+        name (str): Translator name, or "module:Class" of any translator
+
+    Raises:
+        KeyError: No translator has this name
+
+    Returns:
+        Type[Translator]: Translator class
+    """
+    target = _registered.get(name) or BUILTIN_TRANSLATORS.get(name)
+    if target is None and ":" in name:
+        target = name
+    if target is None:
+        entry_point = _entry_points().get(name)
+        if entry_point is None:
+            raise KeyError(f"Unknown translator {name}, available: {', '.join(available_translators())}")
+        logger.debug(f"Loading translator plugin {name} from {entry_point.value}")
+        return entry_point.load()
+
+    return _import_object(target) if isinstance(target, str) else target
@@ -1,51 +1,157 @@
 import logging
-import os
 import sys
-import time
+import weakref
+
+from typing import Callable, Dict, Optional, Tuple
 
-import pyperclip
 from selenium import webdriver
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, WebDriverException
 from selenium.webdriver import ActionChains, Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
 
 logger = logging.getLogger(__name__)
 
+# Replace the editor content with the text, firing the input events the page listens to.
+# Returns false when the editor did not take the text, so it is inserted another way.
+INSERT_TEXT_SCRIPT = r"""
+const [element, value, selectOnly] = arguments;
+const isField = (node) => node instanceof HTMLTextAreaElement || node instanceof HTMLInputElement;
+// Custom elements (d-textarea) keep the real editor inside, maybe in their shadow root
+const editor = element.isContentEditable || isField(element)
+    ? element
+    : (element.shadowRoot || element).querySelector("textarea, input, [contenteditable=true], [contenteditable='']")
+        || element.querySelector("textarea, input, [contenteditable=true], [contenteditable='']")
+        || element;
+editor.focus();
+
+if (isField(editor)) {
+    // Native setter, frameworks ignore values set on the element property
+    const prototype = editor instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(prototype, "value").set.call(editor, selectOnly ? "" : value);
+    editor.dispatchEvent(new InputEvent("input", {bubbles: true, inputType: "insertText", data: value}));
+    editor.dispatchEvent(new Event("change", {bubbles: true}));
+    return true;
+}
+
+const selection = window.getSelection();
+const range = document.createRange();
+range.selectNodeContents(editor);
+selection.removeAllRanges();
+selection.addRange(range);
+if (selectOnly) return true;
+
+return document.execCommand("insertText", false, value) && editor.textContent.length > 0;
+"""
+
+# Elements already found in the page of each driver, so the same locator is not searched again
+_element_cache: "weakref.WeakKeyDictionary[webdriver.Remote, Dict[Tuple[str, str], WebElement]]" = weakref.WeakKeyDictionary()
+
+
+def clear_element_cache(driver: webdriver) -> None:
+    """Forget elements found in the page of the driver, once it loads another page
+
+    Args:
+        driver (webdriver): Driver of the page
+    """
+    _element_cache.pop(driver, None)
+
+
 class BaseElement:
+    """Element of the page, found once and then kept in the driver element cache
+
+    Required elements are cached by locator and found again only when the page replaced
+    them (StaleElementReferenceException). Optional and multiple elements are looked up
+    each time, as they are used to check what the page shows right now.
+
+    Args:
+        driver (webdriver): Driver of the page
+        locate_by (str): Name of the By strategy (XPATH, CSS_SELECTOR...)
+        locate_value (str): Locator value
+        multiple (bool, optional): Find all matching elements. Defaults to False.
+        wait_time (float, optional): Seconds to wait for the element, 0 to look it up once. Defaults to 30, 0 if optional.
+        optional (bool, optional): Element may be missing, element is None then. Defaults to False.
+
+    Raises:
+        TimeoutException: A required element is not found in time
+    """
+
+    wait_time = 30
+    # Optional elements check what the page shows right now, without waiting
+    optional_wait_time = 0
+
     def __init__(
             self,
             driver: webdriver,
             locate_by: str,
             locate_value: str,
             multiple: bool = False,
-            wait_time: int = 100,
+            wait_time: Optional[float] = None,
             optional: bool = False,
     ) -> None:
 
         self.driver = driver
-        locator = (getattr(By, locate_by.upper(), "id"), locate_value)
-        find_element = driver.find_elements if multiple else driver.find_element
+        self.locator = (getattr(By, locate_by.upper(), "id"), locate_value)
+        self.multiple = multiple
+        self.optional = optional
+        if wait_time is not None:
+            self.wait_time = wait_time
+        elif optional:
+            self.wait_time = self.optional_wait_time
+
+        self.element = self._resolve()
+
+    def _condition(self) -> Callable:
+        """Expected condition the element must meet to be found"""
+        return EC.presence_of_element_located(self.locator)
+
+    def _resolve(self, use_cache: bool = True):
+        cache = None
+        if not (self.multiple or self.optional):
+            cache = _element_cache.setdefault(self.driver, {})
+            if use_cache and self.locator in cache:
+                return cache[self.locator]
+
+        if not self.wait_time:
+            found = self.driver.find_elements(*self.locator)
+            if not found:
+                if self.optional:
+                    return None
+                raise NoSuchElementException(f"No element ({self.locator[0]} = {self.locator[1]})")
+            element = found if self.multiple else found[0]
+            if cache is not None:
+                cache[self.locator] = element
+            return element
+
+        condition = EC.presence_of_all_elements_located(self.locator) if self.multiple else self._condition()
         try:
-            WebDriverWait(driver, wait_time).until(
-                lambda driver: EC.element_to_be_clickable(locator)
-            )
-            self.element = find_element(*locator)
-            return
-        except Exception as er:
-            if optional:
-                self.element = None
-                return
-            logger.info(f"Exception :: {er}")
-        except:
-            if optional:
-                self.element = None
-                return
-        print(f"Timed out trying to get element ({locate_by} = {locate_value})")
-        logging.warning(f"Timed out trying to get element ({locate_by} = {locate_value})")
-        logger.info("Closing browser")
-        driver.quit()
-        # sys.exit()
+            element = WebDriverWait(self.driver, self.wait_time).until(condition)
+        except WebDriverException as er:
+            if self.optional:
+                return None
+            logger.warning(f"Timed out trying to get element ({self.locator[0]} = {self.locator[1]}) :: {er}")
+            raise
+
+        if cache is not None:
+            cache[self.locator] = element
+        return element
+
+    def with_element(self, action: Callable):
+        """Run an action on the element, finding it again if the page replaced it
+
+        Args:
+            action (Callable): Function receiving the element
+
+        Returns:
+            Result of the action
+        """
+        try:
+            return action(self.element)
+        except StaleElementReferenceException:
+            self.element = self._resolve(use_cache=False)
+            return action(self.element)
 
 
 class Text(BaseElement):
@@ -54,60 +160,86 @@ class Text(BaseElement):
         if self.element is None:
             return ""
 
-        return self.element.get_attribute("text")
+        return self.with_element(lambda element: element.get_attribute("text"))
 
 
 class TextArea(BaseElement):
     def write(self, value: str, is_clipboard: bool = False) -> None:
+        """Replace the text area content
+
+        Args:
+            value (str): Text to write
+            is_clipboard (bool, optional): Insert the whole text at once instead of typing it key by key. Defaults to False.
+        """
         if self.element is None:
             return
 
+        if is_clipboard:
+            self._insert(value)
+            return
+
         # Check OS to use Cmd or Ctrl keys
         cmd_ctrl = Keys.COMMAND if sys.platform == "darwin" else Keys.CONTROL
 
-        # Scroll to the element
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", self.element)
-        actions_handler = ActionChains(self.driver).move_to_element(self.element)
+        def type_keys(element):
+            # Scroll to the element
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+            actions_handler = ActionChains(self.driver).move_to_element(element)
 
-        actions_handler.click().key_down(cmd_ctrl).send_keys("a").key_up(cmd_ctrl).perform()
-        actions_handler.send_keys(Keys.BACKSPACE).perform()
-        actions_handler.send_keys(Keys.CLEAR).perform()
-        if is_clipboard:
-            # Copy the large text to the clipboard using pyperclip
-            # xerox.copy(value)
-            # klembord.set_text(value)
-            # data =html.escape(value)
-            # self.driver.execute_script(f"navigator.clipboard.writeText(unescape(`{data}`));")
-            if os.getenv("MOZ_HEADLESS") is None:  # hidden browser
-                pyperclip.copy(value)
-            else:
-                # BROWSERS_TYPE: str = os.getenv('BROWSERS_TYPE')
-                # if 'firefox' == BROWSERS_TYPE.lower():
-                #     pyautogui.write(value)
-                time.sleep(max(float(len(value) / 1500), 5))
-                self.driver.execute_script(f"navigator.clipboard.writeText(`{value}`);")  # app.jsx
-
-            actions_handler.key_down(cmd_ctrl).send_keys('v').key_up(cmd_ctrl).perform()
-        else:
+            actions_handler.click().key_down(cmd_ctrl).send_keys("a").key_up(cmd_ctrl).perform()
+            actions_handler.send_keys(Keys.BACKSPACE).perform()
+            actions_handler.send_keys(Keys.CLEAR).perform()
             actions_handler.send_keys(*value).perform()
 
+        self.with_element(type_keys)
+
+    def _insert(self, value: str) -> None:
+        """Insert the whole text in the page of this driver only, without the system clipboard
+
+        Args:
+            value (str): Text to write
+        """
+        def insert(element, select_only: bool = False):
+            return self.driver.execute_script(INSERT_TEXT_SCRIPT, element, value, select_only)
+
+        if self.with_element(insert):
+            return
+
+        # Chromium: insert as the browser does for an IME, with trusted input events
+        execute_cdp_cmd = getattr(self.driver, "execute_cdp_cmd", None)
+        if callable(execute_cdp_cmd):
+            self.with_element(lambda element: insert(element, select_only=True))
+            execute_cdp_cmd("Input.insertText", {"text": value})
+            return
+
+        logger.warning("Editor refused inserted text, typing it")
+        self.write(value)
+
     @property
     def value(self) -> None:
         if self.element is None:
             return ""
 
-        return self.element.get_attribute("value")
+        return self.with_element(lambda element: element.get_attribute("value"))
 
 
 class Button(BaseElement):
+    def _condition(self) -> Callable:
+        return EC.element_to_be_clickable(self.locator)
+
     def click(self) -> None:
         if self.element is None:
             return
 
-        try:
-            can_click = getattr(self.element, "click", None)
-            if callable(can_click):
-                self.element.click()
-        except:
-            # Using javascript if usual click function does not work
-            self.driver.execute_script("arguments[0].click();", self.element)
+        def click(element):
+            try:
+                can_click = getattr(element, "click", None)
+                if callable(can_click):
+                    element.click()
+            except StaleElementReferenceException:
+                raise
+            except WebDriverException:
+                # Using javascript if usual click function does not work
+                self.driver.execute_script("arguments[0].click();", element)
+
+        self.with_element(click)
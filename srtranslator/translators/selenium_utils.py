@@ -1,15 +1,20 @@
 import os
+import atexit
+import functools
 import logging
 import os
 import pathlib
 import random
-from typing import Optional, List
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, List
 from urllib.parse import urlparse
 
 from fake_useragent import UserAgent
 from fp.fp import FreeProxy
 from selenium import webdriver
-from selenium.common.exceptions import WebDriverException
 from selenium.webdriver import Proxy, DesiredCapabilities
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.remote.webdriver import WebDriver
@@ -21,6 +26,7 @@ from .selenium_components import (
     TextArea,
     Button,
     Text,
+    clear_element_cache,
 )
 
 
@@ -58,11 +64,46 @@ def create_proxy(country_id: Optional[List[str]] = ["US"],
     )
 
 
-def create_driver(proxy: Optional = None) -> WebDriver:
+def _browser_type() -> str:
+    return (os.getenv('BROWSERS_TYPE') or 'chrome').lower()
+
+
+@functools.lru_cache(maxsize=None)
+def driver_executable(browser: str) -> Optional[str]:
+    """Find the driver binary of the browser once per process, installing it if missing
+
+    Args:
+        browser (str): "firefox" or "chrome"
+
+    Returns:
+        Optional[str]: Driver binary path. None lets Selenium Manager resolve it
+    """
+    name = "geckodriver" if browser == "firefox" else "chromedriver"
+    path = shutil.which(name)
+    if path is not None:
+        return path
+
+    try:
+        if browser == "firefox":
+            logger.info("Installing Firefox GeckoDriver cause it isn't installed")
+            path = GeckoDriverDownloader().download_and_install()[0]
+        else:
+            logger.info("Installing Driver cause it isn't installed")
+            path = ChromeDriverManager().install()
+    except Exception:
+        logger.exception(f"Cannot install {name}, Selenium Manager will look for it")
+        return None
+
+    logger.info(f"Using {name} :: {path}")
+    return path
+
+
+def create_driver(proxy: Optional = None, profile: Optional[str] = None) -> WebDriver:
     """Creates a new Browser selenium webdriver. Install driver if not in path
 
     Args:
         proxy (Optional[Proxy], optional): Selenium WebDriver proxy. Defaults to None.
+        profile (str, optional): Browser profile directory. Defaults to FirefoxProfile or ChromeProfile.
 
     Returns:
         WebDriver: Selenium WebDriver
@@ -70,14 +111,14 @@ def create_driver(proxy: Optional = None) -> WebDriver:
 
     # firefox -marionette -start-debugger-server 2828
 
-    BROWSERS_TYPE: str = os.getenv('BROWSERS_TYPE')
-    if 'firefox' == BROWSERS_TYPE.lower():
-        pathProfile = 'FirefoxProfile'
+    BROWSERS_TYPE: str = _browser_type()
+    if 'firefox' == BROWSERS_TYPE:
+        pathProfile = profile or 'FirefoxProfile'
         firefox_profile = pathlib.Path(pathProfile).resolve()
 
         firefox_capabilities = DesiredCapabilities.FIREFOX
         service = webdriver.firefox.service.Service(
-            # executable_path='/home/nguyentthai96/webdriver',
+            executable_path=driver_executable(BROWSERS_TYPE),
             # port=3000,
             service_args=[
                 # '--marionette-port', '2828', '--connect-existing',
@@ -150,28 +191,17 @@ def create_driver(proxy: Optional = None) -> WebDriver:
         options.set_preference("dom.events.testing.asyncClipboard", True)
 
         logger.info("Creating Selenium Webdriver instance")
-        try:
-            driver = webdriver.Firefox(options=options, service=service)
-        except WebDriverException as e:
-            logger.info("Installing Firefox GeckoDriver cause it isn't installed")
-            logging.exception("WebDriverException", e)
-            gdd = GeckoDriverDownloader()
-            gdd.download_and_install()
-
-            # C:\Users\<UserName>\AppData\Roaming.
-            # https://www.browserstack.com/automate/capabilities
-            # https://stackoverflow.com/questions/72331816/how-to-connect-to-an-existing-firefox-instance-using-seleniumpython
-            # https://www.minitool.com/news/your-firefox-profile-cannot-be-loaded.html
-            # firefox -p
-            # firefox.exe --new-instance -ProfileManager -marionette -start-debugger-server 2828
-            # firefox.exe -marionette -start-debugger-server 2828
-            # firefox.exe --new-instance -P deepl -marionette
-            # service = Service(port=3000, service_args=['--marionette-port', '2828', '--connect-existing'])
-            # https://github.com/aiworkplace/Selenium-Project
-            driver = webdriver.Firefox(options=options, service=service)
-            driver.execute("executeCdpCommand", {"cmd": "Browser.grantPermissions", "params": {
-                "permissions": ["clipboardReadWrite", "backgroundSync", "backgroundFetch"]
-            }})
+        driver = webdriver.Firefox(options=options, service=service)
+        # C:\Users\<UserName>\AppData\Roaming.
+        # https://www.browserstack.com/automate/capabilities
+        # https://stackoverflow.com/questions/72331816/how-to-connect-to-an-existing-firefox-instance-using-seleniumpython
+        # https://www.minitool.com/news/your-firefox-profile-cannot-be-loaded.html
+        # firefox -p
+        # firefox.exe --new-instance -ProfileManager -marionette -start-debugger-server 2828
+        # firefox.exe -marionette -start-debugger-server 2828
+        # firefox.exe --new-instance -P deepl -marionette
+        # service = Service(port=3000, service_args=['--marionette-port', '2828', '--connect-existing'])
+        # https://github.com/aiworkplace/Selenium-Project
         if logger.isEnabledFor(logging.DEBUG):
             driver.get("https://ifconfig.me")
             driver.save_screenshot("check_ip.png")
@@ -182,7 +212,7 @@ def create_driver(proxy: Optional = None) -> WebDriver:
         return driver
 
     service = webdriver.chrome.service.Service(
-        # executable_path=ChromeDriverManager().install(),
+        executable_path=driver_executable(BROWSERS_TYPE),
         service_args=[
             '--disable-build-check',
             # '--unsafely-treat-insecure-origin-as-secure=https://www.deepl.com' // allow get resource from enpoint not safe http
@@ -208,7 +238,7 @@ def create_driver(proxy: Optional = None) -> WebDriver:
     options.add_argument('disable-gpu')
     #
     # options.add_argument("--remote-debugging-port=9222")
-    options.add_argument('user-data-dir=./ChromeProfile')
+    options.add_argument(f"user-data-dir={profile or './ChromeProfile'}")
 
     options.add_argument("--enable-javascript")
     options.add_argument("start-maximized")
@@ -223,14 +253,8 @@ def create_driver(proxy: Optional = None) -> WebDriver:
     user_agent = ua.random
     # options.add_argument(f'user-agent={user_agent}')
 
-    try:
-        logger.info("Creating Selenium Webdriver instance")
-        driver = webdriver.Chrome(options=options, service=service)
-    except WebDriverException as e:
-        logger.info("Installing Driver cause it isn't installed")
-        logging.exception("WebDriverException", e, stack_info=True)
-        ChromeDriverManager().install()
-        driver = webdriver.Chrome(options=options, service=service)
+    logger.info("Creating Selenium Webdriver instance")
+    driver = webdriver.Chrome(options=options, service=service)
     if logger.isEnabledFor(logging.DEBUG):
         driver.get("https://ifconfig.me")
         driver.save_screenshot("check_ip.png")
@@ -254,3 +278,136 @@ def create_driver(proxy: Optional = None) -> WebDriver:
             )
     driver.maximize_window()
     return driver
+
+
+class DriverFactory:
+    """Create drivers fast, a standby driver being always started in advance
+
+    Driver binaries are checked once when the factory is created. Each driver runs on
+    its own copy of the profile template (logged in session, settings), so several
+    drivers never share a profile. After a driver is handed out, the next one starts
+    in background and opens the translator page, so replacing a failed session only
+    waits for the standby driver. Drivers of the factory are given back with
+    `release`, which quits them and deletes their profile copy.
+
+    Args:
+        proxy_factory (Callable[[], Optional[dict]], optional): Gives the proxy of each new driver. Defaults to no proxy.
+        profile_template (str, optional): Profile copied for each driver. Defaults to FirefoxProfile or ChromeProfile.
+        standby (bool, optional): Keep a driver started in advance. Defaults to True.
+        url (str, optional): Page each new driver opens before it is handed out. Defaults to None.
+    """
+
+    # Profile files locked by a running browser or only worth as cache
+    _profile_ignore = staticmethod(shutil.ignore_patterns(
+        "parent.lock", ".parentlock", "lock", "Singleton*", "cache2", "Cache", "Code Cache", "GPUCache",
+    ))
+
+    def __init__(
+            self,
+            proxy_factory: Optional[Callable[[], Optional[dict]]] = None,
+            profile_template: Optional[str] = None,
+            standby: bool = True,
+            url: Optional[str] = None,
+    ) -> None:
+        self.browser = _browser_type()
+        self.proxy_factory = proxy_factory or (lambda: None)
+        self.profile_template = pathlib.Path(
+            profile_template or ("FirefoxProfile" if self.browser == "firefox" else "ChromeProfile")
+        ).resolve()
+        self.standby = standby
+        self.url = url
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._standby: Optional[Future] = None
+        # Profile copy of each driver handed out or in standby
+        self._profiles: Dict[WebDriver, str] = {}
+
+        driver_executable(self.browser)
+        if self.standby:
+            self._standby = self._executor.submit(self._launch)
+        atexit.register(self.close)
+
+    def _clone_profile(self) -> str:
+        profile = tempfile.mkdtemp(prefix="srtranslator-profile-")
+        if self.profile_template.is_dir():
+            shutil.copytree(self.profile_template, profile, ignore=self._profile_ignore, dirs_exist_ok=True)
+        return profile
+
+    def _launch(self, proxy: Optional[dict] = None) -> WebDriver:
+        profile = self._clone_profile()
+        try:
+            driver = create_driver(self.proxy_factory() if proxy is None else proxy, profile)
+        except Exception:
+            shutil.rmtree(profile, ignore_errors=True)
+            raise
+        with self._lock:
+            self._profiles[driver] = profile
+
+        if self.url is not None:
+            try:
+                logger.info(f"Preloading {self.url}")
+                driver.get(self.url)
+            except Exception:
+                # The user of the driver opens the page again
+                logger.exception(f"Cannot preload {self.url}")
+        return driver
+
+    def get_driver(self, proxy: Optional[dict] = None) -> WebDriver:
+        """Give the standby driver, or start one if none is ready, and start the next standby
+
+        Args:
+            proxy (dict, optional): Proxy to use instead of the factory one, a new driver is started on it and the standby is kept. Defaults to None.
+
+        Returns:
+            WebDriver: Selenium WebDriver, on the factory page if it has one
+        """
+        if proxy is not None:
+            return self._launch(proxy)
+
+        with self._lock:
+            standby, self._standby = self._standby, None
+
+        driver = None
+        if standby is not None:
+            try:
+                driver = standby.result()
+            except Exception:
+                logger.exception("Standby driver failed to start, starting a new one")
+
+        if driver is None:
+            driver = self._launch()
+
+        if self.standby:
+            with self._lock:
+                self._standby = self._executor.submit(self._launch)
+        return driver
+
+    def release(self, driver: WebDriver) -> None:
+        """Quit a driver and delete its profile copy
+
+        Args:
+            driver (WebDriver): Driver to quit. A driver not made by the factory is only quit
+        """
+        with self._lock:
+            profile = self._profiles.pop(driver, None)
+        try:
+            driver.quit()
+        finally:
+            if profile is not None:
+                shutil.rmtree(profile, ignore_errors=True)
+
+    def close(self) -> None:
+        """Quit the standby driver and delete profile copies left"""
+        with self._lock:
+            standby, self._standby = self._standby, None
+        if standby is not None:
+            try:
+                self.release(standby.result())
+            except Exception:
+                logger.info("Exception closing standby driver")
+        self._executor.shutdown(wait=False)
+
+        with self._lock:
+            profiles, self._profiles = list(self._profiles.values()), {}
+        for profile in profiles:
+            shutil.rmtree(profile, ignore_errors=True)
@@ -8,40 +8,38 @@ from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 from srtranslator.srt_file import SrtFile
 from srtranslator.ass_file import AssFile
-from srtranslator.translators.deepl_api import DeeplApi
-from srtranslator.translators.deepl_scrap import DeeplTranslator
-from srtranslator.translators.translatepy import TranslatePy
-from srtranslator.translators.pydeeplx import PyDeepLX
+from srtranslator.translators.registry import get_translator
 from togax_xml_layout import parse_layout
 
 _print = print
 
 
 class Srtranslator(toga.App):
+    # Handlers are imported only once selected
     builtin_translators = [
         {
             "id": "deepl-scrap",
             "name": "DeepL Scraper",
             "description": "Web scraper with selenium. Opens Gecodriver (firefox) to translate chunks of 1500 lines",
-            "handler": DeeplTranslator,
+            "handler": "srtranslator.translators.deepl_scrap:DeeplTranslator",
         },
         {
             "id": "deepl-api",
             "name": "DeepL API",
             "description": "Uses a paid DeepL subscription to translate the files",
-            "handler": DeeplApi,
+            "handler": "deepl-api",
         },
         {
             "id": "translatepy",
             "name": "TranslatePy",
             "description": "Uses TranslatePy library to translate from DeepL REST free api",
-            "handler": TranslatePy,
+            "handler": "translatepy",
         },
         {
             "id": "pydeeplx",
             "name": "PyDeepLX",
             "description": "Uses PyDeepLX library to translate from DeepL REST free api",
-            "handler": PyDeepLX,
+            "handler": "pydeeplx",
         },
     ]
 
@@ -80,7 +78,7 @@ class Srtranslator(toga.App):
 
         return next(
             (
-                translator["handler"](**translator_args)
+                get_translator(translator["handler"])(**translator_args)
                 for translator in self.builtin_translators
                 if translator["id"] == self.widgets["translator"].value.id
             ),
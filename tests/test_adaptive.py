@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from srtranslator.translators.adaptive import AdaptiveTranslator
+from srtranslator.translators.base import Translator
+
+
+class Upper(Translator):
+    max_char = 1000
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        self.requests.append(text)
+        return text.upper()
+
+
+class Flaky(Upper):
+    """Fails chunks beyond a size, by error or by losing their lines"""
+
+    def __init__(self, fail_beyond: int, error: bool) -> None:
+        super().__init__()
+        self.fail_beyond = fail_beyond
+        self.error = error
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        translation = super().translate(text, source_language, destination_language)
+        if len(text) <= self.fail_beyond:
+            return translation
+        if self.error:
+            raise ConnectionError("too long")
+        return translation.splitlines()[0]
+
+
+class BatchUpper(Upper):
+    max_bytes = 8000
+    max_texts = 50
+    max_batch_char = 2000
+
+    def translate_batch(self, texts, source_language, destination_language):
+        self.requests.append(list(texts))
+        return [text.upper() for text in texts]
+
+
+def test_default_translate_batch():
+    "Without its own translate_batch, a translator sends one request per text"
+    translator = Upper()
+
+    assert translator.translate_batch(["a", "b"], "en", "fr") == ["A", "B"]
+    assert translator.requests == ["a", "b"]
+
+
+def test_batch_forwarded(tmp_path):
+    "Batch limits and translate_batch of the wrapped translator are kept"
+    translator = BatchUpper()
+    adaptive = AdaptiveTranslator(translator, path=str(tmp_path / "sizes.json"))
+
+    assert adaptive.max_texts == 50
+    assert adaptive.max_batch_char == 2000
+    assert adaptive.translate_batch(["a", "b"], "en", "fr") == ["A", "B"]
+    assert translator.requests == [["a", "b"]]
+
+
+def test_upper_bound(tmp_path):
+    "The size can grow up to the byte limit of the translator, else an explicit limit"
+    path = str(tmp_path / "sizes.json")
+
+    assert AdaptiveTranslator(BatchUpper(), path=path).max_limit == 8000
+    assert AdaptiveTranslator(Upper(), path=path).max_limit == 1000
+    assert AdaptiveTranslator(Upper(), max_limit=3000, path=path).max_limit == 3000
+
+
+def test_grows_on_full_chunk(tmp_path):
+    "A full chunk translated fine grows the size, kept for the next run"
+    path = str(tmp_path / "sizes.json")
+    adaptive = AdaptiveTranslator(Upper(), max_limit=4000, path=path)
+
+    adaptive.translate("a" * 1000, "en", "fr")
+    assert adaptive.max_char == 1250
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file) == {"Upper": 1250}
+    assert AdaptiveTranslator(Upper(), max_limit=4000, path=path).max_char == 1250
+
+    # A short chunk, end of a file, tells nothing
+    adaptive.translate("a" * 100, "en", "fr")
+    assert adaptive.max_char == 1250
+
+
+def test_shrinks_on_error(tmp_path):
+    "A failed chunk shrinks the size"
+    adaptive = AdaptiveTranslator(Flaky(900, error=True), max_limit=4000, path=str(tmp_path / "sizes.json"))
+
+    with pytest.raises(ConnectionError):
+        adaptive.translate("a" * 1000, "en", "fr")
+    assert adaptive.max_char == 500
+    assert adaptive.failures == 1
+
+
+def test_lines_mismatch_halves(tmp_path):
+    "A chunk coming back with missing lines is translated again in halves"
+    translator = Flaky(12, error=False)
+    adaptive = AdaptiveTranslator(translator, min_char=10, max_limit=4000, path=str(tmp_path / "sizes.json"))
+    text = "one\n\ntwo\n\nthree\n\nfour"
+
+    assert adaptive.translate(text, "en", "fr") == text.upper()
+    assert translator.requests == [text, "one\n\ntwo", "three\n\nfour"]
+    assert adaptive.retries == 2
+    assert adaptive.failures == 1
+    assert adaptive.max_char < len(text)
+
+
+def test_min_size(tmp_path):
+    "The size never goes below min_char"
+    adaptive = AdaptiveTranslator(Flaky(0, error=True), min_char=300, path=str(tmp_path / "sizes.json"))
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            adaptive.translate("a" * 400, "en", "fr")
+    assert adaptive.max_char == 300
@@ -0,0 +1,58 @@
+from srtranslator.ass_file import AssFile
+from srtranslator.translators.base import Translator
+
+HEADER = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+class MergingTranslator(Translator):
+    """Upper cases texts, merging the first two lines of chunks of several lines"""
+
+    max_char = 1000
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        lines = text.upper().split("\n")
+        if len(lines) > 1:
+            lines[:2] = [" ".join(lines[:2])]
+        return "\n".join(lines)
+
+
+def _load(tmp_path, texts):
+    path = tmp_path / "sub.ass"
+    path.write_text(HEADER + "".join(
+        f"Dialogue: 0,0:00:0{i}.00,0:00:0{i}.50,Default,,0,0,0,,{text}\n" for i, text in enumerate(texts)
+    ), encoding="utf-8")
+    return AssFile(str(path))
+
+
+def test_merged_lines_translated_per_event(tmp_path):
+    "Lines merged by the translator are translated again event by event"
+    ass = _load(tmp_path, [r"{\i1}Hello{\i0} there", "What?", r"{\pos(10,10)}Sign"])
+    ass.translate(MergingTranslator(), "en", "es")
+
+    assert [cue.text for cue in ass.cues] == [r"{\i1}HELLO{\i0} THERE", "WHAT?", r"{\pos(10,10)}SIGN"]
+
+
+def test_tags_follow_their_index(tmp_path):
+    "Tags moved or dropped by the translator are matched back by index"
+    ass = _load(tmp_path, [r"{\b1}Bold{\b0} and {\i1}italic{\i0}"])
+    event = ass.cues[0]
+    source = event.text
+    list(ass._extract_styles([event]))
+    assert event.text == "{0}Bold{1} and {2}italic{3}"
+
+    restored = ass._restore_styles(event, "{2}italique{3} et {0}gras{1}{1}{7}")
+    assert restored == r"{\i1}italique{\i0} et {\b1}gras{\b0}"
+
+    event.text = source
+    list(ass._extract_styles([event]))
+    restored = ass._restore_styles(event, "{0}gras et italique{3}")
+    assert restored == r"{\b1}gras et italique{\i0}{\b0}{\i1}"
@@ -0,0 +1,79 @@
+import pytest
+import srt
+
+from srtranslator.batch import BatchTranslator
+from srtranslator.translators.base import Translator
+
+CONTENTS = [
+    ["Hello there", "How are you", "Goodbye"],
+    ["Hello there", "Fine thanks"],
+    ["Goodbye", "How are you"],
+]
+
+
+class Upper(Translator):
+    max_char = 1000
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        self.requests.append(text)
+        return text.upper()
+
+
+class BatchUpper(Upper):
+    max_texts = 2
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        raise AssertionError("Batch translators get lists of texts")
+
+    def translate_batch(self, texts, source_language, destination_language):
+        self.requests.append(list(texts))
+        return [text.upper() for text in texts]
+
+
+@pytest.fixture
+def filepaths(tmp_path):
+    paths = []
+    for number, texts in enumerate(CONTENTS):
+        path = tmp_path / f"{number}.srt"
+        path.write_text(srt.compose([
+            srt.Subtitle(index, srt.timedelta(seconds=index), srt.timedelta(seconds=index + 1), text)
+            for index, text in enumerate(texts, 1)
+        ]), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def run(translator, filepaths, **kwargs):
+    done = {}
+    BatchTranslator(translator, "en", "es", **kwargs).translate(
+        filepaths, lambda srt_file: done.setdefault(srt_file.filepath, [sub.text for sub in srt_file.subtitles])
+    )
+    return [done[path] for path in filepaths]
+
+
+def test_files_packed(filepaths):
+    "Subtitles of all files go in the same text chunk"
+    translator = Upper()
+
+    assert run(translator, filepaths) == [[text.upper() for text in texts] for texts in CONTENTS]
+    assert len(translator.requests) == 1
+
+
+def test_batch_api(filepaths):
+    "Translators taking lists of texts get lists, at most max_texts long"
+    translator = BatchUpper()
+
+    assert run(translator, filepaths) == [[text.upper() for text in texts] for texts in CONTENTS]
+    assert all(len(texts) <= 2 for texts in translator.requests)
+    assert sum(map(len, translator.requests)) == 7
+
+
+def test_dedupe_across_files(filepaths):
+    "With dedupe, a text of a chunk is sent once whatever the files it comes from"
+    translator = Upper()
+
+    assert run(translator, filepaths, dedupe=True) == [[text.upper() for text in texts] for texts in CONTENTS]
+    assert translator.requests == ["Hello there\n\nHow are you\n\nGoodbye\n\nFine thanks"]
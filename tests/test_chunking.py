@@ -0,0 +1,44 @@
+from srtranslator.chunking import payload_size, plan_chunks
+
+
+def chunks(texts, *args, **kwargs):
+    return [text for _, text in plan_chunks(texts, str, *args, **kwargs)]
+
+
+def test_exact_char_limit():
+    "A chunk is filled up to the limit, separators included"
+    # "aaaa\nbbbb" is 9 characters
+    assert chunks(["aaaa", "bbbb", "cc"], 9) == ["aaaa\nbbbb", "cc"]
+    assert chunks(["aaaa", "bbbb", "cc"], 8) == ["aaaa", "bbbb\ncc"]
+    assert chunks(["aaaa", "bbbb"], 10, separator="\n\n") == ["aaaa\n\nbbbb"]
+
+
+def test_byte_limit():
+    "Multi-byte texts are cut on their UTF-8 size"
+    texts = ["日本語", "日本語"]
+
+    assert payload_size("日本語", "byte") == 9
+    assert chunks(texts, 100) == ["日本語\n日本語"]
+    assert chunks(texts, 100, max_bytes=18) == ["日本語", "日本語"]
+    assert chunks(texts, 100, max_bytes=19) == ["日本語\n日本語"]
+
+
+def test_unit_beyond_limit_alone():
+    "A unit beyond the limits is sent in its own chunk"
+    assert chunks(["a", "b" * 10, "c"], 5) == ["a", "b" * 10, "c"]
+
+
+def test_batches():
+    "Without separator texts are kept in lists of at most max_units"
+    planned = list(plan_chunks(["aa", "bb", "cc", "dd", "ee"], str, 6, separator=None, max_units=2))
+
+    assert planned == [(["aa", "bb"], ["aa", "bb"]), (["cc", "dd"], ["cc", "dd"]), (["ee"], ["ee"])]
+    # The size of a batch is the sum of the texts sizes
+    assert chunks(["aa", "bb", "cc", "dd"], 6, separator=None) == [["aa", "bb", "cc"], ["dd"]]
+
+
+def test_limit_read_per_chunk():
+    "A callable limit is read again for each chunk"
+    limits = iter([3, 5, 100])
+
+    assert chunks(["a", "b", "c", "d", "e", "f"], lambda: next(limits)) == ["a\nb", "c\nd\ne", "f"]
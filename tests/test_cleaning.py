@@ -0,0 +1,47 @@
+import pytest
+
+from srtranslator.cleaning import TAGS, TextCleaner
+from srtranslator.srt_file import CLEANER
+
+
+@pytest.mark.parametrize("rule, text, cleaned", [
+    (("a|b", "X"), "bbb", "XXX"),
+    (("ab|ac", "X"), "ab ac ad", "X X ad"),
+    (("a*b", "X"), "bbb", "XXX"),
+    (("(?i)hello", "bye"), "HELLO Hello", "bye bye"),
+    (("[xy]z", "-"), "yz", "-"),
+    (("(a)b", r"\1"), "ab", "a"),
+    (("^b", "X"), "bab", "Xab"),
+    (TAGS, "<i>Hello</i> there", "Hello there"),
+    (TAGS, "no tags", "no tags"),
+])
+def test_regex_rules(rule, text, cleaned):
+    "Regex rules replace every match, whatever the pattern starts with"
+    assert TextCleaner([rule]).clean(text) == cleaned
+
+
+def test_literal_rules_single_pass():
+    "Literals of a dict are replaced in one pass, longest first"
+    cleaner = TextCleaner([{"\\n": "\n", "\\": "\n", "ab": "X", "a": "Y"}])
+
+    assert cleaner.clean("ab a\\nb\\c") == "X Y\nb\nc"
+    assert cleaner.clean("nothing") == "nothing"
+
+
+def test_character_rules():
+    "Single characters are translated, or removed when replaced by nothing"
+    assert TextCleaner([{"'": "", "（": "("}]).clean("l'（a）") == "l(a）"
+
+
+def test_rules_in_order():
+    "Each rule runs over the result of the previous one"
+    cleaner = TextCleaner([TAGS, str.strip, lambda text: text or "..."])
+
+    assert cleaner.clean("  <b> </b>  ") == "..."
+    assert cleaner.clean_many(["<i>a</i>", " b "]) == ["a", "b"]
+
+
+def test_srt_cleaner():
+    "SRT content loses its markup and escaped line breaks"
+    assert CLEANER.clean(r"<i>It's</i> one\Ntwo") == "Its one\ntwo"
+    assert CLEANER.clean("<i></i>") == "..."
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+import pyass
+import srt
+
+from srtranslator.ass_file import AssFile
+from srtranslator.cues import Cue
+
+ASS = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+Style: Sign,Arial,16,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,8,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.50,Default,Alice,0,0,0,,{\\i1}Hello{\\i0} there
+Comment: 1,0:00:03.20,0:00:04.00,Default,,0,0,0,,A note
+Dialogue: 2,0:01:05.07,1:00:00.99,Sign,,10,20,30,Scroll up;10;200;5,{\\pos(10,20)}Exit
+"""
+
+
+def test_subtitle_round_trip():
+    "An SRT subtitle comes back the same from its cue"
+    subtitle = srt.Subtitle(3, timedelta(seconds=1, milliseconds=5), timedelta(hours=1, microseconds=999000), "a\nb", "pos")
+    cue = Cue.from_subtitle(subtitle)
+
+    assert (cue.index, cue.start, cue.end, cue.lines) == (3, 1005, 3_600_999, 2)
+    assert cue.to_subtitle() == subtitle
+
+
+def test_event_fields_only():
+    "An ASS cue keeps the fields of its event, not the event"
+    event = pyass.Event(layer=2, start=timedelta(seconds=1), end=timedelta(seconds=2), style="Sign", text="Hi")
+    cue = Cue.from_event(1, event)
+
+    assert not any(isinstance(value, pyass.Event) for value in cue.extra)
+    assert str(cue.to_event()) == str(event)
+
+
+def test_ass_round_trip(tmp_path):
+    "An ASS file loaded and saved untranslated keeps its events"
+    source = tmp_path / "sub.ass"
+    source.write_text(ASS, encoding="utf-8")
+    output = tmp_path / "out.ass"
+
+    ass = AssFile(str(source))
+    assert ass.subtitles.events == []
+    ass.wrap_lines()
+    ass.save(str(output))
+
+    with open(source, encoding="utf-8") as original, open(output, encoding="utf-8") as saved:
+        assert list(map(str, pyass.load(saved).events)) == list(map(str, pyass.load(original).events))
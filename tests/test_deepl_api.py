@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+deepl = pytest.importorskip("deepl")
+requests = pytest.importorskip("requests")
+
+from srtranslator.translators.deepl_api import DeeplApiPool  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict) -> None:
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self.encoding = None
+
+    def close(self) -> None:
+        pass
+
+
+class FakeDeepL:
+    """DeepL API answering per key: a quota, or a status for every translation"""
+
+    def __init__(self, limits: dict, statuses: dict) -> None:
+        self.limits = limits
+        self.statuses = statuses
+        self.requests = []
+
+    def send(self, session, request, **kwargs):
+        key = request.headers["Authorization"].split()[-1]
+        if request.url.endswith("/usage"):
+            return FakeResponse(200, {"character_count": 0, "character_limit": self.limits[key]})
+
+        self.requests.append(key)
+        status = self.statuses.get(key, 200)
+        if status != 200:
+            return FakeResponse(status, {"message": "failed"})
+        texts = json.loads(request.body)["text"]
+        return FakeResponse(200, {"translations": [
+            {"text": text.upper(), "detected_source_language": "EN"} for text in texts
+        ]})
+
+
+@pytest.fixture
+def fake_deepl(monkeypatch):
+    def install(limits, statuses=None):
+        server = FakeDeepL(limits, statuses or {})
+        monkeypatch.setattr(requests.Session, "send", lambda session, request, **kwargs: server.send(session, request, **kwargs))
+        # Set back the client retries the pool turns off
+        monkeypatch.setattr(deepl.http_client, "max_network_retries", deepl.http_client.max_network_retries)
+        return server
+    return install
+
+
+def test_quota_from_billed_characters(fake_deepl):
+    "Each request lowers the remaining quota of its key by the characters billed"
+    fake_deepl({"a:fx": 1000})
+    pool = DeeplApiPool(["a:fx"])
+
+    assert pool.translate_batch(["hello", "world"], "EN", "FR") == ["HELLO", "WORLD"]
+    assert pool.translate("bye", "EN", "FR") == "BYE"
+    assert pool.report() == [
+        {"key": "...a", "requests": 2, "chars": 13, "failures": 0, "remaining": 987, "state": "active"}
+    ]
+
+
+def test_rate_limited_key_moves_chunk(fake_deepl):
+    "A 429 reaches the pool without client retries, the chunk goes to another key"
+    server = fake_deepl({"a:fx": 1000, "b:fx": 1000}, {"a:fx": 429})
+    pool = DeeplApiPool(["a:fx", "b:fx"], cooldown=60)
+
+    for _ in range(3):
+        assert pool.translate("hello", "EN", "FR") == "HELLO"
+
+    # Key a tried once at most, then left aside
+    assert server.requests.count("a:fx") <= 1
+    assert pool.retries == server.requests.count("a:fx")
+
+
+def test_out_of_quota_key_left_out(fake_deepl):
+    "A key out of quota (456) is taken out of the pool"
+    server = fake_deepl({"a:fx": 1000, "b:fx": 1000}, {"a:fx": 456})
+    pool = DeeplApiPool(["a:fx", "b:fx"], max_retries=2)
+
+    for _ in range(3):
+        pool.translate("hello", "EN", "FR")
+
+    states = {key["key"]: key["state"] for key in pool.report()}
+    assert states["...b"] == "active"
+    assert states["...a"] == ("quota" if "a:fx" in server.requests else "active")
+    assert server.requests.count("a:fx") <= 1
+
+
+def test_no_key():
+    "A pool needs at least one key"
+    with pytest.raises(ValueError):
+        DeeplApiPool([])
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from srtranslator.dispatch import translate_chunks
+from srtranslator.translators.base import Translator
+
+
+class FailingTranslator(Translator):
+    """Fails on one chunk, only once the chunks after it are translated"""
+
+    max_char = 100
+
+    def __init__(self, failing: str, after: int) -> None:
+        self.failing = failing
+        self.after = after
+        self.translated = threading.Semaphore(0)
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        if text == self.failing:
+            for _ in range(self.after):
+                assert self.translated.acquire(timeout=5)
+            raise RuntimeError(f"failed {text}")
+        self.translated.release()
+        return text.upper()
+
+
+def test_ordered_results():
+    "Chunks come back in order whatever the concurrency"
+    translator = FailingTranslator("none", 0)
+    chunks = [(i, f"chunk {i}") for i in range(10)]
+    for max_concurrency in (1, 4):
+        results = list(translate_chunks(translator, chunks, "en", "fr", max_concurrency))
+        assert results == [(i, f"CHUNK {i}") for i in range(10)]
+
+
+def test_failure_keeps_completed_chunks():
+    "Chunks finished after a failed one are yielded before its error"
+    translator = FailingTranslator("chunk 2", 3)
+    chunks = [(i, f"chunk {i}") for i in range(6)]
+    results = []
+    with pytest.raises(RuntimeError, match="failed chunk 2"):
+        for key, translation in translate_chunks(translator, chunks, "en", "fr", max_concurrency=4):
+            results.append(key)
+
+    # 0 and 1 in order, then 3, 4 and 5 in flight with the failed chunk
+    assert results == [0, 1, 3, 4, 5]
+
+
+def test_failure_without_completed_chunks():
+    "Nothing is yielded after a failed chunk when the order must have no gap"
+    translator = FailingTranslator("chunk 2", 3)
+    chunks = [(i, f"chunk {i}") for i in range(6)]
+    results = []
+    with pytest.raises(RuntimeError):
+        for key, translation in translate_chunks(
+                translator, chunks, "en", "fr", max_concurrency=4, keep_completed=False
+        ):
+            results.append(key)
+
+    assert results == [0, 1]
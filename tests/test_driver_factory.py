@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+selenium_utils = pytest.importorskip("srtranslator.translators.selenium_utils")
+
+
+class FakeDriver:
+    def __init__(self, profile: str) -> None:
+        self.profile = profile
+        self.current_url = "about:blank"
+        self.quitted = False
+
+    def get(self, url: str) -> None:
+        self.current_url = url
+
+    def quit(self) -> None:
+        self.quitted = True
+
+
+@pytest.fixture
+def factory(monkeypatch, tmp_path):
+    monkeypatch.setattr(selenium_utils, "driver_executable", lambda browser: None)
+    monkeypatch.setattr(selenium_utils, "create_driver", lambda proxy, profile: FakeDriver(profile))
+    template = tmp_path / "profile"
+    template.mkdir()
+    (template / "prefs.js").write_text("session")
+
+    factory = selenium_utils.DriverFactory(profile_template=str(template), url="https://example.com/translator")
+    yield factory
+    factory.close()
+
+
+def test_standby_preloads_page(factory):
+    "Drivers are handed out on the factory page, each on its own profile copy"
+    first = factory.get_driver()
+    second = factory.get_driver()
+
+    assert first.current_url == second.current_url == "https://example.com/translator"
+    assert first.profile != second.profile
+    assert os.path.exists(os.path.join(first.profile, "prefs.js"))
+
+
+def test_release_removes_profile(factory):
+    "Releasing a driver quits it and deletes its profile copy"
+    driver = factory.get_driver()
+    factory.release(driver)
+
+    assert driver.quitted
+    assert not os.path.exists(driver.profile)
+
+
+def test_close_removes_profiles(factory):
+    "Closing quits the standby driver and deletes the profiles left"
+    driver = factory.get_driver()
+    standby = factory._standby.result()
+    factory.close()
+
+    assert standby.quitted
+    assert not os.path.exists(standby.profile)
+    assert not os.path.exists(driver.profile)
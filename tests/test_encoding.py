@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from srtranslator.encoding import detect_encoding, read_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.mark.parametrize("fixture, first, last", [
+    ("cp1252.srt", "J'ai été à l'école hier, c'était très intéressant.", "Voilà, c'est fini."),
+    ("gbk.srt", "你好，我们今天去哪里吃饭？", "我们已经等了半个小时了。"),
+    ("shift_jis.srt", "こんにちは、今日はどこへ行きますか？", "すみません、もう一度言ってください。"),
+])
+def test_legacy_encodings(fixture, first, last):
+    "Subtitles in legacy encodings are read as their original text"
+    text, encoding = read_text(os.path.join(FIXTURES, fixture))
+    lines = text.splitlines()
+
+    assert lines[2] == first
+    assert lines[-2] == last
+
+
+def test_cp1252_preferred():
+    "Western text decoding in CP1252 is not read as another single byte encoding"
+    text = "".join(f"{i}\n00:00:01,000 --> 00:00:02,000\nC'était à l'école, où ça ?\n\n" for i in range(50))
+    assert detect_encoding(text.encode("cp1252")) == "cp1252"
+
+
+def test_unreadable_bytes_as_latin1():
+    "Bytes no encoding reads fall back to latin-1, which decodes any byte"
+    assert detect_encoding(b"\x81\x8d\x90") == "latin-1"
+
+
+def test_encoding_guessed_again_after_sample(tmp_path):
+    "An encoding change after the sample is guessed from the bytes around it"
+    path = tmp_path / "late.srt"
+    path.write_bytes(
+        b"1\n00:00:01,000 --> 00:00:02,000\nplain text\n\n" * 2000
+        + "2\n00:00:03,000 --> 00:00:04,000\nC'était un café\n\n".encode("cp1252")
+    )
+    text, encoding = read_text(str(path))
+
+    assert encoding == "cp1252"
+    assert text.endswith("C'était un café\n\n")
@@ -0,0 +1,86 @@
+import pytest
+import srt
+
+from srtranslator.journal import TranslationJournal, fingerprint
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+
+
+class FailingUpper(Translator):
+    """Upper case translator failing after a number of requests"""
+
+    max_char = 30
+
+    def __init__(self, fail_after: int = None) -> None:
+        self.fail_after = fail_after
+        self.requests = []
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise ConnectionError("interrupted")
+        self.requests.append(text)
+        return text.upper()
+
+
+def test_replay(tmp_path):
+    "Appended chunks are read back by cue index"
+    path = str(tmp_path / "sub.srt.journal")
+    journal = TranslationJournal(path, "job")
+    journal.append({1: "B", 0: "A"})
+    journal.append({})
+    journal.append({2: "C"})
+    journal.close()
+
+    assert TranslationJournal(path, "job").replay() == {0: "A", 1: "B", 2: "C"}
+
+
+def test_incomplete_record_truncated(tmp_path):
+    "A record cut while written is dropped, and new records follow the valid ones"
+    path = tmp_path / "sub.srt.journal"
+    journal = TranslationJournal(str(path), "job")
+    journal.append({0: "A"})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"start": 1, "end": 1, "cues": [[1, "B')
+
+    journal = TranslationJournal(str(path), "job")
+    assert journal.replay() == {0: "A"}
+    journal.append({1: "B"})
+    journal.close()
+
+    assert TranslationJournal(str(path), "job").replay() == {0: "A", 1: "B"}
+
+
+def test_other_job_discarded(tmp_path):
+    "A journal of another translation is deleted instead of replayed"
+    path = tmp_path / "sub.srt.journal"
+    journal = TranslationJournal(str(path), fingerprint(("en", "es"), ["Hello"]))
+    journal.append({0: "Hola"})
+    journal.close()
+
+    assert TranslationJournal(str(path), fingerprint(("en", "fr"), ["Hello"])).replay() == {}
+    assert not path.exists()
+
+
+def test_interrupted_translation_resumes(tmp_path):
+    "Translating a file again after a failure only sends the subtitles not in journal"
+    path = tmp_path / "sub.srt"
+    texts = ["First line", "Second line", "Third line", "Fourth line"]
+    path.write_text(srt.compose([
+        srt.Subtitle(index, srt.timedelta(seconds=index), srt.timedelta(seconds=index + 1), text)
+        for index, text in enumerate(texts, 1)
+    ]), encoding="utf-8")
+
+    with pytest.raises(ConnectionError):
+        SrtFile(str(path)).translate(FailingUpper(fail_after=1), "en", "es")
+    assert (tmp_path / "sub.srt.journal").exists()
+
+    translator = FailingUpper()
+    srt_file = SrtFile(str(path))
+    report = srt_file.translate(translator, "en", "es")
+    srt_file.save(str(tmp_path / "out.srt"))
+
+    assert report.journal_hits == 2
+    assert translator.requests == ["Third line\n\nFourth line"]
+    assert [sub.text for sub in srt_file.subtitles] == [text.upper() for text in texts]
+    assert not (tmp_path / "sub.srt.journal").exists()
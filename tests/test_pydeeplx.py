@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pydeeplx = pytest.importorskip("srtranslator.translators.pydeeplx")
+
+from srtranslator.translators.base import TimeOutException  # noqa: E402
+
+ENDPOINT = "http://deeplx.test/translate"
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.sleeps = []
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(pydeeplx, "time", fake)
+    return fake
+
+
+def translator_answering(*responses, endpoint=ENDPOINT, **kwargs):
+    """PyDeepLX whose requests get the given responses, in order"""
+    translator = pydeeplx.PyDeepLX(endpoint=endpoint, **kwargs)
+    answers = iter(responses)
+    translator.requests = []
+
+    def handler(request):
+        translator.requests.append(request)
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    translator.client = httpx.Client(transport=httpx.MockTransport(handler))
+    return translator
+
+
+def test_deeplx_server(fake_time):
+    "A DeepLX server gets the text and languages, and has no rate limit of its own"
+    translator = translator_answering(httpx.Response(200, json={"code": 200, "data": "Hola"}))
+
+    assert translator.translate("Hello", "EN", "ES") == "Hola"
+    assert json.loads(translator.requests[0].content) == {"text": "Hello", "source_lang": "EN", "target_lang": "ES"}
+    assert translator.rate_limit is None
+    assert translator.retries == 0
+
+
+def test_retries_with_backoff(fake_time):
+    "Rate limits, server errors and broken connections are retried, Retry-After first"
+    translator = translator_answering(
+        httpx.Response(429, headers={"Retry-After": "7"}),
+        httpx.Response(503),
+        httpx.ConnectError("reset"),
+        httpx.Response(200, json={"code": 200, "data": "Hola"}),
+        backoff=1, max_backoff=30,
+    )
+
+    assert translator.translate("Hello", "EN", "ES") == "Hola"
+    assert translator.retries == 3
+    assert fake_time.sleeps[0] == 7
+    assert 0 <= fake_time.sleeps[1] <= 2
+    assert 0 <= fake_time.sleeps[2] <= 4
+
+
+def test_client_error_not_retried(fake_time):
+    "A request the server refuses is not sent again"
+    translator = translator_answering(httpx.Response(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        translator.translate("Hello", "EN", "ES")
+    assert len(translator.requests) == 1
+
+
+def test_gives_up(fake_time):
+    "After max_retries the translation fails"
+    translator = translator_answering(*[httpx.Response(500)] * 3, max_retries=2)
+
+    with pytest.raises(TimeOutException):
+        translator.translate("Hello", "EN", "ES")
+    assert len(translator.requests) == 3
+    assert len(fake_time.sleeps) == 2
+
+
+def test_deepl_jsonrpc(fake_time):
+    "Without endpoint the DeepL jsonrpc request is sent and its result read"
+    translator = translator_answering(
+        httpx.Response(200, json={"result": {"texts": [{"text": "Hola"}]}}), endpoint=None,
+    )
+
+    assert translator.translate("Hello", "EN", "ES") == "Hola"
+    request = json.loads(translator.requests[0].content)
+    assert request["method"] == "LMT_handle_texts"
+    assert request["params"]["texts"][0]["text"] == "Hello"
+    assert request["params"]["lang"] == {"source_lang_user_selected": "EN", "target_lang": "ES"}
@@ -0,0 +1,78 @@
+import pytest
+
+from srtranslator.translators import rate_limit
+from srtranslator.translators.base import Translator
+from srtranslator.translators.rate_limit import RateLimit, RateLimiter, get_limiter, throttle
+
+
+class FakeTime:
+    """Clock moving only when sleeping"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class Echo(Translator):
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        return text
+
+
+class Limited(Echo):
+    rate_limit = RateLimit(requests=1, interval=1)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    return fake
+
+
+def test_burst_then_rate(clock):
+    "Requests go at once up to the burst, then at the allowed rate"
+    limiter = RateLimiter(RateLimit(requests=2, interval=1, burst=3))
+
+    assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_chars_budget(clock):
+    "Characters are budgeted, a request beyond the budget waits for a full bucket"
+    limiter = RateLimiter(RateLimit(chars=100, interval=10))
+
+    assert limiter.acquire(60) == 0
+    assert limiter.acquire(60) == pytest.approx(2.0)
+    assert limiter.acquire(500) == pytest.approx(10.0)
+    assert limiter.waited == pytest.approx(12.0)
+
+
+def test_idle_refills(clock):
+    "Time idle gives the budget back, up to the bucket capacity"
+    limiter = RateLimiter(RateLimit(requests=1, interval=1))
+
+    assert limiter.acquire() == 0
+    clock.now += 100
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(1.0)
+
+
+def test_limiter_shared_per_backend(clock):
+    "Translators of the same backend share a limiter, a new limit replaces it"
+    limiter = get_limiter("Limited", Limited.rate_limit)
+    assert get_limiter("Limited", RateLimit(requests=1, interval=1)) is limiter
+    assert get_limiter("Limited", RateLimit(requests=5, interval=1)) is not limiter
+    assert get_limiter("Limited", None) is None
+
+    # Two instances, a single budget
+    assert throttle(Limited(), 0) == 0
+    assert throttle(Limited(), 0) == pytest.approx(1.0)
+    assert throttle(Echo(), 100) == 0
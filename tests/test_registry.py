@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+
+from srtranslator.translators import registry
+from srtranslator.translators.base import Translator
+
+BACKENDS = [target.partition(":")[0] for target in registry.BUILTIN_TRANSLATORS.values()]
+
+
+class Echo(Translator):
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        return text
+
+
+@pytest.fixture
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(registry, "_registered", {})
+    monkeypatch.setattr(registry, "_entry_points", lambda: {})
+    for module in BACKENDS:
+        monkeypatch.delitem(sys.modules, module, raising=False)
+
+
+def test_listing_imports_nothing(clean_registry):
+    "Names are listed without importing any backend"
+    assert registry.available_translators() == list(registry.BUILTIN_TRANSLATORS)
+    assert not [module for module in BACKENDS if module in sys.modules]
+
+
+def test_registered_first(clean_registry):
+    "Registered translators come before the built-in ones, as classes or imported when selected"
+    registry.register_translator("echo", Echo)
+    registry.register_translator("deepl-api", f"{__name__}:Echo")
+
+    assert registry.available_translators()[:2] == ["echo", "deepl-api"]
+    assert registry.get_translator("echo") is Echo
+    assert registry.get_translator("deepl-api") is Echo
+    assert "srtranslator.translators.deepl_api" not in sys.modules
+
+
+def test_module_path(clean_registry):
+    "Any translator can be given as module:Class"
+    assert registry.get_translator(f"{__name__}:Echo") is Echo
+
+
+def test_plugin(monkeypatch, clean_registry):
+    "Names not built-in are looked up in the entry points of installed packages"
+    class EntryPoint:
+        value = f"{__name__}:Echo"
+
+        def load(self):
+            return Echo
+
+    monkeypatch.setattr(registry, "_entry_points", lambda: {"shout": EntryPoint()})
+
+    assert registry.available_translators()[-1] == "shout"
+    assert registry.get_translator("shout") is Echo
+    with pytest.raises(KeyError):
+        registry.get_translator("missing")
@@ -0,0 +1,48 @@
+from srtranslator.srt_file import SrtFile
+from srtranslator.srt_stream import SrtStream
+from srtranslator.translators.base import Translator
+
+SOURCE = """1
+00:00:01,000 --> 00:00:02,000
+Hello
+world
+
+2
+00:00:03,000 --> 00:00:04,000
+<i>Bye</i>
+
+3
+00:00:05,000 --> 00:00:05,000
+skipped
+
+4
+00:00:06,000 --> 00:00:07,000
+last
+"""
+
+
+class Upper(Translator):
+    max_char = 30
+
+    def translate(self, text: str, source_language: str, destination_language: str) -> str:
+        return text.upper()
+
+
+def test_stream_matches_file(tmp_path):
+    "A stream writes the same file as SrtFile translated then saved"
+    source = tmp_path / "sub.srt"
+    source.write_text(SOURCE, encoding="utf-8")
+
+    sub = SrtFile(str(source))
+    sub.translate(Upper(), "en", "es")
+    sub.join_lines()
+    sub.save(str(tmp_path / "file.srt"))
+
+    SrtStream(str(source), str(tmp_path / "stream.srt")).translate(Upper(), "en", "es", max_concurrency=2)
+
+    assert (tmp_path / "stream.srt").read_text(encoding="utf-8") == (tmp_path / "file.srt").read_text(encoding="utf-8")
+
+
+def test_stream_is_not_a_file(tmp_path):
+    "A stream has no memory, dedupe nor save, it is not usable as a SrtFile"
+    assert not isinstance(SrtStream(str(tmp_path / "sub.srt"), str(tmp_path / "out.srt")), SrtFile)
@@ -0,0 +1,37 @@
+from srtranslator.translation_memory import TranslationMemory
+
+
+def test_lookup_normalized():
+    "Translations are found whatever the spacing of the source, per translator and languages"
+    with TranslationMemory(":memory:") as memory:
+        memory.put_many("deepl", "en", "es", [("Hello  there\n", "Hola")])
+
+        assert memory.get_many("deepl", "en", "es", [" Hello there", "Bye"]) == {" Hello there": "Hola"}
+        assert memory.get_many("deepl", "en", "fr", ["Hello there"]) == {}
+        assert memory.get_many("google", "en", "es", ["Hello there"]) == {}
+        assert memory.stats() == dict(hits=1, misses=3, entries=1)
+
+
+def test_least_recently_used_evicted():
+    "Beyond max_entries, the translations used the longest time ago go first"
+    with TranslationMemory(":memory:", max_entries=2) as memory:
+        memory.put_many("t", "en", "es", [("a", "A"), ("b", "B")])
+        memory.get_many("t", "en", "es", ["a"])
+        memory.put_many("t", "en", "es", [("c", "C")])
+
+        assert memory.get_many("t", "en", "es", ["a", "b", "c"]) == {"a": "A", "c": "C"}
+        assert memory.stats()["entries"] == 2
+
+
+def test_persistent(tmp_path):
+    "A memory on disk keeps translations and their usage order between runs"
+    path = str(tmp_path / "cache" / "memory.sqlite3")
+    with TranslationMemory(path, max_entries=2) as memory:
+        memory.put_many("t", "en", "es", [("a", "A"), ("b", "B")])
+        memory.get_many("t", "en", "es", ["a"])
+
+    with TranslationMemory(path, max_entries=2) as memory:
+        assert memory.stats()["entries"] == 2
+        memory.put_many("t", "en", "es", [("c", "C"), ("a", "ignored")])
+
+        assert memory.get_many("t", "en", "es", ["a", "b", "c"]) == {"a": "A", "c": "C"}
@@ -11,9 +11,12 @@ import timeit
 from typing import List
 
 from srtranslator import SrtFile
-from srtranslator.translators.deepl_handler import DeeplTranslator
+from srtranslator.batch import BatchTranslator
+from srtranslator.translation_memory import TranslationMemory
+from srtranslator.translators.adaptive import AdaptiveTranslator
+from srtranslator.translators.deepl_handler import DeeplTranslator, DeeplBrowserPool
 from srtranslator.translators.log_utils import log_config
-from srtranslator.translators.selenium_utils import create_proxy, create_driver
+from srtranslator.translators.selenium_utils import DriverFactory, create_proxy
 
 parser = argparse.ArgumentParser(description=__doc__)
 parser.add_argument(
@@ -129,6 +132,40 @@ parser.add_argument(
     help="Browser type firefox or chrome, default firefox.",
 )
 
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of browsers translating chunks at the same time. Default: 1",
+)
+
+parser.add_argument(
+    "--memory",
+    type=str,
+    help="Translation memory database path. Texts already translated there are not sent again.",
+)
+
+parser.add_argument(
+    "--dedupe",
+    type=bool,
+    default=False,
+    help="Translate only once subtitles with the same text, in a file and across all files of the folder.",
+)
+
+parser.add_argument(
+    "--adaptive",
+    type=bool,
+    default=False,
+    help="Tune the chunk size at runtime (wrap_limit being the largest) from the speed and failures of DeepL.",
+)
+
+parser.add_argument(
+    "--pack_files",
+    type=bool,
+    default=False,
+    help="Pack subtitles of several files in the same chunks, fewer requests for many small files.",
+)
+
 parser.add_argument(
     "--login_manual",
     type=bool,
@@ -180,23 +217,53 @@ if len(list_file) < 1:
     logger.info(f"Please recheck copy file translate to folder path :: {folder}. No-any file translate.")
     sys.exit(-1)
 
-proxy = None
-if args.proxy_required:
-    proxy = create_proxy(country_id=["US", "GB"], proxyAddresses=args.proxy_address)
-driver = create_driver(proxy)
-#
-try:
-    translator = DeeplTranslator(driver, username=args.username, password=args.userpassword)
+
+def create_proxy_required():
+    if args.proxy_required:
+        return create_proxy(country_id=["US", "GB"], proxyAddresses=args.proxy_address)
+    return None
+
+
+# Driver binaries checked once, and a browser always started in advance on DeepL for the next session
+driver_factory = DriverFactory(create_proxy_required, url=DeeplTranslator.url)
+
+
+def create_translator(proxy_address=args.proxy_address):
+    if args.workers > 1:
+        translator = DeeplBrowserPool(args.workers, username=args.username, password=args.userpassword,
+                                      proxy_address=args.proxy_address, use_proxy=args.proxy_required,
+                                      driver_factory=driver_factory)
+    else:
+        driver = driver_factory.get_driver()
+        try:
+            translator = DeeplTranslator(driver, username=args.username, password=args.userpassword,
+                                         driver_factory=driver_factory)
+        except Exception:
+            driver_factory.release(driver)
+            raise
     translator.max_char = args.wrap_limit
-    translator.proxy_address = args.proxy_address
+    translator.proxy_address = proxy_address
+    if args.adaptive:
+        translator = AdaptiveTranslator(translator, max_limit=args.wrap_limit)
+    return translator
+
+
+translator = None
+try:
+    translator = create_translator()
 except Exception as e:
     logger.exception("Error init driver selenium :: ", e)
     logger.info("Waiting system stop.")
-    if driver is not None:
-        driver.quit()
+    if translator is not None:
+        translator.quit()
     time.sleep(3)
     sys.exit(-1)
 
+memory = TranslationMemory(args.memory) if args.memory else None
+if memory is None and args.dedupe:
+    # In process memory shares translations of repeated texts across files
+    memory = TranslationMemory(":memory:")
+
 start = timeit.default_timer()
 pathtranslated = pathlib.Path('translated').resolve()
 source_completed = pathlib.Path('source_completed').resolve()
@@ -208,46 +275,62 @@ if not os.path.exists(source_completed):
 
 progress = 0
 failed = 0
-for filepath in list_file:
+
+
+def save_translated(srt):
+    global progress
+    head, tail = os.path.split(srt.filepath)
+    # srt.wrap_lines()
+    srt.join_lines()
+
+    filename, file_extension = os.path.splitext(tail)
+    srt.save(os.path.join(pathtranslated, f"{filename}_{args.dest_lang}{file_extension}"))
+    print(f"{tail}  with time {timeit.default_timer() - start}")
+    shutil.move(srt.filepath, os.path.join(source_completed, f"{tail}"))
+    progress += 1
+
+
+if args.pack_files:
+    # Subtitles of several files share the same chunks, translated chunks are kept in journals on failure
+    batch = BatchTranslator(translator, args.src_lang, args.dest_lang, max_concurrency=args.workers,
+                            memory=memory, dedupe=args.dedupe)
     try:
-        head, tail = os.path.split(filepath)
-        logger.info(
-            f"......... FILES TRANSLATING {int(100 * progress / len(list_file))}%   files {tail}... ({progress}/{len(list_file)} summary: {failed} failed)")
-        srt = SrtFile(filepath)
-        srt.translate(translator, args.src_lang, args.dest_lang)
-        # srt.wrap_lines()
-        srt.join_lines()
-
-        filename, file_extension = os.path.splitext(tail)
-        srt.save(os.path.join(pathtranslated, f"{filename}_{args.dest_lang}{file_extension}"))
-        print(f"{tail}  with time {timeit.default_timer() - start}")
-        shutil.move(filepath, os.path.join(source_completed, f"{tail}"))
-        progress += 1
-    except Exception as e:
-        failed += 1
-        logger.error(f"File {filepath} failed cannot save file translate (summary: {failed} failed).")
-        logger.exception(f"Error process file :: {filepath}  Ex:", e)
+        batch.translate(list_file, save_translated)
+    except Exception:
+        logger.exception("Error batch translating, rerun to resume unfinished files.")
+    failed = len(list_file) - progress
+else:
+    for filepath in list_file:
         try:
-            if translator is not None:
-                translator.quit()
-            proxy = None
-            if args.proxy_required:
-                proxy = create_proxy(country_id=["US", "GB"])
-            driver = create_driver(proxy)
-            translator = DeeplTranslator(driver, username=args.username, password=args.userpassword)
-            translator.max_char = args.wrap_limit
-            translator.proxy_address = args.proxy_address
-            if not args.proxy_required:
-                translator.proxy_address = None
+            head, tail = os.path.split(filepath)
+            logger.info(
+                f"......... FILES TRANSLATING {int(100 * progress / len(list_file))}%   files {tail}... ({progress}/{len(list_file)} summary: {failed} failed)")
+            srt = SrtFile(filepath)
+            srt.translate(translator, args.src_lang, args.dest_lang, max_concurrency=args.workers, memory=memory,
+                          dedupe=args.dedupe)
+            save_translated(srt)
         except Exception as e:
-            logger.exception(f"Retry init for next file (summary: {failed} failed). Exception start driver", e)
-            driver = create_driver()
-            translator = DeeplTranslator(driver, username=args.username, password=args.userpassword)
+            failed += 1
+            logger.error(f"File {filepath} failed cannot save file translate (summary: {failed} failed).")
+            logger.exception(f"Error process file :: {filepath}  Ex:", e)
+            try:
+                if translator is not None:
+                    translator.quit()
+                # Standby browser of the factory, already started with its own proxy
+                translator = create_translator(args.proxy_address if args.proxy_required else None)
+            except Exception as e:
+                logger.exception(f"Retry init for next file (summary: {failed} failed). Exception start driver", e)
+                translator = create_translator()
 
 logger.info(
     f"================================================================================================================")
 logger.info(
     f"_________________  Files Translating complete {int(100 * progress / len(list_file))}%   files  numbers {progress}/{len(list_file)}   ({failed} failed)  _________________")
 
+if memory is not None:
+    logger.info(f"Translation memory :: {memory.stats()}")
+    memory.close()
+
 translator.quit()
+driver_factory.close()
 time.sleep(5)